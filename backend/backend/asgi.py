@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+# Async signup/login with password hashing off the event loop, and async
+# project/todo views.
+os.environ.setdefault("DJANGO_ASYNC_AUTH_VIEWS", "1")
+os.environ.setdefault("DJANGO_ASYNC_API_VIEWS", "1")
 
 application = get_asgi_application()
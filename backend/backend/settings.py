@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -45,6 +46,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "userapp.middleware.RequestInstrumentationMiddleware",
+    "userapp.middleware.ProfilingMiddleware",
+    "userapp.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -53,6 +57,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "userapp.middleware.SQLiteWriteLockMiddleware",
 ]
 
 ROOT_URLCONF = "backend.urls"
@@ -79,13 +84,77 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLITE_TUNED applies SQLITE_PRAGMAS to every connection (userapp/db.py),
+# keeps connections open between requests and starts transactions with
+# BEGIN IMMEDIATE, so a transaction that will write takes the lock up front
+# (waiting out the busy timeout) instead of failing with "database is
+# locked" when it upgrades from a read. SQLITE_SERIALIZE_WRITES
+# queues unsafe requests on a lock file shared by all worker processes
+# (userapp.middleware.SQLiteWriteLockMiddleware); a request that waits longer
+# than SQLITE_WRITE_LOCK_TIMEOUT seconds gets a 503 with Retry-After. Both
+# are off unless DJANGO_SQLITE_TUNED=1.
+SQLITE_TUNED = os.environ.get("DJANGO_SQLITE_TUNED", "0") == "1"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+}
+SQLITE_SERIALIZE_WRITES = SQLITE_TUNED
+SQLITE_WRITE_LOCK_TIMEOUT = 30
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get("DJANGO_SQLITE_NAME", BASE_DIR / "db.sqlite3"),
+        "CONN_MAX_AGE": 600 if SQLITE_TUNED else 0,
+        "CONN_HEALTH_CHECKS": SQLITE_TUNED,
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"} if SQLITE_TUNED else {},
     }
 }
 
+# Read replicas, as a comma-separated list of SQLite files in
+# DJANGO_READ_REPLICAS (e.g. copies refreshed with `manage.py sync_replicas`).
+# GETs on the project/todo views read from a random replica, except for
+# users who wrote in the last REPLICA_STICKY_SECONDS, whose reads stay on
+# the primary so they see their own changes (userapp/routers.py). A replica
+# last synced more than REPLICA_MAX_LAG seconds ago is skipped.
+READ_REPLICAS = []
+for index, name in enumerate(filter(None, os.environ.get("DJANGO_READ_REPLICAS", "").split(",")), start=1):
+    DATABASES[f"replica{index}"] = {**DATABASES["default"], "NAME": name, "TEST": {"MIRROR": "default"}}
+    READ_REPLICAS.append(f"replica{index}")
+REPLICA_STICKY_SECONDS = 10
+REPLICA_MAX_LAG = 60
+DATABASE_ROUTERS = ["userapp.routers.ReadReplicaRouter"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# Backs the versioned list response cache (userapp/cache.py). Local memory
+# is fine for a single process; set DJANGO_FILE_CACHE_DIR (or point this at
+# Redis/Memcached) when running several workers so they all see the same
+# version bumps.
+
+if os.environ.get("DJANGO_FILE_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["DJANGO_FILE_CACHE_DIR"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+RESPONSE_CACHE_ALIAS = "default"
+# Seconds a cached list body is kept; ETags stay valid until the next write.
+RESPONSE_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -128,6 +197,29 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Resolve the user behind a JWT from the cache (userapp.authentication)
+# instead of loading it on every request. Entries are dropped whenever the
+# user row is saved or deleted and expire after AUTH_USER_CACHE_TIMEOUT
+# seconds. Invalidation must reach every worker, so it is only on by
+# default with the shared file cache; set DJANGO_CACHED_JWT_AUTH=1 when
+# CACHES points at another shared backend.
+CACHED_JWT_AUTH = os.environ.get(
+    "DJANGO_CACHED_JWT_AUTH", "1" if os.environ.get("DJANGO_FILE_CACHE_DIR") else "0"
+) == "1"
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Serve signup/login from the async views in userapp.async_views, which hash
+# passwords in a pool of PASSWORD_HASHING_CONCURRENCY threads (None: up to 4,
+# one per CPU) and answer 503 once PASSWORD_HASHING_MAX_QUEUE hashes are
+# waiting. backend/asgi.py turns this on; under WSGI the DRF views are used.
+ASYNC_AUTH_VIEWS = os.environ.get("DJANGO_ASYNC_AUTH_VIEWS", "0") == "1"
+PASSWORD_HASHING_CONCURRENCY = None
+PASSWORD_HASHING_MAX_QUEUE = 100
+
+# Serve the project/todo list and detail endpoints from the async views in
+# userapp.async_views (async ORM reads). Also turned on by backend/asgi.py.
+ASYNC_API_VIEWS = os.environ.get("DJANGO_ASYNC_API_VIEWS", "0") == "1"
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -135,14 +227,145 @@ REST_FRAMEWORK = {
         # 'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'userapp.authentication.CachedJWTAuthentication'
+        if CACHED_JWT_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    # Same as DRF's defaults, timed for the Server-Timing header and
+    # encoding/decoding JSON with orjson under FAST_JSON.
+    'DEFAULT_RENDERER_CLASSES': [
+        'userapp.renderers.JSONRenderer',
+        'userapp.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'userapp.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Render and parse API JSON with orjson when it is installed (it is
+# optional; without it DRF's stdlib encoding is used). Same bytes either way.
+FAST_JSON = os.environ.get("DJANGO_FAST_JSON", "1") == "1"
+
+# Compress responses of at least COMPRESSION_MIN_SIZE bytes with brotli
+# (when installed) or gzip, as negotiated with the client
+# (userapp/compression.py). Brotli's top qualities are too slow for
+# per-request use; 4 compresses better than gzip -6 at a similar speed.
+COMPRESSION = os.environ.get("DJANGO_COMPRESSION", "1") == "1"
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+
+# Default page size for the keyset-paginated list views; clients may ask
+# for up to MAX_PAGE_SIZE rows with ?page_size=.
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Build list pages from .values() rows rather than serializing model
+# instances (userapp.mixins.ValuesListMixin); the payload is the same.
+LIST_VALUES_FAST_PATH = os.environ.get("DJANGO_LIST_VALUES_FAST_PATH", "1") == "1"
+
+# Todos embedded per project by ?include=todos on the project list; the
+# rest are reached through each project's todos_next link.
+EMBEDDED_TODOS_LIMIT = 20
+
+# Most change log rows returned by one GET /api/sync/; clients may ask for
+# fewer with ?limit= and follow has_more/token for the rest.
+SYNC_BATCH_SIZE = 500
+
+# Server-sent change events (GET /api/events/, routed with the async API
+# views; see userapp/events.py). EVENT_BROKER fans committed changes out to
+# the open streams. A stream batches the changes of EVENT_COALESCE_MS into
+# one event, replaces them with a single "resync" event beyond
+# EVENT_MAX_PENDING changed objects and sends a keepalive comment after
+# EVENT_HEARTBEAT_SECONDS without events.
+EVENT_BROKER = "userapp.events.InProcessBroker"
+EVENT_COALESCE_MS = 100
+EVENT_MAX_PENDING = 500
+EVENT_HEARTBEAT_SECONDS = 15
+
 CORS_ALLOW_ALL_ORIGINS = True
+# Let the frontend read the pagination Link header and the request timings.
+CORS_EXPOSE_HEADERS = ['Link', 'Server-Timing']
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=120),   
     'REFRESH_TOKEN_LIFETIME': timedelta(days=3),     
 
-}
\ No newline at end of file
+}
+
+# Number of custom_id values each process reserves per trip to the
+# IdSequence table. 1 keeps ids strictly sequential; larger blocks trade
+# gaps after a restart for fewer writes on busy deployments.
+CUSTOM_ID_BLOCK_SIZE = 1
+
+# Upper bound on creates + updates + deletes in one bulk todo request.
+TODO_BULK_MAX_ITEMS = 1000
+
+# Rows fetched per round trip when streaming a project export.
+EXPORT_CHUNK_SIZE = 2000
+
+# Todos inserted per transaction by the importer (import_todos command and
+# the todos/import/ endpoint).
+IMPORT_BATCH_SIZE = 2000
+
+# Todos completed and left untouched for ARCHIVE_AFTER_DAYS days are moved to
+# the archive table by `manage.py archive_todos` (run it from cron), in
+# transactions of ARCHIVE_BATCH_SIZE todos (userapp/archive.py).
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 500
+
+# Deleting a project hides it at once; its todos are then deleted by a
+# background worker in transactions of PURGE_CHUNK_SIZE rows
+# (userapp/purge.py). With DJANGO_PURGE_IN_BACKGROUND=0 the purge runs inline
+# when the deleting transaction commits.
+PURGE_IN_BACKGROUND = os.environ.get("DJANGO_PURGE_IN_BACKGROUND", "1") == "1"
+PURGE_CHUNK_SIZE = 1000
+
+# Seconds without progress after which a running purge counts as abandoned
+# and `manage.py purge_deleted_projects` takes it over.
+PURGE_STALE_AFTER = 300
+
+# Per-request instrumentation (userapp/instrumentation.py): query count, DB
+# time and auth/permission/serializer/render time in a Server-Timing header
+# and a JSON line on the "userapp.requests" logger. Requests taking at least
+# SLOW_REQUEST_MS are logged as warnings with their SQL statements (never
+# their parameters). The log level is DJANGO_REQUEST_LOG_LEVEL (default INFO;
+# the test runner silences it). Off unless DJANGO_REQUEST_INSTRUMENTATION=1:
+# the header goes to every client (CORS exposes it) and tells them how the
+# server spends its time.
+REQUEST_INSTRUMENTATION = os.environ.get("DJANGO_REQUEST_INSTRUMENTATION", "0") == "1"
+SLOW_REQUEST_MS = 500
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "userapp.requests": {
+            "handlers": ["console"],
+            "level": os.environ.get("DJANGO_REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+        "userapp.purge": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+# Test runner that quiets the per-request log lines while the suite runs.
+TEST_RUNNER = "tests.runner.TestRunner"
+
+# Opt-in profiling of live traffic (userapp/profiling.py): a
+# PROFILE_SAMPLE_RATE fraction (0-1) of requests to the userapp views, and
+# any request whose X-Profile header equals PROFILE_TOKEN, run under
+# cProfile. Stats are aggregated per route into PROFILE_DIR; rank them with
+# `manage.py merge_profiles`. Both are off unless set in the environment.
+PROFILE_SAMPLE_RATE = float(os.environ.get("DJANGO_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.environ.get("DJANGO_PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("DJANGO_PROFILE_DIR", BASE_DIR / "profiles")
@@ -0,0 +1,8 @@
+"""
+Benchmarks for the userapp API.
+
+Each module is a script run from the backend directory against a throwaway
+test database, e.g.::
+
+    python -m benchmarks.auth --requests 2000
+"""
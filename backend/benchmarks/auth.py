@@ -0,0 +1,57 @@
+"""
+Per-request latency of an authenticated endpoint with the stock
+JWTAuthentication versus CachedJWTAuthentication.
+
+    python -m benchmarks.auth [--requests N]
+"""
+import argparse
+
+from .utils import measure, print_table, setup, test_database
+
+
+def run(requests):
+    from unittest import mock
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from userapp.authentication import CachedJWTAuthentication
+    from userapp.models import Project
+    from userapp.views import ProjectDetailView
+
+    user = User.objects.create_user(username="bench", password="bench-password")
+    project = Project.objects.create(title="Bench Project", user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    url = reverse("project-detail", kwargs={"pk": project.id})
+
+    rows = []
+    for auth_class in (JWTAuthentication, CachedJWTAuthentication):
+        with mock.patch.object(ProjectDetailView, "authentication_classes", [auth_class]):
+            client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url)
+            query_count = len(queries)
+            result = measure(lambda: client.get(url), requests)
+        rows.append({"authentication": auth_class.__name__, "queries": query_count, **result})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        rows = run(args.requests)
+    print_table(rows, ["authentication", "queries", "mean_ms", "p50_ms", "p99_ms", "throughput_rps"])
+
+
+if __name__ == "__main__":
+    main()
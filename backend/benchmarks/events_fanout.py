@@ -0,0 +1,60 @@
+"""
+Fan-out of change events through InProcessBroker: the time from the first
+of a burst of publishes in a worker thread (one per change, as separate
+commits make them) until every open stream of the user has its event, and
+how many events the burst becomes once the streams coalesce it.
+
+    python -m benchmarks.events_fanout [--streams N ...] [--bursts N] [--burst-size N]
+"""
+import argparse
+import asyncio
+import time
+
+from .utils import print_table, setup, summarize
+
+
+async def fan_out(streams, bursts, burst_size):
+    from userapp.events import InProcessBroker, Subscription
+
+    broker = InProcessBroker()
+    subscriptions = [Subscription(max_pending=10000) for _ in range(streams)]
+    for subscription in subscriptions:
+        broker.subscribe(1, subscription)
+
+    samples, events, change_id = [], 0, 0
+    for burst in range(bursts):
+        changes = []
+        for k in range(burst_size):
+            change_id += 1
+            # Repeated updates to a handful of todos, as a bulk edit makes.
+            changes.append((change_id, "todo", "update", k % 10, 1))
+        t0 = time.perf_counter()
+        await asyncio.to_thread(lambda: [broker.publish(1, [change]) for change in changes])
+        results = await asyncio.gather(*(subscription.next_event() for subscription in subscriptions))
+        samples.append(time.perf_counter() - t0)
+        events += len(results)
+    return samples, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 100, 1000], help="Open streams of the same user.")
+    parser.add_argument("--bursts", type=int, default=50)
+    parser.add_argument("--burst-size", type=int, default=100, help="Changes published per burst.")
+    args = parser.parse_args()
+
+    setup()
+    rows = []
+    for streams in args.streams:
+        samples, events = asyncio.run(fan_out(streams, args.bursts, args.burst_size))
+        rows.append({
+            "streams": streams,
+            "changes": args.bursts * args.burst_size * streams,
+            "events": events,
+            **summarize(samples, sum(samples)),
+        })
+    print_table(rows, ["streams", "changes", "events", "mean_ms", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Rendering time and transfer size of an uncached todo list page: DRF's
+stdlib JSON encoding versus orjson (FAST_JSON), and the body sent with no
+compression, gzip and brotli. Render and compression times are the
+"render" and "compress" entries of the response's Server-Timing header.
+
+    python -m benchmarks.json_compression [--todos N] [--requests N]
+"""
+import argparse
+import statistics
+import time
+
+from .utils import print_table, setup, summarize, test_database
+
+
+def timing_ms(response, metric):
+    for entry in response["Server-Timing"].split(","):
+        name, *params = entry.strip().split(";")
+        if name == metric:
+            return float(params[0].split("=", 1)[1])
+    return 0.0
+
+
+def run(todos, requests):
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from userapp import compression
+    from userapp.importer import TodoImporter
+    from userapp.models import Project
+
+    user = User.objects.create_user(username="bench", password="bench-password")
+    project = Project.objects.create(title="Bench Project", user=user)
+    TodoImporter(project).run((f"Bench todo number {k} with a realistic description", k % 3 == 0) for k in range(todos))
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    url = reverse("todo-list-create", kwargs={"project_id": project.id})
+
+    variants = [("stdlib", False, "identity"), ("orjson", True, "identity"), ("orjson", True, "gzip")]
+    if "br" in compression.available():
+        variants.append(("orjson", True, "br"))
+    rows = []
+    for encoder, fast_json, encoding in variants:
+        samples, rendering, compressing = [], [], []
+        with override_settings(FAST_JSON=fast_json, COMPRESSION=True, REQUEST_INSTRUMENTATION=True):
+            for _ in range(requests):
+                cache.clear()
+                t0 = time.perf_counter()
+                response = client.get(url, {"page_size": todos}, HTTP_ACCEPT_ENCODING=encoding)
+                samples.append(time.perf_counter() - t0)
+                assert response.status_code == 200, response.status_code
+                rendering.append(timing_ms(response, "render"))
+                compressing.append(timing_ms(response, "compress"))
+        rows.append({
+            "encoder": encoder,
+            "encoding": response.get("Content-Encoding", "identity"),
+            "bytes": len(response.content),
+            "render_ms": round(statistics.median(rendering), 3),
+            "compress_ms": round(statistics.median(compressing), 3),
+            **summarize(samples, sum(samples)),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--todos", type=int, default=1000, help="Todos in the project, all on one page.")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        rows = run(args.todos, args.requests)
+    print_table(rows, ["encoder", "encoding", "bytes", "render_ms", "compress_ms", "mean_ms", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
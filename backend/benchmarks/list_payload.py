@@ -0,0 +1,82 @@
+"""
+Payload size and serialization time of an uncached todo list page, built
+by TodoSerializer versus the .values() fast path, with and without
+?fields=. Serialization time is the "serializer" entry of the response's
+Server-Timing header.
+
+    python -m benchmarks.list_payload [--todos N] [--requests N]
+"""
+import argparse
+import statistics
+import time
+
+from .utils import print_table, setup, summarize, test_database
+
+FIELDS = "id,description,status"
+
+
+def serializer_ms(response):
+    for entry in response["Server-Timing"].split(","):
+        name, *params = entry.strip().split(";")
+        if name == "serializer":
+            return float(params[0].split("=", 1)[1])
+    return 0.0
+
+
+def run(todos, requests):
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from userapp.importer import TodoImporter
+    from userapp.models import Project
+
+    user = User.objects.create_user(username="bench", password="bench-password")
+    project = Project.objects.create(title="Bench Project", user=user)
+    TodoImporter(project).run((f"Bench todo number {k} with a realistic description", k % 3 == 0) for k in range(todos))
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    url = reverse("todo-list-create", kwargs={"project_id": project.id})
+
+    rows = []
+    for label, fast_path, params in (
+        ("serializer", False, {}),
+        ("values", True, {}),
+        ("serializer ?fields", False, {"fields": FIELDS}),
+        ("values ?fields", True, {"fields": FIELDS}),
+    ):
+        samples, serializing = [], []
+        with override_settings(LIST_VALUES_FAST_PATH=fast_path, REQUEST_INSTRUMENTATION=True):
+            for _ in range(requests):
+                cache.clear()
+                t0 = time.perf_counter()
+                response = client.get(url, {"page_size": todos, **params})
+                samples.append(time.perf_counter() - t0)
+                assert response.status_code == 200, response.status_code
+                serializing.append(serializer_ms(response))
+        rows.append({
+            "list": label,
+            "bytes": len(response.content),
+            "serializer_ms": round(statistics.median(serializing), 3),
+            **summarize(samples, sum(samples)),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--todos", type=int, default=1000, help="Todos in the project, all on one page.")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        rows = run(args.todos, args.requests)
+    print_table(rows, ["list", "bytes", "serializer_ms", "mean_ms", "p50_ms", "p99_ms", "throughput_rps"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Latency of an authenticated CRUD endpoint while a burst of logins is in
+flight, served through the ASGI handler with the sync DRF login view
+versus the async one that hashes in the bounded pool.
+
+    python -m benchmarks.login_storm [--logins N] [--reads N]
+"""
+import argparse
+import asyncio
+import time
+
+from .utils import print_table, setup, summarize, test_database, urlconf
+
+
+async def storm(client, token, project_url, logins, reads):
+    async def login():
+        await client.post('/api/login/', {'username': 'bench', 'password': 'bench-password'})
+
+    async def read():
+        t0 = time.perf_counter()
+        response = await client.get(project_url, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - t0
+
+    started = time.perf_counter()
+    login_tasks = [asyncio.ensure_future(login()) for _ in range(logins)]
+    await asyncio.sleep(0)
+    samples = await asyncio.gather(*(read() for _ in range(reads)))
+    await asyncio.gather(*login_tasks)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def run(logins, reads):
+    from django.contrib.auth.models import User
+    from django.test import AsyncClient, override_settings
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from userapp import hashing
+    from userapp.models import Project
+
+    user = User.objects.create_user(username="bench", password="bench-password")
+    project = Project.objects.create(title="Bench Project", user=user)
+    token = str(RefreshToken.for_user(user).access_token)
+    project_url = f"/api/projects/{project.id}/"
+
+    rows = []
+    for async_auth in (False, True):
+        with override_settings(ROOT_URLCONF=urlconf(async_auth=async_auth, async_api=False)):
+            result = asyncio.run(storm(AsyncClient(), token, project_url, logins, reads))
+        rows.append({"login view": "async" if async_auth else "sync", **result})
+    hashing.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--reads", type=int, default=40)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        rows = run(args.logins, args.reads)
+    print_table(rows, ["login view", "requests", "mean_ms", "p50_ms", "p99_ms", "throughput_rps"])
+
+
+if __name__ == "__main__":
+    main()
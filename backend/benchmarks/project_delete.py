@@ -0,0 +1,72 @@
+"""
+Deleting a big project: how long the DELETE request takes, and how long
+until the todos are gone, for Django's cascade in the request (what
+Project.delete() does) versus marking the project deleted and purging its
+todos from the background worker in PURGE_CHUNK_SIZE transactions
+(userapp/purge.py). `txn_ms` is the longest single write transaction,
+i.e. the longest other writers wait for SQLite's lock; for the purge it is
+the mean chunk.
+
+    python -m benchmarks.project_delete [--todos N ...] [--chunk-size N]
+"""
+import argparse
+import math
+import time
+
+from .utils import print_table, setup, test_database
+
+
+def big_project(user, todos):
+    from userapp.importer import TodoImporter
+    from userapp.models import Project
+
+    project = Project.objects.create(title=f"Bench project {todos}-{time.perf_counter_ns()}", user=user)
+    TodoImporter(project).run((f"Bench todo {k}", k % 3 == 0) for k in range(todos))
+    return project
+
+
+def run(todos, chunk_size):
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+
+    from userapp.purge import delete_project, get_executor
+
+    user, _ = User.objects.get_or_create(username="bench")
+    rows = []
+
+    project = big_project(user, todos)
+    t0 = time.perf_counter()
+    project.delete()
+    elapsed = (time.perf_counter() - t0) * 1000
+    rows.append({"mode": "cascade", "todos": todos, "request_ms": round(elapsed, 3),
+                 "done_ms": round(elapsed, 3), "txn_ms": round(elapsed, 3)})
+
+    project = big_project(user, todos)
+    with override_settings(PURGE_IN_BACKGROUND=True, PURGE_CHUNK_SIZE=chunk_size):
+        t0 = time.perf_counter()
+        delete_project(project)
+        request = (time.perf_counter() - t0) * 1000
+        # One worker: this runs once the purge has finished.
+        get_executor().submit(int).result()
+        done = (time.perf_counter() - t0) * 1000
+    rows.append({"mode": "purge", "todos": todos, "request_ms": round(request, 3), "done_ms": round(done, 3),
+                 "txn_ms": round((done - request) / max(1, math.ceil(todos / chunk_size)), 3)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--todos", type=int, nargs="+", default=[10000, 100000], help="Todos in the deleted project.")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    rows = []
+    with test_database():
+        for todos in args.todos:
+            rows.extend(run(todos, args.chunk_size))
+    print_table(rows, ["mode", "todos", "request_ms", "done_ms", "txn_ms"])
+
+
+if __name__ == "__main__":
+    main()
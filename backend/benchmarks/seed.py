@@ -0,0 +1,87 @@
+import random
+import time
+
+WORDS = (
+    "review update write fix plan call email buy book check clean deploy design draft file "
+    "merge migrate order pay prepare print read refactor renew schedule send ship sign test "
+    "backup budget contract deck docs expenses feedback flights groceries invoice meeting "
+    "milestone notes onboarding payroll pipeline proposal release report roadmap "
+    "quarterly weekly monthly urgent client team vendor server laptop garden kitchen car"
+).split()
+
+
+def description(rng, n):
+    return f"{' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 7))).capitalize()} #{n}"
+
+
+def seed(users, projects, todos, batch_size=10000, log=print):
+    """
+    Fill an empty database with `users` users, `projects` projects spread
+    evenly over them and `todos` todos spread evenly over the projects. Rows
+    go in with bulk_create, so custom_ids, counters and the change log are
+    filled in here.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.db import transaction
+
+    from userapp.ids import allocate_custom_ids
+    from userapp.models import Change, Project, Todo
+
+    rng = random.Random(42)
+    started = time.perf_counter()
+    password = make_password("bench-password")
+    User.objects.bulk_create(
+        [User(username=f"bench{i}", email=f"bench{i}@example.com", password=password) for i in range(users)],
+        batch_size=batch_size,
+    )
+    user_ids = list(User.objects.filter(username__startswith="bench").order_by("id").values_list("id", flat=True))
+    log(f"Seeded {len(user_ids)} users")
+
+    todos_per_project = todos // projects
+    completed_per_project = len(range(0, todos_per_project, 3))
+    custom_ids = allocate_custom_ids("PROJ", projects)
+    Project.objects.bulk_create(
+        [
+            Project(
+                title=f"Project {n}", user_id=user_ids[n % len(user_ids)], custom_id=custom_ids[n],
+                todo_count=todos_per_project, completed_count=completed_per_project,
+            )
+            for n in range(projects)
+        ],
+        batch_size=batch_size,
+    )
+    project_users = dict(Project.objects.order_by("id").values_list("id", "user_id"))
+    project_ids = list(project_users)
+    Change.objects.bulk_create(
+        [Change(user_id=user_id, kind=Change.PROJECT, action=Change.CREATE, object_id=project_id, project_id=project_id)
+         for project_id, user_id in project_users.items()],
+        batch_size=batch_size,
+    )
+    log(f"Seeded {len(project_ids)} projects")
+
+    created = 0
+    for start in range(0, len(project_ids), max(1, batch_size // max(1, todos_per_project))):
+        chunk = project_ids[start:start + max(1, batch_size // max(1, todos_per_project))]
+        with transaction.atomic():
+            ids = iter(allocate_custom_ids("TODO", len(chunk) * todos_per_project))
+            created_todos = Todo.objects.bulk_create(
+                [
+                    Todo(project_id=project_id, description=description(rng, k), status=k % 3 == 0, custom_id=next(ids))
+                    for project_id in chunk
+                    for k in range(todos_per_project)
+                ],
+                batch_size=batch_size,
+            )
+            Change.objects.bulk_create(
+                [
+                    Change(user_id=project_users[todo.project_id], kind=Change.TODO, action=Change.CREATE,
+                           object_id=todo.id, project_id=todo.project_id)
+                    for todo in created_todos
+                ],
+                batch_size=batch_size,
+            )
+        created += len(chunk) * todos_per_project
+        if created % (batch_size * 10) < len(chunk) * todos_per_project:
+            log(f"Seeded {created} todos ({time.perf_counter() - started:.0f}s)")
+    log(f"Seeded {created} todos in {time.perf_counter() - started:.0f}s")
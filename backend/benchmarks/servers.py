@@ -0,0 +1,100 @@
+"""
+Throughput and latency of the project/todo read endpoints under many
+concurrent connections: the sync views through the WSGI handler (one
+thread per connection, as a threaded WSGI server would run them) versus
+the async views through the ASGI handler (one task per connection on a
+single event loop).
+
+    python -m benchmarks.servers [--connections N] [--requests N]
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import print_table, setup, summarize, test_database, urlconf
+
+
+def seed(todos):
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from userapp.models import Project, Todo
+
+    user = User.objects.create_user(username="bench", password="bench-password")
+    project = Project.objects.create(title="Bench Project", user=user)
+    Todo.objects.bulk_create(Todo(description=f"Todo {i}", project=project, custom_id=f"B-{i}") for i in range(todos))
+    todo_ids = list(Todo.objects.filter(project=project).values_list('id', flat=True))
+    urls = [f"/api/projects/{project.id}/"] + [f"/api/projects/{project.id}/todos/{pk}/" for pk in todo_ids]
+    return str(RefreshToken.for_user(user).access_token), urls
+
+
+def run_wsgi(token, urls, connections, requests):
+    from django.db import connections as db_connections
+    from django.test import Client
+
+    def worker(index):
+        client = Client(headers={"Authorization": f"Bearer {token}"})
+        samples = []
+        for n in range(requests):
+            t0 = time.perf_counter()
+            response = client.get(urls[(index + n) % len(urls)])
+            samples.append(time.perf_counter() - t0)
+            assert response.status_code == 200, response.status_code
+        db_connections.close_all()
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        samples = [s for worker_samples in pool.map(worker, range(connections)) for s in worker_samples]
+    return summarize(samples, time.perf_counter() - started)
+
+
+def run_asgi(token, urls, connections, requests):
+    from django.test import AsyncClient
+
+    async def worker(index):
+        client = AsyncClient()
+        headers = {"Authorization": f"Bearer {token}"}
+        samples = []
+        for n in range(requests):
+            t0 = time.perf_counter()
+            response = await client.get(urls[(index + n) % len(urls)], headers=headers)
+            samples.append(time.perf_counter() - t0)
+            assert response.status_code == 200, response.status_code
+        return samples
+
+    async def main():
+        return await asyncio.gather(*(worker(i) for i in range(connections)))
+
+    started = time.perf_counter()
+    samples = [s for worker_samples in asyncio.run(main()) for s in worker_samples]
+    return summarize(samples, time.perf_counter() - started)
+
+
+def run(connections, requests):
+    from django.test import override_settings
+
+    token, urls = seed(todos=50)
+    rows = []
+    with override_settings(ROOT_URLCONF=urlconf(async_auth=False, async_api=False)):
+        rows.append({"server": "wsgi", **run_wsgi(token, urls, connections, requests)})
+    with override_settings(ROOT_URLCONF=urlconf(async_auth=True, async_api=True)):
+        rows.append({"server": "asgi", **run_asgi(token, urls, connections, requests)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per connection.")
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        rows = run(args.connections, args.requests)
+    print_table(rows, ["server", "requests", "mean_ms", "p50_ms", "p99_ms", "throughput_rps"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Concurrency stress test for the SQLite settings: several worker processes
+create and update todos through the API while others read, first with
+SQLite's defaults (DJANGO_SQLITE_TUNED=0) and then with the tuned mode.
+Each run uses a fresh database file in a temporary directory.
+
+    python -m benchmarks.sqlite_stress [--writers N] [--readers N] [--requests N]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import Counter
+
+from .utils import print_table, summarize
+
+
+def _setup(tuned, path):
+    os.environ["DJANGO_SQLITE_TUNED"] = "1" if tuned else "0"
+    os.environ["DJANGO_SQLITE_NAME"] = path
+    from .utils import setup
+    setup()
+    from django.test.utils import setup_test_environment
+    setup_test_environment(debug=False)
+
+
+def prepare(tuned, path):
+    _setup(tuned, path)
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from userapp.models import Project
+
+    call_command("migrate", verbosity=0)
+    user = User.objects.create_user(username="bench", password="bench-password")
+    project = Project.objects.create(title="Bench Project", user=user)
+    return str(RefreshToken.for_user(user).access_token), project.id
+
+
+def worker(tuned, path, token, project_id, role, index, requests, start_at):
+    _setup(tuned, path)
+    from django.test import Client
+
+    client = Client(raise_request_exception=False, headers={"Authorization": f"Bearer {token}"})
+    todos_url = f"/api/projects/{project_id}/todos/"
+    samples, statuses = [], Counter()
+    time.sleep(max(0, start_at - time.time()))
+    for n in range(requests):
+        t0 = time.perf_counter()
+        if role == "writer":
+            response = client.post(todos_url, {"description": f"Todo {index}-{n}"})
+            if response.status_code == 201:
+                todo_url = f"{todos_url}{response.json()['id']}/"
+                statuses[response.status_code] += 1
+                response = client.patch(todo_url, {"status": True}, content_type="application/json")
+        else:
+            response = client.get("/api/projects/stats/")
+        samples.append(time.perf_counter() - t0)
+        statuses[response.status_code] += 1
+    return role, samples, statuses
+
+
+def run(tuned, writers, readers, requests):
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stress.sqlite3")
+        with ctx.Pool(1) as pool:
+            token, project_id = pool.apply(prepare, (tuned, path))
+
+        jobs = [("writer", i) for i in range(writers)] + [("reader", i) for i in range(readers)]
+        start_at = time.time() + 3
+        with ctx.Pool(len(jobs)) as pool:
+            results = pool.starmap(worker, [
+                (tuned, path, token, project_id, role, index, requests, start_at) for role, index in jobs
+            ])
+        elapsed = time.time() - start_at
+
+    rows = []
+    for role in ("writer", "reader"):
+        samples = [s for r, worker_samples, _ in results if r == role for s in worker_samples]
+        statuses = sum((s for r, _, s in results if r == role), Counter())
+        ok = sum(count for code, count in statuses.items() if code < 400)
+        rows.append({
+            "mode": "tuned" if tuned else "default",
+            "role": role,
+            "ok": ok,
+            "errors": dict(sorted((code, count) for code, count in statuses.items() if code >= 400)) or "-",
+            **summarize(samples, elapsed),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=6)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per worker.")
+    args = parser.parse_args()
+
+    rows = run(False, args.writers, args.readers, args.requests)
+    rows += run(True, args.writers, args.readers, args.requests)
+    print_table(rows, ["mode", "role", "ok", "errors", "mean_ms", "p50_ms", "p99_ms", "throughput_rps"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Latency, throughput and query counts for every route in userapp/urls.py
+against a seeded dataset (by default 1k users, 10k projects, 1M todos).
+
+    python -m benchmarks.suite [--users N --projects N --todos N]
+                               [--requests N] [--output results.json]
+                               [--compare previous.json] [--update-budgets]
+
+The seeded database is built once per scale under benchmarks/.data/ and
+copied before each run, so writes made by one run never skew the next;
+migrations added since it was built are applied to it first.
+Every request is timed through the full middleware stack with the test
+client and its SQL is counted; the run fails (exit status 1) when an
+endpoint issues more queries than its budget in benchmarks/budgets.json,
+or when a route has no benchmark case. Results are written as JSON, by
+default to benchmarks/results/, and --compare prints the change against an
+earlier result file.
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+import types
+from collections import namedtuple
+from pathlib import Path
+
+from .utils import print_table, setup, summarize
+
+HERE = Path(__file__).resolve().parent
+DATA_DIR = HERE / ".data"
+RESULTS_DIR = HERE / "results"
+BUDGETS = HERE / "budgets.json"
+
+# name: key in budgets.json and the results; route: URL name it covers;
+# request(ctx): untimed preparation returning (method, path, client kwargs).
+Case = namedtuple("Case", "name route request auth limit", defaults=(True, None))
+
+
+def as_json(method, path, body):
+    return method, path, {"data": json.dumps(body), "content_type": "application/json"}
+
+
+def fresh_project(ctx, todos=0):
+    from userapp.importer import TodoImporter
+    from userapp.models import Project
+
+    project = Project.objects.create(title=f"Bench project {next(ctx.counter)}", user=ctx.user)
+    if todos:
+        TodoImporter(project).run((f"Seeded todo {k}", k % 3 == 0) for k in range(todos))
+    return project
+
+
+def fresh_todos(ctx, count):
+    from userapp.models import Todo
+
+    return [Todo.objects.create(project=ctx.project, description=f"Bench todo {next(ctx.counter)}") for _ in range(count)]
+
+
+def deleted_project(ctx):
+    from userapp.purge import delete_project
+
+    project = fresh_project(ctx)
+    delete_project(project)
+    return project
+
+
+def archived_todo(ctx):
+    from userapp.archive import archive
+    from userapp.models import Todo
+
+    todo = Todo.objects.create(project=ctx.project, description=f"Bench todo {next(ctx.counter)}", status=True)
+    list(archive(Todo.objects.filter(pk=todo.pk)))
+    return todo
+
+
+def cold(request):
+    """Clear the response cache before each request, to time the uncached path."""
+    def prepare(ctx):
+        from django.core.cache import cache
+
+        cache.clear()
+        return request(ctx)
+    return prepare
+
+
+def import_upload(ctx):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    run = next(ctx.counter)
+    lines = (json.dumps({"description": f"Imported {run}-{k}", "status": k % 2 == 0}) for k in range(100))
+    upload = SimpleUploadedFile("todos.jsonl", "\n".join(lines).encode(), content_type="application/x-ndjson")
+    return "post", f"/api/projects/{ctx.project.id}/todos/import/", {"data": {"file": upload}}
+
+
+def sync_token(ctx):
+    """A token for the user's latest change, as held by a client that is up to date."""
+    from userapp.models import Change
+    from userapp.sync import encode_token
+
+    return encode_token(Change.objects.filter(user=ctx.user).order_by("-id").values_list("id", flat=True).first() or 0)
+
+
+def bulk_payload(ctx):
+    n = next(ctx.counter)
+    return as_json("post", f"/api/projects/{ctx.project.id}/todos/bulk/", {
+        "create": [{"description": f"Bulk {n}-{k}"} for k in range(10)],
+        "update": [{"id": todo_id, "status": n % 2 == 0} for todo_id in ctx.todo_ids[:10]],
+        "delete": [todo.id for todo in fresh_todos(ctx, 5)],
+    })
+
+
+CASES = [
+    Case("signup", "user-signup", lambda ctx: as_json("post", "/api/signup/", {
+        "username": f"bench-signup-{next(ctx.counter)}", "email": "signup@example.com", "password": "bench-password",
+    }), auth=False, limit=20),
+    Case("login", "user-login", lambda ctx: as_json("post", "/api/login/", {
+        "username": ctx.user.username, "password": "bench-password",
+    }), auth=False, limit=20),
+    Case("project list", "project-list-create", lambda ctx: ("get", "/api/projects/", {})),
+    Case("project list (uncached)", "project-list-create", cold(lambda ctx: ("get", "/api/projects/", {}))),
+    Case("project list (uncached, include todos)", "project-list-create", cold(lambda ctx: (
+        "get", "/api/projects/?include=todos", {},
+    ))),
+    Case("project create", "project-list-create", lambda ctx: as_json("post", "/api/projects/", {
+        "title": f"Created project {next(ctx.counter)}",
+    })),
+    Case("project stats", "project-stats", lambda ctx: ("get", "/api/projects/stats/", {})),
+    Case("todo search", "todo-search", lambda ctx: ("get", "/api/todos/search/?q=quarterly report", {})),
+    Case("sync", "sync", lambda ctx: ("get", "/api/sync/?limit=100", {})),
+    Case("sync (steady state)", "sync", lambda ctx: ("get", f"/api/sync/?token={sync_token(ctx)}", {})),
+    Case("project detail", "project-detail", lambda ctx: ("get", f"/api/projects/{ctx.project.id}/", {})),
+    Case("project update", "project-detail", lambda ctx: as_json("patch", f"/api/projects/{ctx.project.id}/", {
+        "title": f"Renamed project {next(ctx.counter)}",
+    })),
+    Case("project delete", "project-detail", lambda ctx: ("delete", f"/api/projects/{fresh_project(ctx, 100).id}/", {})),
+    Case("project purge status", "project-purge", lambda ctx: (
+        "get", f"/api/projects/{deleted_project(ctx).id}/purge/", {},
+    )),
+    Case("project export", "project-export", lambda ctx: ("get", f"/api/projects/{ctx.project.id}/export/?type=jsonl", {})),
+    Case("todo list", "todo-list-create", lambda ctx: ("get", f"/api/projects/{ctx.project.id}/todos/", {})),
+    Case("todo list (uncached)", "todo-list-create", cold(lambda ctx: ("get", f"/api/projects/{ctx.project.id}/todos/", {}))),
+    Case("todo list (uncached, fields)", "todo-list-create", cold(lambda ctx: (
+        "get", f"/api/projects/{ctx.project.id}/todos/?fields=id,description,status", {},
+    ))),
+    Case("todo list (uncached, archived)", "todo-list-create", cold(lambda ctx: (
+        "get", f"/api/projects/{ctx.project.id}/todos/?archived=true", {},
+    ))),
+    Case("todo create", "todo-list-create", lambda ctx: as_json("post", f"/api/projects/{ctx.project.id}/todos/", {
+        "description": f"Created todo {next(ctx.counter)}",
+    })),
+    Case("todo bulk", "todo-bulk", bulk_payload),
+    Case("todo import", "todo-import", import_upload, limit=50),
+    Case("todo detail", "todo-detail", lambda ctx: ("get", f"/api/projects/{ctx.project.id}/todos/{ctx.todo_ids[0]}/", {})),
+    Case("todo update", "todo-detail", lambda ctx: as_json("patch", f"/api/projects/{ctx.project.id}/todos/{ctx.todo_ids[0]}/", {
+        "status": next(ctx.counter) % 2 == 0,
+    })),
+    Case("todo delete", "todo-detail", lambda ctx: (
+        "delete", f"/api/projects/{ctx.project.id}/todos/{fresh_todos(ctx, 1)[0].id}/", {},
+    )),
+    Case("todo restore", "todo-restore", lambda ctx: (
+        "post", f"/api/projects/{ctx.project.id}/todos/{archived_todo(ctx).id}/restore/", {},
+    )),
+]
+
+
+def check_routes():
+    from userapp.urls import get_urlpatterns
+
+    covered = {case.route for case in CASES}
+    return sorted(pattern.name for pattern in get_urlpatterns() if pattern.name not in covered)
+
+
+def backup(source, target):
+    """Copy one SQLite database file to another with the online backup API."""
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{target}{suffix}").unlink(missing_ok=True)
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def prepare_database(users, projects, todos):
+    """
+    Point Django at a fresh copy of the seeded database for this scale,
+    seeding it first if it does not exist yet.
+    """
+    DATA_DIR.mkdir(exist_ok=True)
+    template = DATA_DIR / f"seed-{users}-{projects}-{todos}.sqlite3"
+    working = DATA_DIR / "run.sqlite3"
+    os.environ["DJANGO_SQLITE_NAME"] = str(working)
+    # The budgets assume the user-row cache a deployment with a shared cache
+    # runs with; the suite is a single process, so its local cache stands in.
+    os.environ.setdefault("DJANGO_CACHED_JWT_AUTH", "1")
+    if template.exists():
+        backup(template, working)
+        setup()
+        migrate_template(working, template)
+        return
+
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{working}{suffix}").unlink(missing_ok=True)
+    setup()
+    from django.core.management import call_command
+    from django.db import connections
+
+    from .seed import seed
+
+    call_command("migrate", verbosity=0)
+    seed(users, projects, todos)
+    connections.close_all()
+    backup(working, template)
+
+
+def migrate_template(working, template):
+    """Bring the working copy up to the current migrations and save it as the new template."""
+    from django.core.management import call_command
+    from django.db import connection, connections
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connection)
+    if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+        call_command("migrate", verbosity=0)
+        connections.close_all()
+        backup(working, template)
+
+
+def make_context():
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from userapp.models import Project
+
+    user = User.objects.get(username="bench0")
+    project = Project.objects.filter(user=user).order_by("id").first()
+    return types.SimpleNamespace(
+        user=user,
+        project=project,
+        todo_ids=list(project.todos.order_by("id").values_list("id", flat=True)[:10]),
+        token=str(RefreshToken.for_user(user).access_token),
+        counter=itertools.count(),
+    )
+
+
+def run_case(client, ctx, case, requests, warmup):
+    from django.db import connection
+
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {ctx.token}"} if case.auth else {}
+    count = min(requests, case.limit or requests)
+    samples, queries, statuses = [], [], set()
+    for iteration in range(warmup + count):
+        method, path, kwargs = case.request(ctx)
+        executed = []
+
+        def count_query(execute, sql, *args):
+            executed.append(sql)
+            return execute(sql, *args)
+
+        # Counted with a wrapper rather than the debug query log, which is
+        # capped and misses queries run while a streaming body is consumed.
+        with connection.execute_wrapper(count_query):
+            t0 = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs, **headers)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = time.perf_counter() - t0
+        if iteration >= warmup:
+            samples.append(elapsed)
+            queries.append(len(executed))
+            statuses.add(response.status_code)
+    if any(code >= 400 for code in statuses):
+        raise RuntimeError(f"{case.name}: unexpected status {sorted(statuses)}")
+    # Throughput is over the timed requests only, not the untimed preparation.
+    return {**summarize(samples, sum(samples)), "queries": max(queries)}
+
+
+def metadata(args):
+    import django
+    from django.conf import settings
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=HERE, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "scale": {"users": args.users, "projects": args.projects, "todos": args.todos},
+        "requests": args.requests,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "settings": {
+            name: getattr(settings, name, None)
+            for name in ("ASYNC_API_VIEWS", "CACHED_JWT_AUTH", "SQLITE_TUNED", "SQLITE_SERIALIZE_WRITES", "PAGE_SIZE")
+        },
+    }
+
+
+def compare(rows, previous_path):
+    previous = {row["name"]: row for row in json.loads(Path(previous_path).read_text())["results"]}
+    table = []
+    for row in rows:
+        before = previous.get(row["name"])
+        if before is None:
+            table.append({"endpoint": row["name"], "p50_ms": "new"})
+            continue
+        table.append({
+            "endpoint": row["name"],
+            **{
+                key: f"{before[key]} -> {row[key]} ({(row[key] - before[key]) / before[key]:+.0%})" if before[key] else row[key]
+                for key in ("p50_ms", "p99_ms", "throughput_rps")
+            },
+            "queries": f"{before['queries']} -> {row['queries']}",
+        })
+    print(f"\nCompared with {previous_path}")
+    print_table(table, ["endpoint", "p50_ms", "p99_ms", "throughput_rps", "queries"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--todos", type=int, default=1000000)
+    parser.add_argument("--requests", type=int, default=100, help="Timed requests per endpoint.")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>-<commit>.json).")
+    parser.add_argument("--compare", help="Earlier result file to compare against.")
+    parser.add_argument("--update-budgets", action="store_true", help="Write the observed query counts as the new budgets.")
+    args = parser.parse_args()
+
+    prepare_database(args.users, args.projects, args.todos)
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    missing = check_routes()
+    if missing:
+        sys.exit(f"No benchmark case for route(s): {', '.join(missing)}")
+
+    setup_test_environment(debug=False)
+    budgets = json.loads(BUDGETS.read_text()) if BUDGETS.exists() else {}
+    ctx, client = make_context(), Client()
+    rows = []
+    for case in CASES:
+        result = run_case(client, ctx, case, args.requests, args.warmup)
+        budget = budgets.get(case.name)
+        rows.append({
+            "name": case.name, "route": case.route, **result,
+            "budget": budget, "ok": budget is not None and result["queries"] <= budget,
+        })
+
+    print_table(rows, ["name", "requests", "mean_ms", "p50_ms", "p99_ms", "throughput_rps", "queries", "budget", "ok"])
+    meta = metadata(args)
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{meta['timestamp'].replace(':', '')}-{meta['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"meta": meta, "results": rows}, indent=2) + "\n")
+    print(f"\nWrote {output}")
+    if args.compare:
+        compare(rows, args.compare)
+
+    if args.update_budgets:
+        BUDGETS.write_text(json.dumps({row["name"]: row["queries"] for row in rows}, indent=2) + "\n")
+        print(f"Updated {BUDGETS}")
+        return
+    failed = [row for row in rows if not row["ok"]]
+    for row in failed:
+        print(f"Query budget exceeded: {row['name']} ran {row['queries']} queries (budget {row['budget']})", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
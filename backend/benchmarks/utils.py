@@ -0,0 +1,79 @@
+import os
+import statistics
+import sys
+import time
+import types
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create the test database (as the test runner does) for the duration of a benchmark."""
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment(debug=False)
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def urlconf(**flags):
+    """Register a URLconf serving the API with the given get_urlpatterns() flags and return its name."""
+    from django.urls import include, path
+
+    from userapp.urls import get_urlpatterns
+
+    name = "benchmarks_urls_" + "_".join(f"{key}_{int(value)}" for key, value in sorted(flags.items()))
+    module = types.ModuleType(name)
+    module.urlpatterns = [path("api/", include(get_urlpatterns(**flags)))]
+    sys.modules[name] = module
+    return name
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, elapsed):
+    """Latency statistics in milliseconds for a list of per-call durations in seconds."""
+    ms = [s * 1000 for s in samples]
+    return {
+        "requests": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "throughput_rps": round(len(ms) / elapsed, 1) if elapsed else None,
+    }
+
+
+def measure(call, requests, warmup=10):
+    for _ in range(warmup):
+        call()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def print_table(rows, columns):
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
@@ -0,0 +1,9 @@
+from django.urls import include, path
+
+from userapp.urls import get_urlpatterns
+
+# The API with every async view switched on, for tests that run the view
+# tests against them (see test_async_views.py).
+urlpatterns = [
+    path('api/', include(get_urlpatterns(async_auth=True, async_api=True))),
+]
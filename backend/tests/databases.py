@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TransactionTestCase
+
+
+class FileDatabaseTestCase(TransactionTestCase):
+    """
+    Runs the tests of the class against a file copy of the in-memory test
+    database, so threads get real SQLite locking (and WAL) instead of the
+    shared-cache in-memory database's table locks.
+
+    database_options are added to the connection's OPTIONS meanwhile, e.g.
+    the transaction_mode SQLITE_TUNED deployments run with.
+    """
+    database_options = {}
+
+    @classmethod
+    def setUpClass(cls):
+        connection = connections[DEFAULT_DB_ALIAS]
+        cls._memory_settings = dict(connection.settings_dict)
+        # Keeps the in-memory database alive while the connection points elsewhere.
+        cls._memory_database = sqlite3.connect(cls._memory_settings["NAME"], uri=True)
+        handle, cls._database_file = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        target = sqlite3.connect(cls._database_file)
+        try:
+            cls._memory_database.backup(target)
+        finally:
+            target.close()
+        connection.settings_dict["NAME"] = cls._database_file
+        connection.settings_dict["OPTIONS"] = {**connection.settings_dict["OPTIONS"], **cls.database_options}
+        # Now that NAME is a file, close() really closes the in-memory connection.
+        connection.close()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connection = connections[DEFAULT_DB_ALIAS]
+        connection.close()
+        connection.settings_dict.update(cls._memory_settings)
+        connection.ensure_connection()
+        cls._memory_database.close()
+        for suffix in ("", "-wal", "-shm", ".write-lock"):
+            if os.path.exists(cls._database_file + suffix):
+                os.remove(cls._database_file + suffix)
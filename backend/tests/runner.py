@@ -0,0 +1,14 @@
+import logging
+
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    DiscoverRunner that keeps the per-request log lines, slow request
+    warnings included, out of the test output; assertLogs still sees them.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        logging.getLogger("userapp.requests").setLevel(logging.ERROR)
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.contrib.auth.models import User
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from rest_framework import status
+
+from userapp import async_views, hashing
+
+from tests import test_views
+
+
+class AsyncAuthViewTest(TestCase):
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+
+    def tearDown(self):
+        hashing.shutdown()
+
+    def post(self, view, data, **kwargs):
+        request = self.factory.post("/", json.dumps(data), content_type="application/json", **kwargs)
+        return view(request)
+
+    async def test_signup(self):
+        """Test async signup creates the user with a hashed password."""
+        data = {"username": "newuser", "email": "newuser@example.com", "password": "securepassword"}
+        response = await self.post(async_views.signup, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(json.loads(response.content)["user"], {"username": "newuser", "email": "newuser@example.com"})
+        self.assertIn(async_views.QUEUE_DEPTH_HEADER, response)
+        user = await User.objects.aget(username="newuser")
+        self.assertTrue(user.check_password("securepassword"))
+
+    async def test_signup_invalid_data(self):
+        """Test async signup returns serializer errors."""
+        response = await self.post(async_views.signup, {"username": "testuser", "email": "", "password": ""})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("username", json.loads(response.content))
+
+    async def test_login(self):
+        """Test async login with valid, invalid and missing credentials."""
+        response = await self.post(async_views.login, {"username": "testuser", "password": "password123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access_token", json.loads(response.content))
+
+        response = await self.post(async_views.login, {"username": "testuser", "password": "wrong"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json.loads(response.content), {"error": "Invalid Credentials"})
+
+        response = await self.post(async_views.login, {"username": "testuser"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_login_form_encoded(self):
+        """Test async login accepts form data like the DRF view."""
+        request = self.factory.post("/", {"username": "testuser", "password": "password123"})
+        response = await async_views.login(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def test_login_upgrades_outdated_hash(self):
+        """Test a hash with too few iterations is re-hashed on login."""
+        hasher = PBKDF2PasswordHasher()
+        self.user.password = hasher.encode("password123", hasher.salt(), iterations=1000)
+        await self.user.asave()
+        response = await self.post(async_views.login, {"username": "testuser", "password": "password123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await self.user.arefresh_from_db()
+        self.assertFalse(hasher.must_update(self.user.password))
+        self.assertTrue(check_password("password123", self.user.password))
+
+    @override_settings(PASSWORD_HASHING_MAX_QUEUE=0)
+    async def test_queue_full(self):
+        """Test requests are refused with 503 once the hashing queue is full."""
+        response = await self.post(async_views.login, {"username": "testuser", "password": "password123"})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_get_not_allowed(self):
+        """Test the async views only accept POST."""
+        response = asyncio.run(async_views.login(self.factory.get("/")))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+@override_settings(PASSWORD_HASHING_CONCURRENCY=2)
+class HashingPoolTest(TestCase):
+    def setUp(self):
+        hashing.shutdown()
+
+    def tearDown(self):
+        hashing.shutdown()
+
+    def test_concurrency_cap_and_queue_depth(self):
+        """Test at most PASSWORD_HASHING_CONCURRENCY hashes run and the rest are counted as queued."""
+        release = threading.Event()
+        started = threading.Semaphore(0)
+
+        def slow_hash():
+            started.release()
+            release.wait(5)
+            return "done"
+
+        async def scenario():
+            tasks = [asyncio.ensure_future(hashing.run(slow_hash)) for _ in range(5)]
+            await asyncio.sleep(0)
+            await asyncio.to_thread(started.acquire)
+            await asyncio.to_thread(started.acquire)
+            during = hashing.stats()
+            release.set()
+            results = await asyncio.gather(*tasks)
+            return during, results
+
+        during, results = asyncio.run(scenario())
+        self.assertEqual(during, {"queued": 3, "running": 2, "concurrency": 2})
+        self.assertEqual(results, ["done"] * 5)
+        self.assertEqual(hashing.queue_depth(), 0)
+
+
+# The sync view tests, run again against the async project/todo views.
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncProjectTests(test_views.ProjectTests):
+    def test_views_are_async(self):
+        """Test the async views are recognised as async by Django."""
+        for view in (async_views.AsyncProjectCreateListView, async_views.AsyncProjectDetailView,
+                     async_views.AsyncTodoCreateListView, async_views.AsyncTodoDetailView):
+            self.assertTrue(view.view_is_async)
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncTodoViewsTest(test_views.TodoViewsTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncPaginationTest(test_views.PaginationTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncSparseFieldsTest(test_views.SparseFieldsTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncEmbeddedTodosTest(test_views.EmbeddedTodosTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncSyncTest(test_views.SyncTest):
+    """Test the writes made through the async views reach the change log."""
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncResponseCacheTest(test_views.ResponseCacheTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncArchiveTest(test_views.ArchiveTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncProjectPurgeTest(test_views.ProjectPurgeTest):
+    pass
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.views import APIView
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from userapp.authentication import CachedJWTAuthentication, update_users
+from userapp.models import Project
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        # The views read the default authentication classes at import time.
+        patcher = mock.patch.object(APIView, "authentication_classes", [CachedJWTAuthentication])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.url = reverse("project-detail", kwargs={"pk": self.project.id})
+        self.authenticate()
+
+    def authenticate(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+    def test_user_loaded_once(self):
+        """Test the user row is only read on the first request."""
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"], self.user.id)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user takes effect on the next request."""
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_in_bulk_rejected(self):
+        """Test users deactivated with update_users() are rejected on the next request."""
+        self.client.get(self.url)
+        self.assertEqual(update_users(User.objects.filter(username="testuser"), is_active=False), 1)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_rejected(self):
+        """Test a deleted user's cached entry is dropped."""
+        self.client.get(self.url)
+        self.user.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_tokens(self):
+        """Test a password change invalidates tokens when CHECK_REVOKE_TOKEN is on."""
+        # simplejwt modules hold on to the api_settings object, so patch it in place.
+        with mock.patch.object(jwt_settings, "CHECK_REVOKE_TOKEN", True):
+            self.authenticate()
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+            self.user.set_password("newpassword123")
+            self.user.save()
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_has_no_password_hash(self):
+        """Test the password hash is never stored in the cache."""
+        self.client.get(self.url)
+        fields, _ = cache.get(f"userapp:auth-user:{self.user.id}")
+        self.assertNotIn("password", fields)
+        self.assertEqual(fields["username"], "testuser")
+
+    def test_cached_user_save_keeps_password(self):
+        """Test saving the user built from the cache does not blank its password."""
+        self.client.get(self.url)
+        fields, _ = cache.get(f"userapp:auth-user:{self.user.id}")
+        user = CachedJWTAuthentication().from_cache_entry(fields)
+        user.first_name = "Test"
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Test")
+        self.assertTrue(self.user.check_password("password123"))
+
+    def test_invalidated_again_on_commit(self):
+        """Test a copy cached between the save and the commit is dropped once it commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # A concurrent request caching the row before the commit.
+            cache.set(f"userapp:auth-user:{self.user.id}", "stale")
+        self.assertIsNone(cache.get(f"userapp:auth-user:{self.user.id}"))
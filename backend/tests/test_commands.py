@@ -0,0 +1,243 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from userapp import profiling
+from userapp.purge import delete_project
+from userapp.models import ArchivedTodo, Project, ProjectPurge, Todo
+from userapp.search import fts_available, rebuild_index, search_todos
+
+
+class RepairTodoCountersTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.empty = Project.objects.create(title="Empty Project", user=self.user)
+        Todo.objects.create(description="Test Todo", project=self.project)
+        Todo.objects.create(description="Done Todo", project=self.project, status=True)
+
+    def test_repairs_drifted_counters(self):
+        """Test drifted counters are recomputed from the todo rows."""
+        Project.objects.filter(pk=self.project.pk).update(todo_count=7, completed_count=0)
+        Project.objects.filter(pk=self.empty.pk).update(todo_count=3)
+        out = StringIO()
+        call_command("repair_todo_counters", batch_size=1, stdout=out)
+        self.assertIn("Checked 2 projects, 2 repaired.", out.getvalue())
+        self.assertEqual(
+            list(Project.objects.order_by("pk").values_list("todo_count", "completed_count")),
+            [(2, 1), (0, 0)],
+        )
+
+    def test_archived_count(self):
+        """Test archived todos are counted in archived_count, not the todo counters."""
+        Todo.objects.filter(project=self.project, status=True).update(updated_at="2020-01-01T00:00:00Z")
+        call_command("archive_todos", stdout=StringIO())
+        Project.objects.filter(pk=self.project.pk).update(todo_count=2, completed_count=1, archived_count=0)
+        call_command("repair_todo_counters", stdout=StringIO())
+        self.assertEqual(
+            Project.objects.values_list(*Project.COUNTER_FIELDS).get(pk=self.project.pk), (1, 0, 1),
+        )
+
+    def test_dry_run(self):
+        """Test --dry-run reports drift without writing."""
+        Project.objects.filter(pk=self.project.pk).update(todo_count=7)
+        out = StringIO()
+        call_command("repair_todo_counters", dry_run=True, stdout=out)
+        self.assertIn("1 would be repaired", out.getvalue())
+        self.assertEqual(Project.objects.get(pk=self.project.pk).todo_count, 7)
+
+
+class ArchiveTodosTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        for i in range(5):
+            Todo.objects.create(description=f"Done {i}", project=self.project, status=True)
+        Todo.objects.create(description="Pending", project=self.project)
+        Todo.objects.update(updated_at="2020-01-01T00:00:00Z")
+
+    def test_archive_in_batches(self):
+        """Test completed todos past the cutoff are moved in batches, pending ones stay."""
+        out = StringIO()
+        call_command("archive_todos", days=30, batch_size=2, stdout=out)
+        self.assertIn("Archived 2 todos...", out.getvalue())
+        self.assertIn("Archived 5 todos.", out.getvalue())
+        self.assertEqual(list(Todo.objects.values_list("description", flat=True)), ["Pending"])
+        self.assertEqual(ArchivedTodo.objects.filter(project=self.project).count(), 5)
+
+    def test_cutoff(self):
+        """Test nothing newer than --days is archived."""
+        out = StringIO()
+        call_command("archive_todos", days=100000, stdout=out)
+        self.assertIn("Archived 0 todos.", out.getvalue())
+        self.assertEqual(Todo.objects.count(), 6)
+
+
+class PurgeDeletedProjectsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        for i in range(3):
+            Todo.objects.create(description=f"Todo {i}", project=self.project)
+        # Deleted, but the worker never got to it.
+        delete_project(self.project)
+
+    def test_finishes_interrupted_purges(self):
+        """Test purges that never ran or were cut short are finished."""
+        out = StringIO()
+        call_command("purge_deleted_projects", chunk_size=2, stdout=out)
+        self.assertIn(f"Project {self.project.pk}: purged 3 todos.", out.getvalue())
+        self.assertIn("Finished 1 purges.", out.getvalue())
+        self.assertEqual(ProjectPurge.objects.get(pk=self.project.pk).status, ProjectPurge.DONE)
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+
+    def test_skips_purges_in_progress(self):
+        """Test a purge another worker is running is left alone until its heartbeat goes stale."""
+        jobs = ProjectPurge.objects.filter(pk=self.project.pk)
+        jobs.update(status=ProjectPurge.RUNNING, updated_at=timezone.now())
+        out = StringIO()
+        call_command("purge_deleted_projects", stdout=out)
+        self.assertIn(f"Project {self.project.pk}: being purged elsewhere, skipped.", out.getvalue())
+        self.assertIn("Finished 0 purges.", out.getvalue())
+        self.assertEqual(Todo.objects.filter(project_id=self.project.pk).count(), 3)
+
+        jobs.update(updated_at=timezone.now() - timezone.timedelta(seconds=301))
+        call_command("purge_deleted_projects", stdout=StringIO())
+        self.assertEqual(jobs.get().status, ProjectPurge.DONE)
+        self.assertFalse(Todo.objects.filter(project_id=self.project.pk).exists())
+
+
+class RebuildTodoSearchTest(APITestCase):
+    def setUp(self):
+        if not fts_available(connection):
+            self.skipTest("the search index is SQLite FTS5 only")
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        for i in range(5):
+            Todo.objects.create(description=f"Searchable todo {i}", project=self.project)
+
+    def test_rebuild(self):
+        """Test the index is rebuilt in batches from the todo rows."""
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO userapp_todo_fts(userapp_todo_fts) VALUES ('delete-all')")
+        self.assertEqual(search_todos(self.user, "searchable", 10), [])
+        out = StringIO()
+        call_command("rebuild_todo_search", batch_size=2, stdout=out)
+        self.assertIn("5 todos indexed", out.getvalue())
+        self.assertEqual(out.getvalue().count("Indexed"), 3)
+        self.assertEqual(len(search_todos(self.user, "searchable", 10)), 5)
+
+    def test_writes_during_rebuild(self):
+        """Test todos created, edited and deleted between batches end up indexed exactly once."""
+        todos = list(Todo.objects.order_by("id"))
+
+        def write(indexed):
+            if indexed == 2:
+                # todos[0:2] are indexed, the rest not yet.
+                todos[0].description = "Searchable edited early"
+                todos[0].save()
+                todos[3].description = "Searchable edited late"
+                todos[3].save()
+                todos[1].delete()
+                todos[4].delete()
+                Todo.objects.create(description="Searchable created meanwhile", project=self.project)
+
+        indexed = rebuild_index(connection, 2, progress=write)
+        self.assertEqual(indexed, 5)
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO userapp_todo_fts(userapp_todo_fts) VALUES ('integrity-check')")
+        results = search_todos(self.user, "searchable", 10)
+        todo_ids = list(Todo.objects.values_list("id", flat=True).order_by("id"))
+        self.assertEqual(sorted(result["id"] for result in results), todo_ids)
+        self.assertEqual(len(search_todos(self.user, "edited", 10)), 2)
+        self.assertEqual(len(search_todos(self.user, "meanwhile", 10)), 1)
+        # A todo indexed twice would still match its old words once renamed.
+        for todo in Todo.objects.filter(description__in=["Searchable edited late", "Searchable created meanwhile"]):
+            todo.description = f"Renamed {todo.id}"
+            todo.save()
+        self.assertEqual(search_todos(self.user, "late", 10), [])
+        self.assertEqual(search_todos(self.user, "meanwhile", 10), [])
+        self.assertEqual(len(search_todos(self.user, "renamed", 10)), 2)
+
+
+class ImportTodosTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        Todo.objects.create(description="Existing", project=self.project)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_import_in_batches(self):
+        """Test a checklist is imported in batches with fresh custom_ids and counters."""
+        path = self.write("todos.md", "# Plan\n\n- [ ] One\n- [x] Two\n- [ ] Existing\n- [ ] Three\n* [X] Four\n")
+        out = StringIO()
+        call_command("import_todos", path, project=self.project.custom_id, batch_size=2, stdout=out)
+        self.assertIn("Imported 4 todos", out.getvalue())
+        self.assertIn("1 duplicates skipped", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_count, self.project.completed_count), (5, 2))
+        custom_ids = list(Todo.objects.values_list("custom_id", flat=True))
+        self.assertEqual(len(set(custom_ids)), 5)
+
+    def test_import_creates_project(self):
+        """Test --user and --title create the project to import into."""
+        path = self.write("todos.csv", "description,status\nFrom CSV,true\n")
+        call_command("import_todos", path, user="testuser", title="Imported", stdout=StringIO())
+        project = Project.objects.get(title="Imported")
+        self.assertEqual(list(project.todos.values_list("description", "status")), [("From CSV", True)])
+
+    def test_bad_file(self):
+        """Test malformed input stops the command with an error."""
+        path = self.write("todos.jsonl", '{"description": "Ok"}\n{broken\n')
+        with self.assertRaisesMessage(CommandError, "Line 2 is not valid JSON"):
+            call_command("import_todos", path, project=str(self.project.id), stdout=StringIO())
+
+
+class MergeProfilesTest(APITestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        profiling.reset()
+        self.addCleanup(profiling.reset)
+        user = User.objects.create_user(username="testuser", password="password123")
+        project = Project.objects.create(title="Test Project", user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        with override_settings(PROFILE_DIR=self.tmp.name, PROFILE_SAMPLE_RATE=1):
+            self.client.get(reverse("project-detail", kwargs={"pk": project.id}))
+            self.client.get(reverse("todo-list-create", kwargs={"project_id": project.id}))
+
+    def test_merge_and_rank(self):
+        """Test profiles of every route are merged and ranked, and can be written to one file."""
+        out = StringIO()
+        merged = os.path.join(self.tmp.name, "merged.out")
+        call_command("merge_profiles", dir=self.tmp.name, output=merged, limit=5, stdout=out)
+        output = out.getvalue()
+        self.assertIn("GET_api_projects_int_pk (1 process)", output)
+        self.assertIn("GET_api_projects_int_project_id_todos (1 process)", output)
+        self.assertIn("cumulative time", output)
+        self.assertTrue(os.path.exists(merged))
+
+    def test_route_filter(self):
+        """Test --route limits the merge to matching routes, and an empty match is an error."""
+        out = StringIO()
+        call_command("merge_profiles", dir=self.tmp.name, route="todos", stdout=out)
+        self.assertNotIn("GET_api_projects_int_pk ", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("merge_profiles", dir=self.tmp.name, route="nothing", stdout=out)
@@ -0,0 +1,164 @@
+import datetime
+import gzip
+import json
+import unittest
+import zlib
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import parsers, renderers, status
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from userapp import compression
+from userapp.importer import TodoImporter
+from userapp.models import Project
+from userapp.parsers import JSONParser
+from userapp.renderers import JSONRenderer, orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+@override_settings(FAST_JSON=True)
+@unittest.skipIf(orjson is None, "orjson is not installed")
+class FastJSONTest(SimpleTestCase):
+    def test_renders_like_drf(self):
+        """Test the orjson renderer produces the bytes DRF's JSONRenderer does."""
+        data = {
+            "text": "café \u2028 \u2029 \"quoted\"",
+            "number": 1.5,
+            "big": 2 ** 70,
+            "decimal": Decimal("12.50"),
+            "lazy": gettext_lazy("This field is required."),
+            "when": datetime.datetime(2026, 10, 18, 12, 30, 45, 123456, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2026, 10, 18),
+            "nested": [{1: None, "ok": True}, (1, 2)],
+        }
+        for sample in (data, [data, data], {"big": 1}, []):
+            self.assertEqual(JSONRenderer().render(sample), renderers.JSONRenderer().render(sample))
+
+    def test_indent_uses_stdlib(self):
+        """Test indented output (?format=json; indent=4, the browsable API) is left to DRF."""
+        data = {"a": [1, 2]}
+        self.assertEqual(
+            JSONRenderer().render(data, "application/json; indent=4"),
+            renderers.JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+    def test_parses_like_drf(self):
+        """Test the orjson parser accepts and rejects what DRF's JSONParser does."""
+        for body in (b'{"description": "caf\xc3\xa9", "status": true}', b"[1, 2.5, null]"):
+            self.assertEqual(JSONParser().parse(BytesIO(body)), json.loads(body))
+        for body in (b'{"description": ', b'{"n": NaN}'):
+            with self.assertRaises(ParseError) as fast:
+                JSONParser().parse(BytesIO(body))
+            with self.assertRaises(ParseError) as drf:
+                parsers.JSONParser().parse(BytesIO(body))
+            self.assertEqual(str(fast.exception), str(drf.exception))
+
+    @override_settings(FAST_JSON=False)
+    def test_disabled(self):
+        """Test FAST_JSON off falls back to DRF's encoding."""
+        self.assertEqual(JSONRenderer().render({"a": "\u2028"}), b'{"a":"\\u2028"}')
+
+
+class NegotiationTest(SimpleTestCase):
+    def test_negotiate(self):
+        """Test the coding is picked by the client's ranking, br first on a tie."""
+        self.assertIsNone(compression.negotiate(""))
+        self.assertIsNone(compression.negotiate("identity"))
+        self.assertEqual(compression.negotiate("gzip, deflate"), "gzip")
+        self.assertIsNone(compression.negotiate("gzip;q=0"))
+        self.assertEqual(compression.negotiate("*"), "br" if brotli else "gzip")
+        self.assertEqual(compression.negotiate("gzip, deflate, br"), "br" if brotli else "gzip")
+        self.assertEqual(compression.negotiate("br;q=0.5, gzip;q=0.8"), "gzip")
+
+
+@override_settings(COMPRESSION=True, COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        TodoImporter(self.project).run((f"Todo number {k} with a description", k % 2 == 0) for k in range(200))
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.todos_url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+
+    def test_gzip(self):
+        """Test a large list is gzipped when asked for, and decompresses to the same JSON."""
+        plain = self.client.get(self.todos_url)
+        response = self.client.get(self.todos_url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) / 4)
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_brotli(self):
+        """Test brotli is used when the client accepts it."""
+        plain = self.client.get(self.todos_url)
+        response = self.client.get(self.todos_url, HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_small_and_unaccepted_responses(self):
+        """Test small responses, and clients that do not accept a coding, get the body as is."""
+        response = self.client.get(reverse("project-detail", kwargs={"pk": self.project.id}), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        response = self.client.get(self.todos_url)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_weak_etag_revalidates(self):
+        """Test the weakened ETag of a compressed list still gets a 304."""
+        response = self.client.get(self.todos_url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        response = self.client.get(self.todos_url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_streamed_export(self):
+        """Test a streamed export is compressed chunk by chunk into one valid body."""
+        url = reverse("project-export", kwargs={"project_id": self.project.id})
+        plain = b"".join(self.client.get(url, {"type": "jsonl"}).streaming_content)
+        with override_settings(EXPORT_CHUNK_SIZE=50):
+            response = self.client.get(url, {"type": "jsonl"}, HTTP_ACCEPT_ENCODING="gzip")
+            body = b"".join(response.streaming_content)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(zlib.decompress(body, 31), plain)
+
+    def test_jsonl_export(self):
+        """Test a JSONL export is compressed with the best coding the client accepts."""
+        url = reverse("project-export", kwargs={"project_id": self.project.id})
+        plain = b"".join(self.client.get(url, {"type": "jsonl"}).streaming_content)
+        self.assertTrue(compression.compressible({"Content-Type": "application/jsonl; charset=utf-8"}))
+        response = self.client.get(url, {"type": "jsonl"}, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertTrue(response["Content-Type"].startswith("application/jsonl"))
+        body = b"".join(response.streaming_content)
+        if brotli is None:
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(zlib.decompress(body, 31), plain)
+        else:
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertEqual(brotli.decompress(body), plain)
+
+    def test_event_streams_untouched(self):
+        """Test Server-Sent Events are never compressed."""
+        self.assertFalse(compression.compressible({"Content-Type": "text/event-stream"}))
+        self.assertTrue(compression.compressible({"Content-Type": "text/csv; charset=utf-8"}))
+
+    @override_settings(COMPRESSION=False)
+    def test_disabled(self):
+        """Test nothing is compressed with COMPRESSION off."""
+        response = self.client.get(self.todos_url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
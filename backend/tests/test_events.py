@@ -0,0 +1,167 @@
+import asyncio
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from userapp.events import InProcessBroker, Subscription, get_broker, stream
+from userapp.models import Change, Project, Todo
+from userapp.sync import decode_token, encode_token
+
+
+class RecordingBroker(InProcessBroker):
+    """A stand-in broker that also keeps everything published to it."""
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, user_id, changes):
+        self.published.append((user_id, changes))
+        super().publish(user_id, changes)
+
+
+def change(change_id, action, object_id, kind=Change.TODO, project_id=1):
+    return (change_id, kind, action, object_id, project_id)
+
+
+class SubscriptionTest(SimpleTestCase):
+    async def test_burst_is_coalesced(self):
+        """Test a burst of changes to the same objects becomes one entry per object."""
+        subscription = Subscription(max_pending=100)
+        subscription.deliver([change(1, Change.UPDATE, 7), change(2, Change.UPDATE, 7)])
+        subscription.deliver([change(3, Change.CREATE, 8), change(4, Change.UPDATE, 8), change(5, Change.UPDATE, 7)])
+        event, change_id = await subscription.next_event()
+        self.assertEqual(event, ("changes", [
+            {"type": "todo", "action": "update", "id": 7, "project": 1},
+            {"type": "todo", "action": "create", "id": 8, "project": 1},
+        ]))
+        self.assertEqual(change_id, 5)
+        self.assertFalse(subscription.ready.is_set())
+
+    async def test_overflow_becomes_resync(self):
+        """Test a consumer that falls too far behind gets a resync instead of the changes."""
+        subscription = Subscription(max_pending=3)
+        subscription.deliver([change(k, Change.CREATE, k) for k in range(1, 6)])
+        self.assertEqual(await subscription.next_event(), (("resync", None), 5))
+        subscription.deliver([change(6, Change.DELETE, 1)])
+        self.assertEqual(await subscription.next_event(), (("changes", [{"type": "todo", "action": "delete", "id": 1, "project": 1}]), 6))
+
+    async def test_fan_out_across_threads(self):
+        """Test changes published from another thread reach every stream of that user only."""
+        broker = InProcessBroker()
+        first, second, other = Subscription(10), Subscription(10), Subscription(10)
+        broker.subscribe(1, first)
+        broker.subscribe(1, second)
+        broker.subscribe(2, other)
+        await asyncio.to_thread(broker.publish, 1, [change(1, Change.CREATE, 3)])
+        for subscription in (first, second):
+            (name, changes), _ = await asyncio.wait_for(subscription.next_event(), 1)
+            self.assertEqual(changes, [{"type": "todo", "action": "create", "id": 3, "project": 1}])
+        self.assertFalse(other.ready.is_set())
+
+        broker.unsubscribe(1, first)
+        broker.publish(1, [change(2, Change.UPDATE, 3)])
+        await asyncio.sleep(0)
+        self.assertFalse(first.ready.is_set())
+        self.assertTrue(second.ready.is_set())
+
+    @override_settings(EVENT_COALESCE_MS=0, EVENT_HEARTBEAT_SECONDS=0.01)
+    async def test_stream(self):
+        """Test the stream's events and keepalives, and that closing it unsubscribes."""
+        broker = InProcessBroker()
+        subscription = Subscription(10)
+        broker.subscribe(1, subscription)
+        events = stream(broker, 1, subscription)
+        self.assertEqual(await anext(events), ": connected\n\n")
+        self.assertEqual(await anext(events), ": keepalive\n\n")
+        broker.publish(1, [change(4, Change.DELETE, 9)])
+        self.assertEqual(await anext(events), (
+            "event: changes\n"
+            f"id: {encode_token(4)}\n"
+            'data: {"changes":[{"type":"todo","action":"delete","id":9,"project":1}]}\n\n'
+        ))
+        await events.aclose()
+        self.assertNotIn(1, broker._subscriptions)
+
+
+@override_settings(EVENT_BROKER="tests.test_events.RecordingBroker")
+class PublishTest(TestCase):
+    def setUp(self):
+        self.broker = get_broker()
+        self.broker.published.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+
+    def test_published_on_commit(self):
+        """Test logged changes are published once their transaction commits, and not before."""
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(title="Test Project", user=self.user)
+            todo = Todo.objects.create(description="Test Todo", project=project)
+            self.assertEqual(self.broker.published, [])
+        self.assertEqual([(user_id, [c[1:] for c in changes]) for user_id, changes in self.broker.published], [
+            (self.user.id, [("project", "create", project.id, project.id)]),
+            (self.user.id, [("todo", "create", todo.id, project.id)]),
+        ])
+
+    def test_not_published_on_rollback(self):
+        """Test nothing is published for changes that are rolled back."""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Project.objects.create(title="Test Project", user=self.user)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.broker.published, [])
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls", EVENT_COALESCE_MS=0)
+class EventsViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.access_token = str(RefreshToken.for_user(self.user).access_token)
+        self.headers = {"Authorization": f"Bearer {self.access_token}"}
+
+    async def open(self, path="/api/events/", **kwargs):
+        response = await self.async_client.get(path, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return response, aiter(response.streaming_content)
+
+    async def test_stream_receives_changes(self):
+        """Test a change published for the user arrives on their open stream."""
+        response, events = await self.open(headers=self.headers)
+        self.assertEqual(await anext(events), b": connected\n\n")
+        get_broker().publish(self.user.id, [change(12, Change.UPDATE, 5, kind=Change.PROJECT, project_id=5)])
+        event = await asyncio.wait_for(anext(events), 1)
+        self.assertIn(b'"type":"project","action":"update","id":5', event)
+        self.assertEqual(decode_token(event.split(b"\n")[1][len(b"id: "):].decode()), 12)
+
+    async def test_access_token_parameter_ignored(self):
+        """Test a token in the query string, where logs would keep it, does not authenticate."""
+        response = await self.async_client.get(f"/api/events/?access_token={self.access_token}")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_resync_when_behind(self):
+        """Test a client whose position is behind the log is told to resync first."""
+        project = await Project.objects.acreate(title="Test Project", user=self.user)
+        last = await Change.objects.filter(object_id=project.id).alatest("id")
+        _, events = await self.open(headers={**self.headers, "Last-Event-ID": encode_token(last.id - 1)})
+        await anext(events)
+        self.assertEqual(await anext(events), b"event: resync\ndata: {}\n\n")
+
+        _, events = await self.open(f"/api/events/?token={encode_token(last.id)}", headers=self.headers)
+        await anext(events)
+        with self.assertRaises(TimeoutError):
+            await asyncio.wait_for(anext(events), 0.05)
+
+    async def test_rejected(self):
+        """Test streams need credentials and a valid position."""
+        response = await self.async_client.get("/api/events/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get("/api/events/", headers={"Authorization": "Bearer nonsense"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get("/api/events/?token=nonsense", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,110 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from userapp import instrumentation
+from userapp.models import Project, Todo
+
+
+def parse_server_timing(header):
+    """Map each Server-Timing metric name to its parameters, e.g. {"db": {"dur": "1.2", "desc": '"3 queries"'}}."""
+    metrics = {}
+    for entry in header.split(","):
+        name, *params = entry.strip().split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+@override_settings(REQUEST_INSTRUMENTATION=True, SLOW_REQUEST_MS=60000)
+class RequestInstrumentationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.todo = Todo.objects.create(description="Test Todo", project=self.project)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.todos_url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+
+    def test_server_timing_header(self):
+        """Test the Server-Timing header reports the request's queries and phases."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.todos_url, {"description": "New Todo"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        timing = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(timing["db"]["desc"], f'"{len(queries)} queries"')
+        for name in ("auth", "permissions", "serializer", "render", "total"):
+            self.assertGreater(float(timing[name]["dur"]), 0, name)
+        self.assertGreaterEqual(float(timing["total"]["dur"]), float(timing["db"]["dur"]))
+
+    def test_structured_log_line(self):
+        """Test each request is logged as one JSON line with its timings."""
+        with self.assertLogs("userapp.requests", "INFO") as logs:
+            response = self.client.get(self.todos_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].levelname, "INFO")
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["event"], "request")
+        self.assertEqual(record["method"], "GET")
+        self.assertEqual(record["route"], "api/projects/<int:project_id>/todos/")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["user_id"], self.user.id)
+        self.assertGreater(record["queries"], 0)
+        self.assertIn("serializer_ms", record)
+        self.assertNotIn("sql", record)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_request_logs_sql(self):
+        """Test requests over SLOW_REQUEST_MS are logged as warnings with their SQL."""
+        with self.assertLogs("userapp.requests", "WARNING") as logs:
+            self.client.get(self.todos_url)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["event"], "slow_request")
+        self.assertEqual(len(record["sql"]), record["queries"])
+        self.assertTrue(any("userapp_todo" in query["sql"] for query in record["sql"]))
+        self.assertTrue(all(set(query) == {"sql", "ms"} for query in record["sql"]))
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_request_log_leaves_out_params(self):
+        """Test the slow request log of a signup does not carry the new user's password hash."""
+        self.client.credentials()
+        with self.assertLogs("userapp.requests", "WARNING") as logs:
+            response = self.client.post(
+                reverse("user-signup"), {"username": "newuser", "email": "newuser@example.com", "password": "password123"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        password_hash = User.objects.get(username="newuser").password
+        self.assertNotIn(password_hash, logs.output[0])
+        self.assertNotIn("pbkdf2", logs.output[0])
+
+    def test_statements_capped(self):
+        """Test only the first SLOW_SQL_LIMIT statements are kept while every query is counted."""
+        metrics, token = instrumentation.start()
+        try:
+            for _ in range(instrumentation.SLOW_SQL_LIMIT + 10):
+                Todo.objects.filter(pk=self.todo.pk).exists()
+        finally:
+            instrumentation.stop(token)
+        self.assertEqual(metrics.query_count, instrumentation.SLOW_SQL_LIMIT + 10)
+        self.assertEqual(len(metrics.statements), instrumentation.SLOW_SQL_LIMIT)
+
+    @override_settings(REQUEST_INSTRUMENTATION=False)
+    def test_disabled(self):
+        """Test no header or log line is produced when instrumentation is off."""
+        with self.assertNoLogs("userapp.requests", "INFO"):
+            response = self.client.get(self.todos_url)
+        self.assertNotIn("Server-Timing", response)
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls", REQUEST_INSTRUMENTATION=True, SLOW_REQUEST_MS=60000)
+class AsyncRequestInstrumentationTest(RequestInstrumentationTest):
+    """Test instrumentation of the async views, whose queries run in other threads."""
@@ -1,6 +1,15 @@
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
-from userapp.models import Project, Todo 
+from django.db import IntegrityError, connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from userapp import ids
+from userapp.models import Project, Todo, IdSequence, hash_description
+from userapp.pagination import after_cursor, encode_cursor
+from unittest import skipUnless
+import threading
+
+from tests.databases import FileDatabaseTestCase
 
 
 class ProjectModelTest(APITestCase):
@@ -56,3 +65,159 @@ class TodoModelTest(APITestCase):
     def test_todo_status_default(self):
         """Test default status of a todo is False"""
         self.assertFalse(self.todo.status)
+
+
+class CustomIdAllocationTest(FileDatabaseTestCase):
+    # As with SQLITE_TUNED: concurrent writers wait for the lock rather than
+    # failing when a read transaction upgrades.
+    database_options = {"transaction_mode": "IMMEDIATE"}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+
+    def tearDown(self):
+        ids.clear_cache()
+
+    def test_allocation_does_not_scan_table(self):
+        """Test custom_id allocation is a single counter update, not a scan of the table"""
+        ids.next_custom_id("TODO")
+        with CaptureQueriesContext(connection) as ctx:
+            custom_id = ids.next_custom_id("TODO")
+        self.assertEqual(custom_id, "TODO-0002")
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn("userapp_todo", ctx.captured_queries[0]["sql"])
+
+    def test_allocate_block_of_ids(self):
+        """Test a batch of custom_ids is reserved in one go and continues the sequence"""
+        Todo.objects.create(description="First", project=self.project)
+        self.assertEqual(
+            ids.allocate_custom_ids("TODO", 3), ["TODO-0002", "TODO-0003", "TODO-0004"]
+        )
+        self.assertEqual(Todo.objects.create(description="Next", project=self.project).custom_id, "TODO-0005")
+
+    @override_settings(CUSTOM_ID_BLOCK_SIZE=10)
+    def test_block_reservation_is_cached_per_process(self):
+        """Test spare ids of a reserved block are served from memory"""
+        self.assertEqual(ids.next_custom_id("TODO"), "TODO-0001")
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(ids.next_custom_id("TODO"), "TODO-0002")
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(IdSequence.objects.get(prefix="TODO").last_value, 10)
+
+    def test_concurrent_creates_get_unique_ids(self):
+        """Test todos created from many threads at once never collide on custom_id"""
+        threads, per_thread = 8, 25
+        errors = []
+        barrier = threading.Barrier(threads)
+
+        def worker(n):
+            try:
+                barrier.wait()
+                for i in range(per_thread):
+                    Todo.objects.create(description=f"Todo {n}-{i}", project_id=self.project.id)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+        self.assertEqual(errors, [])
+        custom_ids = list(Todo.objects.values_list("custom_id", flat=True))
+        self.assertEqual(len(custom_ids), threads * per_thread)
+        self.assertEqual(len(set(custom_ids)), threads * per_thread)
+        self.assertEqual(IdSequence.objects.get(prefix="TODO").last_value, threads * per_thread)
+
+
+@skipUnless(connection.vendor == "sqlite", "query plans are checked against SQLite's EXPLAIN QUERY PLAN")
+class QueryPlanTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.todo = Todo.objects.create(description="Test Todo", project=self.project)
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertIn("USING", plan)
+        self.assertNotIn("SCAN", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_project_title_probe(self):
+        """Test the duplicate project title check is an index lookup"""
+        self.assertUsesIndex(Project.objects.filter(title="Test Project", user=self.user))
+
+    def test_todo_description_probe(self):
+        """Test the duplicate todo description check is an index lookup on the hash"""
+        self.assertUsesIndex(
+            Todo.objects.filter(description_hash=hash_description("Test Todo"), project=self.project)
+        )
+
+    def test_todo_list_pages(self):
+        """Test todo list pages are read in index order"""
+        todos = Todo.objects.filter(project_id=self.project.id, project__user=self.user).order_by("created_at", "id")
+        self.assertUsesIndex(todos[:101])
+        cursor = encode_cursor(self.todo.created_at, self.todo.id)
+        self.assertUsesIndex(after_cursor(todos, cursor)[:101])
+
+    def test_project_list_pages(self):
+        """Test project list pages are read in index order"""
+        self.assertUsesIndex(Project.objects.filter(user=self.user).order_by("created_at", "id")[:101])
+
+
+class ConstraintTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+
+    def test_duplicate_project_title_rejected_by_database(self):
+        """Test the database refuses a second project with the same title for a user"""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Project.objects.create(title="Test Project", user=self.user)
+
+    def test_duplicate_todo_description_rejected_by_database(self):
+        """Test the database refuses a duplicate description within a project"""
+        todo = Todo.objects.create(description="Test Todo", project=self.project)
+        self.assertEqual(todo.description_hash, hash_description("Test Todo"))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Todo.objects.bulk_create([Todo(description="Test Todo", project=self.project, custom_id="TODO-X")])
+
+
+class ProjectCounterTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+
+    def assertCounters(self, todos, completed):
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_count, self.project.completed_count), (todos, completed))
+
+    def test_counters_follow_todo_lifecycle(self):
+        """Test creating, toggling and deleting todos keeps the project counters in step"""
+        todo = Todo.objects.create(description="Test Todo", project=self.project)
+        Todo.objects.create(description="Done Todo", project=self.project, status=True)
+        self.assertCounters(2, 1)
+
+        todo.status = True
+        todo.save()
+        self.assertCounters(2, 2)
+
+        todo = Todo.objects.get(pk=todo.pk)
+        todo.description = "Renamed Todo"
+        todo.save()
+        self.assertCounters(2, 2)
+
+        todo.delete()
+        self.assertCounters(1, 1)
+
+    def test_project_save_does_not_overwrite_counters(self):
+        """Test saving a stale project instance leaves the counters alone"""
+        stale = Project.objects.get(pk=self.project.pk)
+        Todo.objects.create(description="Test Todo", project=self.project)
+        stale.title = "Renamed Project"
+        stale.save()
+        self.assertCounters(1, 0)
@@ -0,0 +1,70 @@
+import os
+import pstats
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from userapp import profiling
+from userapp.models import Project
+
+
+class ProfilingMiddlewareTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        profiling.reset()
+        self.addCleanup(profiling.reset)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings = override_settings(PROFILE_DIR=self.tmp.name, PROFILE_TOKEN="secret", PROFILE_SAMPLE_RATE=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        refresh = RefreshToken.for_user(self.user)
+        self.authorization = f"Bearer {refresh.access_token}"
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+        self.url = reverse("project-detail", kwargs={"pk": self.project.id})
+
+    def profiles(self):
+        return sorted(os.listdir(self.tmp.name))
+
+    def test_authorized_header(self):
+        """Test a request with the profiling token is profiled and aggregated under its route."""
+        for _ in range(2):
+            response = self.client.get(self.url, HTTP_X_PROFILE="secret")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.profiles(), [f"GET_api_projects_int_pk.{os.getpid()}.prof"])
+        stats = pstats.Stats(os.path.join(self.tmp.name, self.profiles()[0]))
+        calls = [count for (_, _, name), (_, count, *_) in stats.stats.items() if name == "retrieve"]
+        self.assertEqual(calls, [2])
+
+    def test_unauthorized_header(self):
+        """Test a wrong token, or no token configured, does not profile the request."""
+        self.client.get(self.url, HTTP_X_PROFILE="guess")
+        with override_settings(PROFILE_TOKEN=""):
+            self.client.get(self.url, HTTP_X_PROFILE="")
+        self.assertEqual(self.profiles(), [])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampling(self):
+        """Test sampled requests are profiled per method and route, userapp views only."""
+        self.client.get(self.url)
+        self.client.patch(self.url, {"title": "Renamed"}, format="json")
+        self.client.get("/admin/login/")
+        self.assertEqual(self.profiles(), [
+            f"GET_api_projects_int_pk.{os.getpid()}.prof",
+            f"PATCH_api_projects_int_pk.{os.getpid()}.prof",
+        ])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    async def test_async_requests_not_profiled(self):
+        """Test requests served through the async handler are never profiled."""
+        response = await self.async_client.get(self.url, headers={"authorization": self.authorization})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.profiles(), [])
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from userapp import routers
+from userapp.models import Project, Todo
+from userapp.routers import ReadReplicaRouter
+
+
+@override_settings(READ_REPLICAS=["replica1"])
+class ReadReplicaRouterTest(SimpleTestCase):
+    def tearDown(self):
+        routers.set_replica_reads(())
+
+    def test_routing(self):
+        """Test reads only go to a replica once switched over, and writes never do."""
+        router = ReadReplicaRouter()
+        self.assertIsNone(router.db_for_read(Project))
+        routers.set_replica_reads(["replica1"])
+        self.assertEqual(router.db_for_read(Project), "replica1")
+        self.assertEqual(router.db_for_write(Project), "default")
+        self.assertFalse(router.allow_migrate("replica1", "userapp"))
+        self.assertIsNone(router.allow_migrate("default", "userapp"))
+
+    @override_settings(REPLICA_MAX_LAG=60)
+    def test_fresh_replicas(self):
+        """Test only replicas synced within REPLICA_MAX_LAG are read from."""
+        with mock.patch.object(routers, "replica_lag", return_value=5):
+            self.assertEqual(routers.fresh_replicas(), ["replica1"])
+        with mock.patch.object(routers, "replica_lag", return_value=120):
+            self.assertEqual(routers.fresh_replicas(), [])
+        with mock.patch.object(routers, "replica_lag", return_value=None):
+            self.assertEqual(routers.fresh_replicas(), [])
+
+    def test_replica_lag(self):
+        """Test a replica's lag is the age of its file."""
+        with tempfile.NamedTemporaryFile() as replica:
+            os.utime(replica.name, (time.time() - 30, time.time() - 30))
+            with override_settings(DATABASES={"replica1": {"NAME": replica.name}}):
+                self.assertAlmostEqual(routers.replica_lag("replica1"), 30, delta=5)
+        self.assertIsNone(routers.replica_lag("replica1"))
+
+
+# The test database has no separate replica, so "default" stands in for one
+# and pick_replica() records when a read was routed to it.
+@override_settings(READ_REPLICAS=["default"])
+class ReplicaReadViewTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.todo = Todo.objects.create(description="Test Todo", project=self.project)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.todos_url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+        self.todo_url = reverse("todo-detail", kwargs={"project_id": self.project.id, "pk": self.todo.id})
+        patcher = mock.patch.object(ReadReplicaRouter, "pick_replica", return_value="default")
+        self.pick_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(routers, "replica_lag", return_value=0)
+        self.replica_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_reads_from_replica(self):
+        """Test list and detail GETs read from a replica and reset routing afterwards."""
+        for url in (reverse("project-list-create"), reverse("project-detail", kwargs={"pk": self.project.id}),
+                    self.todos_url, self.todo_url):
+            self.pick_replica.reset_mock()
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.assertTrue(self.pick_replica.called, url)
+        self.pick_replica.reset_mock()
+        Project.objects.count()
+        self.assertFalse(self.pick_replica.called)
+
+    def test_reads_stick_to_primary_after_write(self):
+        """Test a user's reads go to the primary for a while after they write."""
+        response = self.client.post(self.todos_url, {"description": "New Todo"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(self.pick_replica.called)
+
+        response = self.client.get(self.todos_url)
+        self.assertEqual(len(response.data), 2)
+        self.assertFalse(self.pick_replica.called)
+
+        # Window over.
+        cache.delete(routers._recent_write_key(self.user.id))
+        self.client.get(self.todo_url)
+        self.assertTrue(self.pick_replica.called)
+
+    def test_stale_replica_not_read(self):
+        """Test reads go to the primary when no replica is within REPLICA_MAX_LAG."""
+        self.replica_lag.return_value = 3600
+        self.assertEqual(self.client.get(self.todo_url).status_code, status.HTTP_200_OK)
+        self.assertFalse(self.pick_replica.called)
+
+    def test_replica_list_not_cached(self):
+        """Test a list read from a replica is neither cached nor given the scope's ETag."""
+        response = self.client.get(self.todos_url)
+        self.assertTrue(self.pick_replica.called)
+        self.assertNotIn("ETag", response)
+
+        self.replica_lag.return_value = 3600
+        response = self.client.get(self.todos_url)
+        self.assertIn("ETag", response)
+        # Only the user row, for JWT authentication.
+        with self.assertNumQueries(1):
+            self.client.get(self.todos_url)
+
+    @override_settings(ROOT_URLCONF="tests.async_urls")
+    def test_async_views_read_from_replica(self):
+        """Test the async views route reads the same way."""
+        self.assertEqual(self.client.get(self.todo_url).status_code, status.HTTP_200_OK)
+        self.assertTrue(self.pick_replica.called)
+        self.pick_replica.reset_mock()
+        self.client.patch(self.todo_url, {"status": True})
+        self.client.get(self.todo_url)
+        self.assertFalse(self.pick_replica.called)
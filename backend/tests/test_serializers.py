@@ -1,6 +1,7 @@
 from rest_framework.test import APITestCase, APIRequestFactory
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth.models import User
+from django.db import IntegrityError
 from userapp.models import Project, Todo
 from userapp.serializers import (
     UserSerializer,
@@ -93,6 +94,33 @@ class ProjectSerializerTest(APITestCase):
         self.assertFalse(serializer.is_valid())
         self.assertIn("title", serializer.errors)
 
+    def test_project_serializer_keep_own_title(self):
+        """Test re-saving a project under its current title is not a duplicate."""
+        request = APIRequestFactory().get("/")
+        request.user = self.user
+        serializer = ProjectSerializer(self.project, data={"title": "Test Project"}, context={"request": request})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_project_serializer_constraint_race(self):
+        """Test a duplicate that slips past validation is reported as a title error."""
+        request = APIRequestFactory().get("/")
+        request.user = self.user
+        serializer = ProjectSerializer(data={"title": "Raced Project"}, context={"request": request})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        Project.objects.create(title="Raced Project", user=self.user)
+        with self.assertRaises(ValidationError) as ctx:
+            serializer.save(user=self.user)
+        self.assertIn("title", ctx.exception.detail)
+
+    def test_project_serializer_other_integrity_error(self):
+        """Test an integrity error other than a duplicate title is not reported as one."""
+        request = APIRequestFactory().get("/")
+        request.user = self.user
+        serializer = ProjectSerializer(data={"title": "Other Project"}, context={"request": request})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertRaises(IntegrityError):
+            serializer.save(user=self.user, custom_id=self.project.custom_id)
+
     @staticmethod
     def _mock_request(user):
         """Mock request with user for serializer context."""
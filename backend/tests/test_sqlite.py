@@ -0,0 +1,186 @@
+import tempfile
+import threading
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from userapp.db import WriteLock, get_write_lock
+from userapp.middleware import SQLiteWriteLockMiddleware
+from userapp.models import Project, Todo
+
+from tests.databases import FileDatabaseTestCase
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite tuning")
+class SQLitePragmaTest(FileDatabaseTestCase):
+    def pragmas(self, *names):
+        # A fresh connection, so the connection_created receiver runs under the current settings.
+        new_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with new_connection.cursor() as cursor:
+                values = {}
+                for name in names:
+                    cursor.execute(f"PRAGMA {name}")
+                    values[name] = cursor.fetchone()[0]
+                return values
+        finally:
+            new_connection.close()
+
+    @override_settings(SQLITE_TUNED=True)
+    def test_pragmas_applied(self):
+        """Test new connections are switched to WAL with the tuned pragmas."""
+        self.assertEqual(
+            self.pragmas("journal_mode", "synchronous", "busy_timeout", "cache_size"),
+            {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000, "cache_size": -64 * 1024},
+        )
+
+    def test_pragmas_opt_in(self):
+        """Test connections keep SQLite's defaults unless SQLITE_TUNED is on."""
+        self.assertEqual(self.pragmas("synchronous", "cache_size"), {"synchronous": 2, "cache_size": -2000})
+
+
+@override_settings(SQLITE_SERIALIZE_WRITES=True)
+class WriteLockTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+
+    def hold_lock(self):
+        # Take the shared lock from another thread, as a concurrent writer would.
+        held, release = threading.Event(), threading.Event()
+        lock = get_write_lock(connection)
+
+        def holder():
+            lock.acquire(1)
+            held.set()
+            release.wait(5)
+            lock.release()
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        held.wait(5)
+        return release, thread
+
+    def test_lock_times_out(self):
+        """Test a second holder waits and gives up after the timeout."""
+        lock = WriteLock(tempfile.NamedTemporaryFile(delete=False).name)
+        self.assertTrue(lock.acquire(1))
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(lock.acquire(0.05)))
+        thread.start()
+        thread.join()
+        self.assertEqual(acquired, [False])
+        lock.release()
+        self.assertTrue(lock.acquire(1))
+        lock.release()
+
+    @override_settings(SQLITE_WRITE_LOCK_TIMEOUT=0.05)
+    def test_write_waits_then_503(self):
+        """Test a write that cannot get the lock in time gets 503, while reads go through."""
+        release, thread = self.hold_lock()
+        try:
+            response = self.client.post(self.url, {"description": "Blocked"})
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response["Retry-After"], "1")
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        finally:
+            release.set()
+            thread.join()
+        response = self.client.post(self.url, {"description": "Through"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(SQLITE_WRITE_LOCK_TIMEOUT=0.05)
+    def test_auth_views_exempt(self):
+        """Test signup and login do not queue on the write lock while they hash passwords."""
+        release, thread = self.hold_lock()
+        try:
+            self.client.credentials()
+            credentials = {"username": "newuser", "email": "newuser@example.com", "password": "password123"}
+            response = self.client.post(reverse("user-signup"), credentials)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = self.client.post(reverse("user-login"), {"username": "newuser", "password": "password123"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        finally:
+            release.set()
+            thread.join()
+
+    def test_locked_database_error_is_503(self):
+        """Test a leftover "database is locked" error is reported as 503."""
+        middleware = SQLiteWriteLockMiddleware(lambda request: None)
+        response = middleware.process_exception(None, OperationalError("database is locked"))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIsNone(middleware.process_exception(None, OperationalError("no such table: x")))
+
+
+@override_settings(SQLITE_TUNED=True, SQLITE_SERIALIZE_WRITES=True)
+class ConcurrentWriteStressTest(FileDatabaseTestCase):
+    database_options = {"transaction_mode": "IMMEDIATE"}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def test_concurrent_api_writes_and_reads(self):
+        """Test many threads writing and reading todos at once never see "database is locked"."""
+        writers, readers, per_thread = 8, 4, 10
+        url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+        stats_url = reverse("project-stats")
+        failures = []
+        barrier = threading.Barrier(writers + readers)
+
+        def client():
+            api = APIClient()
+            api.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+            return api
+
+        def writer(n):
+            api = client()
+            try:
+                barrier.wait()
+                for i in range(per_thread):
+                    response = api.post(url, {"description": f"Todo {n}-{i}"})
+                    if response.status_code != status.HTTP_201_CREATED:
+                        failures.append(response.status_code)
+                    todo_url = reverse("todo-detail", kwargs={"project_id": self.project.id, "pk": response.data["id"]})
+                    response = api.patch(todo_url, {"status": True})
+                    if response.status_code != status.HTTP_200_OK:
+                        failures.append(response.status_code)
+            except Exception as e:
+                failures.append(e)
+            finally:
+                connection.close()
+
+        def reader():
+            api = client()
+            try:
+                barrier.wait()
+                for _ in range(per_thread * 2):
+                    response = api.get(stats_url)
+                    if response.status_code != status.HTTP_200_OK:
+                        failures.append(response.status_code)
+            except Exception as e:
+                failures.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(failures, [])
+        self.project.refresh_from_db()
+        self.assertEqual(Todo.objects.filter(project=self.project, status=True).count(), writers * per_thread)
+        self.assertEqual((self.project.todo_count, self.project.completed_count), (writers * per_thread,) * 2)
@@ -2,8 +2,20 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth.models import User
 from django.urls import reverse
-from userapp.models import Project, Todo
+from userapp.archive import archivable, archive, restore
+from userapp.models import ArchivedTodo, Change, Project, ProjectPurge, Todo
+from userapp.serializers import TodoBulkSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.utils import timezone
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+import copy
+import csv
+import io
+import json
+from unittest import mock
 
 
 class UserSignupViewTest(APITestCase):
@@ -211,3 +223,987 @@ class TodoViewsTest(APITestCase):
         """Test accessing a todo without authentication."""
         response = self.client.get(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TodoBulkViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.other_user = User.objects.create_user(username="otheruser", password="password123")
+        self.other_project = Project.objects.create(title="Other Project", user=self.other_user)
+
+        self.todo = Todo.objects.create(description="Test Todo", project=self.project)
+        self.done = Todo.objects.create(description="Done Todo", project=self.project)
+        self.other_todo = Todo.objects.create(description="Other Todo", project=self.other_project)
+
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("todo-bulk", kwargs={"project_id": self.project.id})
+
+    def test_bulk_create_update_delete(self):
+        """Test creating, updating and deleting todos in one request."""
+        data = {
+            "create": [{"description": "Bulk One"}, {"description": "Bulk Two", "status": True}],
+            "update": [{"id": self.todo.id, "status": True}],
+            "delete": [self.done.id],
+        }
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([t["description"] for t in response.data["created"]], ["Bulk One", "Bulk Two"])
+        self.assertTrue(all(t["custom_id"].startswith("TODO-") for t in response.data["created"]))
+        self.assertEqual(response.data["updated"][0]["id"], self.todo.id)
+        self.assertEqual(response.data["deleted"], [self.done.id])
+
+        self.todo.refresh_from_db()
+        self.assertTrue(self.todo.status)
+        self.assertFalse(Todo.objects.filter(id=self.done.id).exists())
+        self.assertTrue(Todo.objects.get(description="Bulk Two").status)
+
+    def test_bulk_create_reuses_description_freed_by_delete(self):
+        """Test deletes are applied before creates in a bulk request."""
+        data = {"create": [{"description": "Done Todo"}], "delete": [self.done.id]}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Todo.objects.filter(project=self.project, description="Done Todo").count(), 1)
+
+    def test_bulk_duplicate_description(self):
+        """Test duplicates against the project or within the batch are rejected and nothing is written."""
+        for create in ([{"description": "Test Todo"}], [{"description": "Same"}, {"description": "Same"}]):
+            response = self.client.post(self.url, {"create": create, "delete": [self.done.id]}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("create", response.data)
+        self.assertTrue(Todo.objects.filter(id=self.done.id).exists())
+
+    def test_bulk_foreign_todo(self):
+        """Test todos from another project cannot be touched through the bulk endpoint."""
+        response = self.client.post(self.url, {"delete": [self.other_todo.id]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Todo.objects.filter(id=self.other_todo.id).exists())
+
+    def test_bulk_unauthorized_project(self):
+        """Test the bulk endpoint checks project ownership."""
+        url = reverse("todo-bulk", kwargs={"project_id": self.other_project.id})
+        response = self.client.post(url, {"create": [{"description": "Sneaky"}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_counts_statuses_read_at_write_time(self):
+        """Test counters follow the statuses the bulk request replaces, not the ones it validated against."""
+        validate = TodoBulkSerializer.validate
+
+        def validate_then_complete(serializer, data):
+            data = validate(serializer, data)
+            # Another request completes the todo in between.
+            todo = Todo.objects.get(id=self.todo.id)
+            todo.status = True
+            todo.save()
+            return data
+
+        with mock.patch.object(TodoBulkSerializer, "validate", validate_then_complete):
+            response = self.client.post(self.url, {"delete": [self.todo.id]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_count, self.project.completed_count), (1, 0))
+
+    def test_bulk_query_count(self):
+        """Test the number of queries does not grow with the batch size."""
+        data = {
+            "create": [{"description": f"Bulk {i}"} for i in range(20)],
+            "update": [{"id": self.todo.id, "status": True}, {"id": self.done.id, "status": True}],
+        }
+        with self.assertNumQueries(11):
+            response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class PaginationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        for i in range(5):
+            Todo.objects.create(description=f"Todo {i}", project=self.project)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+
+    def _walk(self, url):
+        """Follow the Link header through every page and collect the descriptions."""
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(todo["description"] for todo in response.data)
+            link = response.headers.get("Link")
+            url = link[1:link.index(">")] if link else None
+        return seen
+
+    def test_pages_follow_link_header(self):
+        """Test the todo list is split into pages linked by a next cursor."""
+        response = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('rel="next"', response.headers["Link"])
+        self.assertEqual(self._walk(f"{self.url}?page_size=2"), [f"Todo {i}" for i in range(5)])
+
+    def test_ties_on_created_at(self):
+        """Test rows sharing a created_at are ordered by id and never skipped."""
+        Todo.objects.update(created_at=timezone.now())
+        self.assertEqual(self._walk(f"{self.url}?page_size=2"), [f"Todo {i}" for i in range(5)])
+
+    def test_cursor_stable_under_inserts(self):
+        """Test todos created while paging neither shift nor repeat earlier items."""
+        response = self.client.get(self.url, {"page_size": 2})
+        link = response.headers["Link"]
+        Todo.objects.create(description="Late Todo", project=self.project)
+        rest = self._walk(link[1:link.index(">")])
+        self.assertEqual(rest, ["Todo 2", "Todo 3", "Todo 4", "Late Todo"])
+
+    def test_page_size_is_capped(self):
+        """Test clients cannot request more than MAX_PAGE_SIZE rows."""
+        with self.settings(MAX_PAGE_SIZE=3):
+            response = self.client.get(self.url, {"page_size": 50})
+        self.assertEqual(len(response.data), 3)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected."""
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_project_list_is_paginated(self):
+        """Test the project list uses the same cursor pagination."""
+        Project.objects.create(title="Second Project", user=self.user)
+        response = self.client.get(reverse("project-list-create"), {"page_size": 1})
+        self.assertEqual([p["title"] for p in response.data], ["Test Project"])
+        self.assertIn("Link", response.headers)
+
+
+class SparseFieldsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        for i in range(3):
+            Todo.objects.create(description=f"Todo {i}", project=self.project, status=i == 1)
+        self.todo = Todo.objects.first()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.todos_url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+        self.project_url = reverse("project-detail", kwargs={"pk": self.project.id})
+
+    def test_fields_on_lists_and_details(self):
+        """Test ?fields= limits the fields of the list and detail responses."""
+        response = self.client.get(self.todos_url, {"fields": "id,description"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([set(todo) for todo in response.data], [{"id", "description"}] * 3)
+        todo_url = reverse("todo-detail", kwargs={"project_id": self.project.id, "pk": self.todo.id})
+        self.assertEqual(self.client.get(todo_url, {"fields": "status"}).data, {"status": False})
+        response = self.client.get(reverse("project-list-create"), {"fields": "custom_id,title"})
+        self.assertEqual(response.data, [{"title": "Test Project", "custom_id": self.project.custom_id}])
+        self.assertEqual(self.client.get(self.project_url, {"fields": "title"}).data, {"title": "Test Project"})
+
+    def test_unknown_field(self):
+        """Test asking for a field the serializer does not have is a 400."""
+        response = self.client.get(self.todos_url, {"fields": "id,secret"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("secret", str(response.data["fields"]))
+
+    def test_writes_ignore_fields(self):
+        """Test ?fields= does not drop fields from the input of a write."""
+        response = self.client.patch(f"{self.project_url}?fields=id", {"title": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Renamed")
+
+    def test_values_fast_path_matches_serializer(self):
+        """Test list pages built from .values() rows are identical to the serialized ones."""
+        for url in (self.todos_url, reverse("project-list-create")):
+            responses = []
+            for fast_path in (False, True):
+                cache.clear()
+                with self.settings(LIST_VALUES_FAST_PATH=fast_path):
+                    responses.append(self.client.get(url, {"page_size": 2}))
+            serialized, values = responses
+            self.assertEqual(json.loads(values.content), json.loads(serialized.content))
+            self.assertEqual(values.headers.get("Link"), serialized.headers.get("Link"))
+
+
+class EmbeddedTodosTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.full = Project.objects.create(title="Full Project", user=self.user)
+        for i in range(3):
+            Todo.objects.create(description=f"Todo {i}", project=self.full, status=i != 1)
+        self.small = Project.objects.create(title="Small Project", user=self.user)
+        Todo.objects.create(description="Only Todo", project=self.small)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("project-list-create")
+        settings = self.settings(EMBEDDED_TODOS_LIMIT=2)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_include_todos(self):
+        """Test projects come with their first todos and a link to the rest."""
+        response = self.client.get(self.url, {"include": "todos"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        full, small = response.data
+        self.assertEqual([t["description"] for t in full["todos"]], ["Todo 0", "Todo 1"])
+        self.assertEqual([t["description"] for t in small["todos"]], ["Only Todo"])
+        self.assertIsNone(small["todos_next"])
+        rest = self.client.get(full["todos_next"])
+        self.assertEqual([t["description"] for t in rest.data], ["Todo 2"])
+
+    def test_todo_status(self):
+        """Test ?todo_status= filters the embedded todos and carries over to the todos_next link."""
+        response = self.client.get(self.url, {"include": "todos", "todo_status": "true"})
+        full, small = response.data
+        self.assertEqual([t["description"] for t in full["todos"]], ["Todo 0", "Todo 2"])
+        self.assertEqual(small["todos"], [])
+        self.assertIsNone(full["todos_next"])
+        response = self.client.get(self.url, {"include": "todos", "todo_status": "false"})
+        self.assertEqual([t["description"] for t in response.data[0]["todos"]], ["Todo 1"])
+
+    def test_todo_list_status_filter(self):
+        """Test the todo list can be filtered by status."""
+        url = reverse("todo-list-create", kwargs={"project_id": self.full.id})
+        response = self.client.get(url, {"status": "false"})
+        self.assertEqual([t["description"] for t in response.data], ["Todo 1"])
+        self.assertEqual(self.client.get(url, {"status": "maybe"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_independent_of_projects(self):
+        """Test the todos of a page are loaded with one query, whatever the number of projects."""
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(self.url, {"include": "todos"}).status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        before = count_queries()
+        for i in range(5):
+            project = Project.objects.create(title=f"Extra {i}", user=self.user)
+            Todo.objects.create(description="Extra Todo", project=project)
+        self.assertEqual(count_queries(), before)
+
+    def test_cache_follows_todo_writes(self):
+        """Test a cached page with embedded todos is rebuilt, with a new ETag, after one of them changes."""
+        first = self.client.get(self.url, {"include": "todos"})
+        cached = self.client.get(self.url, {"include": "todos"}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        Todo.objects.filter(project=self.small).get().delete()
+        response = self.client.get(self.url, {"include": "todos"}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertEqual(response.data[1]["todos"], [])
+        plain = self.client.get(self.url)
+        self.assertNotIn("todos", plain.data[0])
+
+    def test_invalid_parameters(self):
+        """Test unknown includes and malformed statuses are rejected."""
+        self.assertEqual(self.client.get(self.url, {"include": "users"}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"include": "todos", "todo_status": "maybe"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SyncTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("sync")
+        self.project = self.client.post(reverse("project-list-create"), {"title": "Test Project"}).data
+        self.todos_url = reverse("todo-list-create", kwargs={"project_id": self.project["id"]})
+        self.todo = self.client.post(self.todos_url, {"description": "Test Todo"}, format="json").data
+
+    def sync(self, token=None, **params):
+        if token:
+            params["token"] = token
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def summary(self, data):
+        return [(change["type"], change["action"], change["id"]) for change in data["changes"]]
+
+    def todo_url(self, todo_id):
+        return reverse("todo-detail", kwargs={"project_id": self.project["id"], "pk": todo_id})
+
+    def test_initial_sync(self):
+        """Test a sync without a token returns everything, projects before their todos."""
+        data = self.sync()
+        self.assertEqual(self.summary(data), [("project", "create", self.project["id"]), ("todo", "create", self.todo["id"])])
+        self.assertEqual(data["changes"][0]["data"]["title"], "Test Project")
+        self.assertEqual(data["changes"][1]["data"], self.todo)
+        self.assertEqual(data["changes"][1]["project"], self.project["id"])
+        self.assertFalse(data["has_more"])
+
+    def test_steady_state(self):
+        """Test a sync with a current token transfers no changes and keeps the token."""
+        token = self.sync()["token"]
+        # The user row (JWT authentication) and the change log.
+        with self.assertNumQueries(2):
+            data = self.sync(token)
+        self.assertEqual(data["changes"], [])
+        self.assertEqual(data["token"], token)
+        self.assertFalse(data["has_more"])
+
+    def test_updates_and_deletes(self):
+        """Test changes after the token come back with current data, deletions as tombstones."""
+        token = self.sync()["token"]
+        other = self.client.post(self.todos_url, {"description": "Other Todo"}, format="json").data
+        self.client.patch(self.todo_url(self.todo["id"]), {"status": True}, format="json")
+        self.client.patch(self.todo_url(self.todo["id"]), {"description": "Renamed Todo"}, format="json")
+        self.client.delete(self.todo_url(other["id"]))
+        self.client.patch(reverse("project-detail", kwargs={"pk": self.project["id"]}), {"title": "Renamed Project"})
+
+        data = self.sync(token)
+        self.assertEqual(self.summary(data), [("todo", "update", self.todo["id"]), ("project", "update", self.project["id"])])
+        self.assertEqual(data["changes"][0]["data"]["description"], "Renamed Todo")
+        self.assertTrue(data["changes"][0]["data"]["status"])
+        self.assertEqual(data["changes"][1]["data"]["title"], "Renamed Project")
+
+        self.client.delete(self.todo_url(self.todo["id"]))
+        data = self.sync(data["token"])
+        self.assertEqual(data["changes"], [{"type": "todo", "action": "delete", "id": self.todo["id"], "project": self.project["id"]}])
+
+    def test_project_delete(self):
+        """Test deleting a project leaves one tombstone for it."""
+        token = self.sync()["token"]
+        self.client.delete(reverse("project-detail", kwargs={"pk": self.project["id"]}))
+        self.assertEqual(self.summary(self.sync(token)), [("project", "delete", self.project["id"])])
+        self.assertEqual(self.sync()["changes"], [])
+
+    def test_batches_resume(self):
+        """Test ?limit= splits the log into batches that resume from each token."""
+        for i in range(3):
+            self.client.post(self.todos_url, {"description": f"Todo {i}"}, format="json")
+        batches, token = [], None
+        while True:
+            data = self.sync(token, limit=2)
+            batches.append(self.summary(data))
+            token = data["token"]
+            if not data["has_more"]:
+                break
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(sum(batches, []), self.summary(self.sync()))
+
+    def test_bulk_and_import_logged(self):
+        """Test the bulk and import endpoints, which bypass Todo.save(), feed the log."""
+        token = self.sync()["token"]
+        bulk = self.client.post(reverse("todo-bulk", kwargs={"project_id": self.project["id"]}), {
+            "create": [{"description": "Bulk Todo"}], "update": [{"id": self.todo["id"], "status": True}],
+        }, format="json").data
+        body = json.dumps({"description": "Imported Todo"}).encode()
+        self.client.generic("POST", reverse("todo-import", kwargs={"project_id": self.project["id"]}), body,
+                            content_type="application/x-ndjson")
+        imported = Todo.objects.get(description="Imported Todo")
+
+        data = self.sync(token)
+        self.assertEqual(self.summary(data), [
+            ("todo", "update", self.todo["id"]),
+            ("todo", "create", bulk["created"][0]["id"]),
+            ("todo", "create", imported.id),
+        ])
+
+        self.client.post(reverse("todo-bulk", kwargs={"project_id": self.project["id"]}), {"delete": [imported.id]}, format="json")
+        self.assertEqual(self.summary(self.sync(data["token"])), [("todo", "delete", imported.id)])
+
+    def test_created_and_deleted_between_syncs(self):
+        """Test an object created and deleted since the last sync is left out."""
+        token = self.sync()["token"]
+        other = self.client.post(self.todos_url, {"description": "Short-lived Todo"}, format="json").data
+        self.client.delete(self.todo_url(other["id"]))
+        self.assertEqual(self.sync(token)["changes"], [])
+
+    def test_other_users_changes_hidden(self):
+        """Test a sync only returns the authenticated user's changes."""
+        other_user = User.objects.create_user(username="otheruser", password="password123")
+        Project.objects.create(title="Other Project", user=other_user)
+        self.assertEqual(len(self.sync()["changes"]), 2)
+
+    def test_invalid_token(self):
+        """Test a malformed token is rejected."""
+        response = self.client.get(self.url, {"token": "not-a-token"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class QueryCountTest(APITestCase):
+    """Query budgets for every endpoint; the user lookup by JWTAuthentication is included."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.todo = Todo.objects.create(description="Test Todo", project=self.project)
+        for i in range(5):
+            Todo.objects.create(description=f"Todo {i}", project=self.project)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.project_url = reverse("project-detail", kwargs={"pk": self.project.id})
+        self.todos_url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+        self.todo_url = reverse("todo-detail", kwargs={"project_id": self.project.id, "pk": self.todo.id})
+
+    def test_signup(self):
+        self.client.credentials()
+        data = {"username": "newuser", "email": "newuser@example.com", "password": "securepassword"}
+        with self.assertNumQueries(2):
+            response = self.client.post(reverse("user-signup"), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_login(self):
+        self.client.credentials()
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse("user-login"), {"username": "testuser", "password": "password123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_project_list(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("project-list-create"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_project_create(self):
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse("project-list-create"), {"title": "New Project"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_project_detail(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.project_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_project_update(self):
+        with self.assertNumQueries(7):
+            response = self.client.patch(self.project_url, {"title": "Renamed Project"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_project_delete(self):
+        # Independent of the number of todos: they are purged after the response.
+        with self.assertNumQueries(5):
+            response = self.client.delete(self.project_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_todo_list(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(self.todos_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 6)
+
+    def test_todo_create(self):
+        with self.assertNumQueries(9):
+            response = self.client.post(self.todos_url, {"description": "New Todo"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_todo_detail(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.todo_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_todo_update(self):
+        with self.assertNumQueries(7):
+            response = self.client.patch(self.todo_url, {"status": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_todo_update_description(self):
+        with self.assertNumQueries(7):
+            response = self.client.patch(self.todo_url, {"description": "Renamed Todo"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_todo_delete(self):
+        with self.assertNumQueries(5):
+            response = self.client.delete(self.todo_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_todo_bulk(self):
+        data = {"create": [{"description": f"Bulk {i}"} for i in range(10)], "delete": [self.todo.id]}
+        with self.assertNumQueries(11):
+            response = self.client.post(reverse("todo-bulk", kwargs={"project_id": self.project.id}), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_todo_restore(self):
+        self.todo.status = True
+        self.todo.save()
+        list(archive(Todo.objects.filter(pk=self.todo.pk)))
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse("todo-restore", kwargs={"project_id": self.project.id, "pk": self.todo.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_sync(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("sync"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["changes"]), 7)
+
+
+class ResponseCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.todo = Todo.objects.create(description="Test Todo", project=self.project)
+        self.other_user = User.objects.create_user(username="otheruser", password="password123")
+        self.authenticate(self.user)
+        self.projects_url = reverse("project-list-create")
+        self.todos_url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+    def test_repeat_list_served_from_cache(self):
+        """Test an unchanged list is served without querying projects or todos."""
+        for url in (self.projects_url, self.todos_url):
+            first = self.client.get(url)
+            # Only the user row, for JWT authentication.
+            with self.assertNumQueries(1):
+                second = self.client.get(url)
+            self.assertEqual(second.data, first.data)
+            self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_conditional_get_not_modified(self):
+        """Test If-None-Match with the current ETag gets a 304."""
+        etag = self.client.get(self.todos_url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.todos_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_writes_invalidate(self):
+        """Test creates, updates, bulk changes and deletes all change the ETag."""
+        detail_url = reverse("todo-detail", kwargs={"project_id": self.project.id, "pk": self.todo.id})
+        bulk_url = reverse("todo-bulk", kwargs={"project_id": self.project.id})
+        writes = [
+            lambda: self.client.post(self.todos_url, {"description": "New Todo"}, format="json"),
+            lambda: self.client.patch(detail_url, {"status": True}, format="json"),
+            lambda: self.client.post(bulk_url, {"create": [{"description": "Bulk Todo"}]}, format="json"),
+            lambda: self.client.delete(detail_url),
+        ]
+        for write in writes:
+            before = self.client.get(self.todos_url)
+            write()
+            after = self.client.get(self.todos_url, HTTP_IF_NONE_MATCH=before["ETag"])
+            self.assertEqual(after.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(after.data, before.data)
+
+    def test_project_changes_invalidate_project_list(self):
+        """Test creating or renaming a project refreshes the cached project list."""
+        self.client.get(self.projects_url)
+        self.client.post(self.projects_url, {"title": "Second Project"})
+        self.assertEqual(len(self.client.get(self.projects_url).data), 2)
+        self.client.patch(reverse("project-detail", kwargs={"pk": self.project.id}), {"title": "Renamed"})
+        self.assertEqual(self.client.get(self.projects_url).data[0]["title"], "Renamed")
+
+    def test_cache_does_not_bypass_ownership(self):
+        """Test another user cannot read a cached todo list or reuse its ETag."""
+        etag = self.client.get(self.todos_url)["ETag"]
+        self.authenticate(self.other_user)
+        response = self.client.get(self.todos_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deleted_project_not_served_from_cache(self):
+        """Test a cached todo list disappears with its project."""
+        self.client.get(self.todos_url)
+        self.client.delete(reverse("project-detail", kwargs={"pk": self.project.id}))
+        response = self.client.get(self.todos_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProjectExportViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        Todo.objects.create(description="Write docs", project=self.project)
+        Todo.objects.create(description="Ship it", project=self.project, status=True)
+        Todo.objects.create(description="Fix bug, again", project=self.project)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("project-export", kwargs={"project_id": self.project.id})
+
+    def _content(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_markdown(self):
+        """Test the Markdown export matches the summary the frontend produces."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            self._content(response),
+            "# Test Project\n\n"
+            "**Summary**: 1/3 todos completed\n"
+            "\n## Pending\n- [ ] Write docs\n- [ ] Fix bug, again\n"
+            "\n## Completed\n- [x] Ship it\n",
+        )
+        self.assertIn(f'filename="{self.project.custom_id}.md"', response["Content-Disposition"])
+
+    def test_export_jsonl(self):
+        """Test the JSON Lines export starts with the counts and lists todos by section."""
+        lines = [json.loads(line) for line in self._content(self.client.get(self.url, {"type": "jsonl"})).splitlines()]
+        self.assertEqual(lines[0]["type"], "summary")
+        self.assertEqual((lines[0]["total"], lines[0]["completed"], lines[0]["pending"]), (3, 1, 2))
+        self.assertEqual(
+            [(line["section"], line["description"]) for line in lines[1:]],
+            [("pending", "Write docs"), ("pending", "Fix bug, again"), ("completed", "Ship it")],
+        )
+
+    def test_export_csv(self):
+        """Test the CSV export quotes descriptions and lists todos by section."""
+        rows = list(csv.reader(io.StringIO(self._content(self.client.get(self.url, {"type": "csv"})))))
+        self.assertEqual(rows[0][:3], ["section", "custom_id", "description"])
+        self.assertEqual([(row[0], row[2]) for row in rows[1:]], [("pending", "Write docs"), ("pending", "Fix bug, again"), ("completed", "Ship it")])
+
+    def test_export_unknown_type(self):
+        """Test an unsupported export type is rejected."""
+        response = self.client.get(self.url, {"type": "pdf"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_unauthorized_project(self):
+        """Test a user cannot export another user's project."""
+        other_user = User.objects.create_user(username="otheruser", password="password123")
+        other_project = Project.objects.create(title="Other Project", user=other_user)
+        response = self.client.get(reverse("project-export", kwargs={"project_id": other_project.id}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProjectStatsViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.other_user = User.objects.create_user(username="otheruser", password="password123")
+        Project.objects.create(title="Other Project", user=self.other_user)
+        self.todo = Todo.objects.create(description="Test Todo", project=self.project)
+        Todo.objects.create(description="Done Todo", project=self.project, status=True)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+    def test_stats(self):
+        """Test the stats endpoint returns the counters of the user's projects only."""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("project-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual((response.data[0]["todo_count"], response.data[0]["completed_count"]), (2, 1))
+        self.assertEqual(response.data[0]["archived_count"], 0)
+
+    def test_stats_follow_bulk_changes(self):
+        """Test bulk creates, status changes and deletes adjust the counters."""
+        data = {
+            "create": [{"description": "Bulk One", "status": True}, {"description": "Bulk Two"}],
+            "update": [{"id": self.todo.id, "status": True}],
+            "delete": [Todo.objects.get(description="Done Todo").id],
+        }
+        self.client.post(reverse("todo-bulk", kwargs={"project_id": self.project.id}), data, format="json")
+        response = self.client.get(reverse("project-stats"))
+        self.assertEqual((response.data[0]["todo_count"], response.data[0]["completed_count"]), (3, 2))
+
+
+class TodoSearchViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Groceries", user=self.user)
+        self.work = Project.objects.create(title="Work", user=self.user)
+        self.other_user = User.objects.create_user(username="otheruser", password="password123")
+        other_project = Project.objects.create(title="Other Project", user=self.other_user)
+        Todo.objects.create(description="Buy milk and bread", project=self.project)
+        Todo.objects.create(description="Buy milk", project=self.work, status=True)
+        Todo.objects.create(description="Write the quarterly report", project=self.work)
+        Todo.objects.create(description="Buy milk for the office", project=other_project)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("todo-search")
+
+    def test_search_across_projects(self):
+        """Test search matches the user's todos in every project, and nobody else's."""
+        response = self.client.get(self.url, {"q": "milk"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(r["description"] for r in response.data), ["Buy milk", "Buy milk and bread"]
+        )
+        self.assertEqual({r["project_title"] for r in response.data}, {"Groceries", "Work"})
+
+    def test_ranked_with_snippets(self):
+        """Test the closer match ranks first and snippets mark the matched terms."""
+        response = self.client.get(self.url, {"q": "buy milk"})
+        self.assertEqual(response.data[0]["description"], "Buy milk")
+        self.assertTrue(response.data[0]["status"])
+        self.assertIn("**milk**", response.data[0]["snippet"])
+
+    def test_prefix_and_query_syntax(self):
+        """Test words match as prefixes and FTS operators in the query are treated as text."""
+        response = self.client.get(self.url, {"q": "quart rep"})
+        self.assertEqual([r["description"] for r in response.data], ["Write the quarterly report"])
+        response = self.client.get(self.url, {"q": 'milk" OR description:*'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_index_follows_changes(self):
+        """Test edits, bulk creates and deletes are reflected in results."""
+        todo = Todo.objects.get(description="Write the quarterly report")
+        todo.description = "Write the annual report"
+        todo.save()
+        Todo.objects.bulk_create([Todo(description="Annual leave", project=self.project, custom_id="T-X")])
+        response = self.client.get(self.url, {"q": "annual"})
+        self.assertEqual(len(response.data), 2)
+        self.work.delete()
+        response = self.client.get(self.url, {"q": "annual"})
+        self.assertEqual([r["description"] for r in response.data], ["Annual leave"])
+
+    def test_pagination(self):
+        """Test results are paged with a Link header to the next page."""
+        response = self.client.get(self.url, {"q": "buy", "page_size": 1})
+        self.assertEqual(len(response.data), 1)
+        self.assertIn('rel="next"', response["Link"])
+        next_url = response["Link"].split(";")[0].strip("<>")
+        response = self.client.get(next_url)
+        self.assertEqual(len(response.data), 1)
+        self.assertFalse(response.has_header("Link"))
+        self.assertEqual(self.client.get(self.url, {"q": "buy", "page": 0}).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_query_required(self):
+        """Test a missing query is rejected."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TodoImportViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        Todo.objects.create(description="Already here", project=self.project)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("todo-import", kwargs={"project_id": self.project.id})
+
+    def test_import_jsonl_body(self):
+        """Test a JSON Lines request body is imported, skipping existing and repeated descriptions."""
+        body = "\n".join(json.dumps(item) for item in [
+            {"type": "summary", "title": "ignored"},
+            {"description": "First", "status": True},
+            {"description": "Second"},
+            {"description": "First"},
+            {"description": "Already here"},
+            {"description": ""},
+        ])
+        response = self.client.post(self.url, body, content_type="application/jsonl")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["created"], response.data["skipped"], response.data["invalid"]), (2, 2, 1))
+        self.assertIn("rows_per_second", response.data)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_count, self.project.completed_count), (3, 1))
+        self.assertEqual(Todo.objects.filter(project=self.project).values("custom_id").distinct().count(), 3)
+
+    def test_import_round_trips_exports(self):
+        """Test the Markdown and CSV exports of one project import into another."""
+        Todo.objects.create(description="Done, with a comma", project=self.project, status=True)
+        for export_type in ("md", "csv"):
+            target = Project.objects.create(title=f"Copy {export_type}", user=self.user)
+            export = self.client.get(reverse("project-export", kwargs={"project_id": self.project.id}), {"type": export_type})
+            upload = io.BytesIO(b"".join(export.streaming_content))
+            upload.name = f"export.{export_type}"
+            response = self.client.post(
+                reverse("todo-import", kwargs={"project_id": target.id}), {"file": upload}, format="multipart"
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+            self.assertEqual(
+                sorted(Todo.objects.filter(project=target).values_list("description", "status")),
+                [("Already here", False), ("Done, with a comma", True)],
+            )
+
+    def test_cached_list_sees_import(self):
+        """Test an import invalidates the cached todo list."""
+        todos_url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+        self.client.get(todos_url)
+        self.client.post(self.url, '{"description": "Imported"}', content_type="application/jsonl")
+        self.assertEqual(len(self.client.get(todos_url).data), 2)
+
+    def test_bad_input(self):
+        """Test unsupported types and malformed lines are rejected with what was imported so far."""
+        response = self.client.post(self.url + "?type=xml", "<todo/>", content_type="application/xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, '{"description": "Fine"}\nnot json\n', content_type="application/jsonl")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Line 2", response.data["error"])
+
+    def test_import_into_other_users_project(self):
+        """Test importing into another user's project is forbidden."""
+        other = User.objects.create_user(username="otheruser", password="password123")
+        project = Project.objects.create(title="Other Project", user=other)
+        url = reverse("todo-import", kwargs={"project_id": project.id})
+        response = self.client.post(url, '{"description": "Sneaky"}', content_type="application/jsonl")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Todo.objects.filter(project=project).exists())
+
+
+class ArchiveTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Test Project", user=self.user)
+        self.old_done = Todo.objects.create(description="Old and done", project=self.project, status=True)
+        self.recent_done = Todo.objects.create(description="Recently done", project=self.project, status=True)
+        self.old_pending = Todo.objects.create(description="Old and pending", project=self.project)
+        Todo.objects.filter(pk__in=[self.old_done.pk, self.old_pending.pk]).update(
+            updated_at=timezone.now() - timezone.timedelta(days=60)
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.todos_url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+
+    def archive(self):
+        return sum(archive(archivable(30)))
+
+    def restore_url(self, todo_id):
+        return reverse("todo-restore", kwargs={"project_id": self.project.id, "pk": todo_id})
+
+    def counters(self):
+        return Project.objects.values_list(*Project.COUNTER_FIELDS).get(pk=self.project.pk)
+
+    def test_archives_old_completed_todos(self):
+        """Test only todos completed longer ago than the cutoff leave the default list."""
+        self.client.get(self.todos_url)
+        self.assertEqual(self.archive(), 1)
+        self.assertEqual(
+            [todo["description"] for todo in self.client.get(self.todos_url).data],
+            ["Recently done", "Old and pending"],
+        )
+        archived = self.client.get(self.todos_url, {"archived": "true"}).data
+        self.assertEqual([(todo["id"], todo["custom_id"]) for todo in archived], [(self.old_done.id, self.old_done.custom_id)])
+        self.assertIsNotNone(archived[0]["archived_at"])
+        self.assertEqual(self.counters(), (2, 1, 1))
+        self.assertEqual(self.archive(), 0)
+
+    def test_restore(self):
+        """Test a restored todo is back in the list as it was, and counted again."""
+        self.archive()
+        response = self.client.post(self.restore_url(self.old_done.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["custom_id"], self.old_done.custom_id)
+        todos = self.client.get(self.todos_url).data
+        self.assertEqual([todo["id"] for todo in todos], [self.old_done.id, self.recent_done.id, self.old_pending.id])
+        self.assertEqual(todos[0], response.data)
+        self.assertEqual(self.client.get(self.todos_url, {"archived": "true"}).data, [])
+        self.assertEqual(self.counters(), (3, 2, 0))
+        self.assertEqual(self.client.post(self.restore_url(self.old_done.id)).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_restored_todo_stays_restored(self):
+        """Test the next archive run leaves a just restored todo in the hot table."""
+        self.archive()
+        response = self.client.post(self.restore_url(self.old_done.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.archive(), 0)
+        self.assertTrue(Todo.objects.filter(pk=self.old_done.pk).exists())
+        self.assertEqual(self.counters(), (3, 2, 0))
+
+    def test_restore_reused_description(self):
+        """Test restoring a todo whose description has been taken again is a 400."""
+        self.archive()
+        self.client.post(self.todos_url, {"description": "Old and done"}, format="json")
+        response = self.client.post(self.restore_url(self.old_done.id))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("description", response.data)
+        self.assertTrue(ArchivedTodo.objects.filter(pk=self.old_done.pk).exists())
+
+    def test_double_restore(self):
+        """Test a todo restored by a concurrent request in between is a 404 and counted once."""
+        self.archive()
+        restores = Change.objects.filter(kind=Change.TODO, action=Change.CREATE, object_id=self.old_done.id)
+        created = restores.count()
+
+        def restored_concurrently(archived):
+            restore(copy.copy(archived))
+            return restore(archived)
+
+        with mock.patch("userapp.views.restore", restored_concurrently):
+            response = self.client.post(self.restore_url(self.old_done.id))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.counters(), (3, 2, 0))
+        self.assertEqual(restores.count(), created + 1)
+
+    def test_restore_other_users_todo(self):
+        """Test a user cannot restore todos of another user's project."""
+        self.archive()
+        other = User.objects.create_user(username="otheruser", password="password123")
+        refresh = RefreshToken.for_user(other)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.assertEqual(self.client.post(self.restore_url(self.old_done.id)).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sync_and_export(self):
+        """Test clients see archiving as a delete and restoring as a create, and exports keep archived todos."""
+        token = self.client.get(reverse("sync")).data["token"]
+        self.archive()
+        data = self.client.get(reverse("sync"), {"token": token}).data
+        self.assertEqual([(c["action"], c["id"]) for c in data["changes"]], [("delete", self.old_done.id)])
+
+        url = reverse("project-export", kwargs={"project_id": self.project.id})
+        response = self.client.get(url, {"type": "jsonl"})
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual((lines[0]["total"], lines[0]["completed"], lines[0]["archived"]), (3, 2, 1))
+        self.assertEqual(lines[-1]["section"], "archived")
+        self.assertEqual(lines[-1]["custom_id"], self.old_done.custom_id)
+
+        self.client.post(self.restore_url(self.old_done.id))
+        data = self.client.get(reverse("sync"), {"token": data["token"]}).data
+        self.assertEqual([(c["action"], c["id"]) for c in data["changes"]], [("create", self.old_done.id)])
+
+
+@override_settings(PURGE_IN_BACKGROUND=False)
+class ProjectPurgeTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.project = Project.objects.create(title="Big Project", user=self.user)
+        for i in range(5):
+            Todo.objects.create(description=f"Todo {i}", project=self.project, status=i % 2 == 0)
+        Todo.objects.filter(project=self.project, status=True).update(updated_at=timezone.now() - timezone.timedelta(days=60))
+        list(archive(archivable(30)))
+        self.todo = Todo.objects.filter(project=self.project).first()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.project_url = reverse("project-detail", kwargs={"pk": self.project.id})
+        self.purge_url = reverse("project-purge", kwargs={"project_id": self.project.id})
+
+    def test_deleted_project_hidden(self):
+        """Test a deleted project and its todos disappear before they are purged, and its title is free again."""
+        response = self.client.delete(self.project_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["purge"].endswith(self.purge_url))
+        self.assertEqual(Todo.objects.filter(project_id=self.project.id).count(), 2)
+
+        self.assertEqual(self.client.get(reverse("project-list-create")).data, [])
+        self.assertEqual(self.client.get(reverse("project-stats")).data, [])
+        self.assertEqual(self.client.get(self.project_url).status_code, status.HTTP_404_NOT_FOUND)
+        todos_url = reverse("todo-list-create", kwargs={"project_id": self.project.id})
+        self.assertEqual(self.client.get(todos_url).status_code, status.HTTP_403_FORBIDDEN)
+        todo_url = reverse("todo-detail", kwargs={"project_id": self.project.id, "pk": self.todo.id})
+        self.assertEqual(self.client.get(todo_url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(reverse("todo-search"), {"q": "todo"}).data, [])
+
+        response = self.client.post(reverse("project-list-create"), {"title": "Big Project"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(PURGE_CHUNK_SIZE=2)
+    def test_purge(self):
+        """Test the todos, archived ones included, are purged in chunks and the progress reported."""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.client.delete(self.project_url)
+        response = self.client.get(self.purge_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["status"], response.data["total"], response.data["purged"]), ("pending", 5, 0))
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        chunks = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("DELETE") and 'todo"."id" IN' in q["sql"]]
+        self.assertTrue(chunks)
+        self.assertTrue(all("LIMIT 2" in sql for sql in chunks))
+        response = self.client.get(self.purge_url)
+        self.assertEqual((response.data["status"], response.data["purged"]), ("done", 5))
+        self.assertIsNotNone(response.data["finished_at"])
+        self.assertFalse(Project.all_objects.filter(pk=self.project.id).exists())
+        self.assertFalse(Todo.objects.filter(project_id=self.project.id).exists())
+        self.assertFalse(ArchivedTodo.objects.filter(project_id=self.project.id).exists())
+
+    def test_purge_status_of_other_users_project(self):
+        """Test the purge status is only visible to the project's owner."""
+        self.client.delete(self.project_url)
+        other = User.objects.create_user(username="otheruser", password="password123")
+        refresh = RefreshToken.for_user(other)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.assertEqual(self.client.get(self.purge_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(ProjectPurge.objects.get(pk=self.project.id).status, ProjectPurge.PENDING)
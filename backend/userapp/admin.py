@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Project, Todo
+from .models import ArchivedTodo, Project, ProjectPurge, Todo, IdSequence
 # Register your models here.
 from django.contrib.auth.models import User
 
@@ -38,4 +38,38 @@ class adminTodo(admin.ModelAdmin):
         'custom_id',
     )
 
-admin.site.register(Todo,adminTodo)
\ No newline at end of file
+admin.site.register(Todo,adminTodo)
+
+class adminArchivedTodo(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'description',
+        'status',
+        'updated_at',
+        'archived_at',
+        'project',
+        'custom_id',
+    )
+
+admin.site.register(ArchivedTodo,adminArchivedTodo)
+
+class adminProjectPurge(admin.ModelAdmin):
+    list_display = (
+        'project_id',
+        'user',
+        'status',
+        'purged',
+        'total',
+        'created_at',
+        'finished_at',
+    )
+
+admin.site.register(ProjectPurge,adminProjectPurge)
+
+class adminIdSequence(admin.ModelAdmin):
+    list_display = (
+        'prefix',
+        'last_value',
+    )
+
+admin.site.register(IdSequence,adminIdSequence)
@@ -0,0 +1,124 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .cache import bump_version, todos_scope
+from .models import ArchivedTodo, Change, Project, Todo
+
+# Hot/cold split of todos.
+#
+# Todos that were completed and then left alone for ARCHIVE_AFTER_DAYS
+# (their updated_at; completion is their last write) are moved from
+# userapp_todo into userapp_archivedtodo by `manage.py archive_todos`, so
+# the lists, the uniqueness checks and the indexes of the hot table stop
+# growing with a project's history. The move runs in ARCHIVE_BATCH_SIZE
+# batches, each its own short transaction, walking the table by id, so
+# requests keep writing in between.
+#
+# Rows are copied with INSERT ... SELECT, which keeps ids, custom_ids and
+# created_at as they are; a restored todo goes back to its place in the
+# list. Restoring sets its updated_at to now, so the next archive run does
+# not move it straight back. Clients see an archived todo as deleted (change log and event
+# streams) and a restored one as created. Archived todos are listed with
+# ?archived=true and exported, but not searched, and a description only
+# has to be unique among the hot todos of a project: restoring a todo
+# whose description has been reused since fails.
+
+TODO_COLUMNS = ('id', 'description', 'status', 'created_at', 'updated_at', 'project_id', 'custom_id', 'description_hash')
+
+
+def archivable(days=None):
+    """
+    The todos due for archiving: completed and untouched for `days`
+    (ARCHIVE_AFTER_DAYS) days, outside projects waiting to be purged.
+    """
+    if days is None:
+        days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 30)
+    return Todo.objects.filter(
+        status=True, updated_at__lt=timezone.now() - timedelta(days=days), project__deleted_at__isnull=True,
+    )
+
+
+def _copy(source, target, ids, **values):
+    """
+    INSERT ... SELECT rows `ids` of one todo table into the other, with
+    constant `values` replacing or adding columns. Returns the number of
+    rows copied.
+    """
+    columns = TODO_COLUMNS + tuple(name for name in values if name not in TODO_COLUMNS)
+    names = ', '.join(columns)
+    selected = ', '.join('%s' if name in values else name for name in columns)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {target._meta.db_table} ({names}) "
+            f"SELECT {selected} FROM {source._meta.db_table} WHERE id IN ({placeholders})",
+            [*(values[name] for name in columns if name in values), *ids],
+        )
+        return cursor.rowcount
+
+
+def _move_counters(counts, todos, completed, archived):
+    """One UPDATE applying each project's count in `counts`, times the given signs, to its counters."""
+    def delta(sign):
+        return Case(*[When(pk=project_id, then=Value(sign * n)) for project_id, n in counts.items()],
+                    output_field=IntegerField())
+    signs = {'todo_count': todos, 'completed_count': completed, 'archived_count': archived}
+    Project.objects.filter(pk__in=counts).update(**{
+        name: F(name) + delta(sign) for name, sign in signs.items() if sign
+    })
+
+
+def archive(todos, batch_size=None):
+    """
+    Move the completed todos in the queryset `todos` into the archive, in
+    batches of `batch_size` (ARCHIVE_BATCH_SIZE) per transaction. Yields
+    the number moved by each batch.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'ARCHIVE_BATCH_SIZE', 500)
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                todos.filter(status=True, id__gt=last_id).select_for_update(of=('self',)).order_by('id')
+                .values_list('id', 'project_id', 'project__user_id')[:batch_size]
+            )
+            if not rows:
+                return
+            ids = [todo_id for todo_id, _, _ in rows]
+            last_id = ids[-1]
+            _copy(Todo, ArchivedTodo, ids, archived_at=connection.ops.adapt_datetimefield_value(timezone.now()))
+            Todo.objects.filter(id__in=ids).delete()
+            counts = Counter(project_id for _, project_id, _ in rows)
+            _move_counters(counts, todos=-1, completed=-1, archived=1)
+            Change.record_many([
+                (user_id, Change.TODO, Change.DELETE, todo_id, project_id) for todo_id, project_id, user_id in rows
+            ])
+            bump_version(*(todos_scope(project_id) for project_id in counts))
+        yield len(rows)
+
+
+def restore(archived):
+    """
+    Move an ArchivedTodo back into userapp_todo and return it as a Todo.
+    Raises IntegrityError if the project has a todo with its description,
+    and ArchivedTodo.DoesNotExist if a concurrent restore moved it first;
+    nothing is changed then.
+    """
+    archived.updated_at = timezone.now()
+    with transaction.atomic():
+        copied = _copy(ArchivedTodo, Todo, [archived.pk],
+                       updated_at=connection.ops.adapt_datetimefield_value(archived.updated_at))
+        deleted, _ = ArchivedTodo.objects.filter(pk=archived.pk).delete()
+        if copied != 1 or deleted != 1:
+            raise ArchivedTodo.DoesNotExist(f"Archived todo {archived.pk} has already been restored.")
+        Project.adjust_counters(archived.project_id, 1, int(archived.status), -1)
+        Change.record(archived.project.user_id, Change.TODO, archived.project_id, create=[archived.pk])
+    bump_version(todos_scope(archived.project_id))
+    return Todo.from_db(Todo.objects.db, TODO_COLUMNS, [getattr(archived, column) for column in TODO_COLUMNS])
+
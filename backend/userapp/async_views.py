@@ -0,0 +1,298 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotFound, ParseError, ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import hashing
+from .db import write_lock_exempt
+from .events import Subscription, get_broker, stream
+from .models import Change
+from .parsers import JSONParser
+from .serializers import UserSerializer
+from .sync import decode_token
+from .views import ProjectCreateListView, ProjectDetailView, TodoCreateListView, TodoDetailView
+
+# Async signup/login, routed in place of UserSignUpView/UserLoginView when
+# ASYNC_AUTH_VIEWS is on (the default under backend/asgi.py). They answer
+# exactly like the DRF views, but password hashing and verification run in
+# the bounded pool from hashing.py, so a login storm queues there instead
+# of tying up the workers that serve everything else. Neither takes the
+# SQLite write lock while it hashes (db.write_lock_exempt).
+
+QUEUE_DEPTH_HEADER = 'X-Password-Hash-Queue'
+
+
+def _parse(request):
+    return Request(request, parsers=[JSONParser(), FormParser(), MultiPartParser()]).data
+
+
+def _respond(data, status_code):
+    response = JsonResponse(data, status=status_code)
+    response[QUEUE_DEPTH_HEADER] = str(hashing.queue_depth())
+    return response
+
+
+def _busy():
+    response = _respond({'error': 'Too many sign-in attempts in progress, try again shortly.'},
+                        status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = '1'
+    return response
+
+
+def async_auth_view(view):
+    async def wrapper(request):
+        try:
+            data = _parse(request)
+        except ParseError as exc:
+            return _respond({'detail': str(exc.detail)}, status.HTTP_400_BAD_REQUEST)
+        try:
+            return await view(request, data)
+        except hashing.HashingQueueFull:
+            return _busy()
+    wrapper.__name__ = view.__name__
+    return write_lock_exempt(csrf_exempt(require_POST(wrapper)))
+
+
+@async_auth_view
+async def signup(request, data):
+    serializer = UserSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return _respond(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    validated = serializer.validated_data
+    user = User(username=validated['username'], email=validated['email'])
+    user.password = await hashing.make_password(validated['password'])
+    await user.asave()
+    return _respond({
+        "message": "User created successfully.",
+        "user": UserSerializer(user).data
+    }, status.HTTP_201_CREATED)
+
+
+@async_auth_view
+async def login(request, data):
+    username = data.get('username')
+    password = data.get('password')
+
+    if not username or not password:
+        return _respond({'error': 'Username and password are required'}, status.HTTP_400_BAD_REQUEST)
+
+    user = await User.objects.filter(username=username).afirst()
+
+    if user:
+        is_correct, must_update = await hashing.verify_password(password, user.password)
+        if is_correct:
+            if must_update:
+                # Same upgrade AbstractBaseUser.check_password does, with the
+                # rehash in the pool.
+                user.password = await hashing.make_password(password)
+                await user.asave(update_fields=['password'])
+            refresh = RefreshToken.for_user(user)
+            return _respond({
+                'access_token': str(refresh.access_token),
+                'refresh_token': str(refresh)
+            }, status.HTTP_200_OK)
+    return _respond({'error': 'Invalid Credentials'}, status.HTTP_400_BAD_REQUEST)
+
+
+# Server-sent change events (see events.py), routed along with the async
+# API views. Streams authenticate like the API, with the Authorization
+# header: a token in the query string would end up in access logs and
+# proxies. Browsers open them with a fetch-based EventSource, which can set
+# headers.
+
+
+def _stream_user(request):
+    for authenticator in (auth_class() for auth_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES):
+        result = authenticator.authenticate(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+@require_GET
+async def events(request):
+    try:
+        user = await sync_to_async(_stream_user)(request)
+    except (AuthenticationFailed, InvalidToken) as exc:
+        return JsonResponse({'detail': str(exc.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    # Where the client is: the id of the last event it got, or its sync token.
+    position = request.headers.get('Last-Event-ID') or request.GET.get('token')
+    try:
+        after = decode_token(position) if position else None
+    except ValidationError:
+        return JsonResponse({'token': 'Invalid sync token.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Subscribe before looking at the log, so no change falls in between.
+    broker = get_broker()
+    subscription = Subscription(getattr(settings, 'EVENT_MAX_PENDING', 500))
+    broker.subscribe(user.id, subscription)
+    try:
+        stale = after is not None and await Change.objects.filter(user_id=user.id, id__gt=after).aexists()
+    except BaseException:
+        broker.unsubscribe(user.id, subscription)
+        raise
+    response = StreamingHttpResponse(stream(broker, user.id, subscription, stale), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx and the like from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Async counterparts of the project/todo views, routed in their place when
+# ASYNC_API_VIEWS is on (also the default under backend/asgi.py). Each one
+# subclasses the sync view, so querysets, serializers, permissions and
+# messages are shared; only the handlers change. Reads go through the async
+# ORM; authentication and serializer validation/saves (which may query and
+# write several tables) run in the sync thread via sync_to_async.
+
+
+class AsyncAPIViewMixin:
+    async def dispatch(self, request, *args, **kwargs):
+        # APIView.dispatch with the handler awaited and the authentication /
+        # permission checks moved off the event loop.
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = await queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).afirst()
+        if obj is None:
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_list(self, request):
+        # The list views mix in ValuesListMixin, which provides the queryset
+        # (of rows or instances) and turns a page of it into the payload.
+        queryset = self.get_list_queryset()
+        if self.paginator is None:
+            return Response(self.get_list_data([obj async for obj in queryset]))
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        return self.paginator.get_paginated_response(self.get_list_data(page))
+
+    async def acreate(self, request):
+        serializer = self.get_serializer(data=request.data)
+        await sync_to_async(self.validate_and_perform)(serializer, self.perform_create)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    async def aretrieve(self, request):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def aupdate(self, request, partial=False):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        await sync_to_async(self.validate_and_perform)(serializer, self.perform_update)
+        return Response(serializer.data)
+
+    async def adestroy(self, request):
+        instance = await self.aget_object()
+        await sync_to_async(self.perform_destroy)(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def validate_and_perform(self, serializer, perform):
+        serializer.is_valid(raise_exception=True)
+        perform(serializer)
+
+
+class AsyncProjectCreateListView(AsyncAPIViewMixin, ProjectCreateListView):
+    async def get(self, request, *args, **kwargs):
+        if self.include_todos():
+            # Embedding prefetches through the sync ORM.
+            return await sync_to_async(self.list)(request, *args, **kwargs)
+        return await self.alist(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        return await self.acreate(request)
+
+
+class AsyncProjectDetailView(AsyncAPIViewMixin, ProjectDetailView):
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request)
+
+    async def put(self, request, *args, **kwargs):
+        return await self.aupdate(request)
+
+    async def patch(self, request, *args, **kwargs):
+        return await self.aupdate(request, partial=True)
+
+    async def delete(self, request, *args, **kwargs):
+        project = await self.aget_object()
+        id = project.id
+        await sync_to_async(self.perform_destroy)(project)
+
+        return self.deleted_response(id)
+
+
+class AsyncTodoCreateListView(AsyncAPIViewMixin, TodoCreateListView):
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        await self.aget_project()
+        return await self.acreate(request)
+
+    async def apaginate_list(self, request):
+        # Only a cache miss needs the project (and its ownership check).
+        await self.aget_project()
+        return await super().apaginate_list(request)
+
+
+class AsyncTodoDetailView(AsyncAPIViewMixin, TodoDetailView):
+    async def aget_object(self):
+        # Same lookup as TodoDetailView.get_object.
+        todo = await self.get_queryset().select_related('project').filter(pk=self.kwargs['pk']).afirst()
+        if todo is None or todo.project.user_id != self.request.user.id:
+            await self.aget_project()
+            raise NotFound()
+        self._project = todo.project
+        self.check_object_permissions(self.request, todo)
+        return todo
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request)
+
+    async def put(self, request, *args, **kwargs):
+        return await self.aupdate(request)
+
+    async def patch(self, request, *args, **kwargs):
+        return await self.aupdate(request, partial=True)
+
+    async def delete(self, request, *args, **kwargs):
+        return await self.adestroy(request)
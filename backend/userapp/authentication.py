@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def user_cache_key(user_id):
+    return f"userapp:auth-user:{user_id}"
+
+
+def _forget(user_ids):
+    _cache().delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_users(*user_ids):
+    # Drop now, and again once the transaction commits: a request that
+    # cached the old row in between would otherwise keep it until it expires.
+    _forget(user_ids)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _forget(user_ids))
+
+
+def update_users(users, **fields):
+    """
+    users.update(**fields) that also drops the cached copies of the users;
+    returns the number of rows updated. Use it instead of a bare update()
+    (which sends no signal) for bulk deactivations and the like.
+    """
+    user_ids = list(users.values_list('pk', flat=True))
+    updated = get_user_model().objects.filter(pk__in=user_ids).update(**fields)
+    invalidate_users(*user_ids)
+    return updated
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from the cache instead
+    of loading the row on every request.
+
+    Entries live for AUTH_USER_CACHE_TIMEOUT seconds and are dropped as soon
+    as the user row is saved or deleted (password change, deactivation; see
+    signals.py). QuerySet.update() sends no signal, so user rows must be
+    changed through save(), delete() or update_users(); a bare update()
+    only takes effect once the entry expires. Only the user's fields are
+    cached, never the password hash; the md5 that simplejwt compares
+    against the token's revoke claim is kept in its place, and the user
+    built from the cache has its password deferred.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        entry = _cache().get(key)
+        if entry is None:
+            user = super().get_user(validated_token)
+            entry = self.to_cache_entry(user)
+            _cache().set(key, entry, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60))
+            return user
+
+        fields, password_md5 = entry
+        if not fields['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_md5:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return self.from_cache_entry(fields)
+
+    def to_cache_entry(self, user):
+        fields = {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.name != 'password'
+        }
+        return fields, get_md5_hash_password(user.password)
+
+    def from_cache_entry(self, fields):
+        # As if loaded with .defer('password'): reading the hash fetches it,
+        # and save() only writes the loaded fields, never a blank password.
+        model = get_user_model()
+        return model.from_db('default', list(fields), list(fields.values()))
@@ -0,0 +1,123 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Versioned response cache for the list endpoints.
+#
+# Every cached list belongs to a scope ("projects:<user_id>" or
+# "todos:<project_id>") that has a version token in the cache. Writes to
+# Project/Todo bump the token, which orphans every entry built from the old
+# data; nothing is ever deleted explicitly. The token also feeds the ETag,
+# so a conditional GET can be answered from the cache alone.
+#
+# A list built from several scopes (projects with their embedded todos)
+# records the versions of the extra scopes in its cache entry; the entry is
+# only served while they are all unchanged, and its ETag covers them too.
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def projects_scope(user_id):
+    return f"projects:{user_id}"
+
+
+def todos_scope(project_id):
+    return f"todos:{project_id}"
+
+
+def _version_key(scope):
+    return f"userapp:version:{scope}"
+
+
+def get_version(scope):
+    cache = get_cache()
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # Never written, or evicted: start a fresh version. add() keeps the
+        # first token if two requests race here.
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(scope):
+    cache = get_cache()
+    key = _version_key(scope)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, None)
+        version = await cache.aget(key)
+    return version
+
+
+def get_versions(scopes):
+    """get_version() for several scopes, in one cache round trip when they all exist."""
+    cache = get_cache()
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+async def aget_versions(scopes):
+    cache = get_cache()
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = await cache.aget_many(list(keys))
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            await cache.aadd(key, uuid.uuid4().hex, None)
+        found.update(await cache.aget_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def versions_current(versions):
+    """Whether every scope in `versions` ({scope: version}) is still at that version."""
+    return not versions or get_versions(list(versions)) == versions
+
+
+async def aversions_current(versions):
+    return not versions or await aget_versions(list(versions)) == versions
+
+
+def _bump(scopes):
+    get_cache().set_many({_version_key(scope): uuid.uuid4().hex for scope in scopes}, None)
+
+
+def bump_version(*scopes):
+    # Bump now so this request stops serving the old list, and again once the
+    # transaction commits so a reader that cached the pre-commit rows in
+    # between is invalidated too.
+    _bump(scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def make_etag(user_id, scope, version, path):
+    digest = hashlib.md5(f"{user_id}:{scope}:{version}:{path}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def dependent_etag(etag, versions):
+    """
+    The ETag of a cached list that also depends on other scopes: it changes
+    whenever one of their versions does.
+    """
+    if not versions:
+        return etag
+    digest = hashlib.md5(f"{etag}:{sorted(versions.items())}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def response_key(etag):
+    return "userapp:response:" + etag.strip('"')
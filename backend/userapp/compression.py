@@ -0,0 +1,99 @@
+import gzip
+import re
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # optional: responses are only gzipped without it
+    brotli = None
+
+# Response compression, applied by CompressionMiddleware (middleware.py).
+#
+# The coding is negotiated from Accept-Encoding: br (when the brotli package
+# is installed) or gzip, whichever the client ranks higher, br on a tie.
+# Bodies under COMPRESSION_MIN_SIZE bytes are sent as they are: the saving
+# would not pay for the CPU, and they go out in one packet anyway. Streaming
+# bodies (exports) are compressed chunk by chunk with one compressor, each
+# chunk flushed so the download keeps flowing; event streams are left
+# alone, a proxy or browser must see each event as soon as it is sent.
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/jsonl', 'application/x-ndjson', 'text/')
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+_coding_re = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$')
+
+
+def available():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding):
+    """The coding to compress with for this Accept-Encoding header, or None."""
+    ranked = {}
+    for item in accept_encoding.split(','):
+        match = _coding_re.match(item)
+        if not match:
+            continue
+        coding, q = match.group(1).lower(), match.group(2)
+        try:
+            ranked[coding] = float(q) if q is not None else 1.0
+        except ValueError:
+            continue
+    best, best_q = None, 0.0
+    for coding in available():
+        q = ranked.get(coding, ranked.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compressible(response):
+    content_type = response.get('Content-Type', '')
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNCOMPRESSED_TYPES)
+
+
+def compress(coding, data):
+    if coding == 'br':
+        return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Compresses a body that arrives in chunks; each chunk's output can be sent at once."""
+
+    def __init__(self, coding):
+        self.coding = coding
+        if coding == 'br':
+            self.compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self.compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        if self.coding == 'br':
+            return self.compressor.process(data) + self.compressor.flush()
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.coding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def compress_stream(coding, chunks):
+    compressor = StreamCompressor(coding)
+    for chunk in chunks:
+        data = compressor.chunk(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(coding, chunks):
+    compressor = StreamCompressor(coding)
+    async for chunk in chunks:
+        data = compressor.chunk(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: the write lock is per process only.
+    fcntl = None
+
+# SQLite tuning and write serialization.
+#
+# With SQLITE_TUNED on, every new SQLite connection gets SQLITE_PRAGMAS
+# (WAL journaling, synchronous=NORMAL, a busy timeout, mmap and a larger
+# page cache), so readers no longer block behind a writer. SQLite still
+# allows a single writer, so SQLiteWriteLockMiddleware additionally queues
+# unsafe requests on a lock file shared by all worker processes: a burst of
+# writes waits its turn instead of failing with "database is locked".
+# Views marked write_lock_exempt (signup and login, which spend most of
+# their time hashing passwords and write one short row) skip that queue and
+# rely on busy_timeout, so logins are not serialized behind each other.
+
+
+def configure_sqlite(connection):
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_TUNED', False):
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+class WriteLock:
+    """
+    An exclusive lock shared by threads (threading.Lock) and by processes
+    (flock on `path`, where fcntl is available and a path is given).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        if not self._thread_lock.acquire(timeout=timeout):
+            return False
+        if fcntl is None or self.path is None:
+            return True
+        if self._file is None:
+            self._file = open(self.path, 'a')
+        while True:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    self._thread_lock.release()
+                    return False
+                time.sleep(0.002)
+
+    def release(self):
+        if fcntl is not None and self.path is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+def write_lock_exempt(view):
+    """Mark a view function or class as not queued by SQLiteWriteLockMiddleware."""
+    view.write_lock_exempt = True
+    return view
+
+
+_write_locks = {}
+_write_locks_lock = threading.Lock()
+
+
+def get_write_lock(connection):
+    # An in-memory database belongs to this process alone.
+    path = None if connection.is_in_memory_db() else f"{connection.settings_dict['NAME']}.write-lock"
+    with _write_locks_lock:
+        if path not in _write_locks:
+            _write_locks[path] = WriteLock(path)
+        return _write_locks[path]
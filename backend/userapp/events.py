@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .sync import describe, encode_token, merge, unfold
+
+# Server push of project/todo changes: GET /api/events/ streams Server-Sent
+# Events to the user's open tabs and devices (async_views.events, ASGI only).
+#
+# Every committed batch of change log rows is published (models.
+# changes_committed, see signals.py) to the broker named by EVENT_BROKER,
+# which hands it to each of the user's subscriptions. A subscription does
+# not queue events: it folds them into the net change per object, as a
+# sync does, so a burst of writes to the same todos costs one entry each.
+# A stream waits EVENT_COALESCE_MS after the first change before it sends,
+# to catch the rest of the burst in the same event.
+#
+# Publishers never wait for consumers. When a slow stream lets more than
+# EVENT_MAX_PENDING objects pile up, its subscription drops them and the
+# stream sends one "resync" event instead; the client catches up through
+# GET /api/sync/ with its last token.
+#
+# Each event's id is the change log position the client has been told
+# about, in sync token form. EventSource sends it back as Last-Event-ID
+# when it reconnects; a stream opened behind the log (that, or ?token=)
+# starts with a resync, so nothing is missed while disconnected.
+#
+# InProcessBroker only reaches the streams of its own process. A
+# deployment with several workers swaps in a broker with the same
+# subscribe/unsubscribe/publish methods over a shared channel (Redis
+# pub/sub, Postgres LISTEN/NOTIFY, ...).
+
+
+class Subscription:
+    """The pending changes of one event stream; lives on the event loop serving it."""
+
+    def __init__(self, max_pending):
+        self.loop = asyncio.get_running_loop()
+        self.max_pending = max_pending
+        self.pending = {}
+        self.overflowed = False
+        self.last_change_id = 0
+        self.ready = asyncio.Event()
+
+    def deliver(self, changes):
+        if not self.overflowed:
+            merge(self.pending, (change[1:] for change in changes))
+            if len(self.pending) > self.max_pending:
+                self.pending.clear()
+                self.overflowed = True
+        self.last_change_id = max(self.last_change_id, changes[-1][0])
+        self.ready.set()
+
+    async def next_event(self, coalesce=0):
+        """
+        Wait for changes, then ('changes', [change, ...]) or ('resync', None),
+        and the id of the last change they include. The changes may fold
+        away to nothing (created and deleted in the same burst).
+        """
+        await self.ready.wait()
+        if coalesce:
+            await asyncio.sleep(coalesce)
+        self.ready.clear()
+        if self.overflowed:
+            event = ('resync', None)
+        else:
+            event = ('changes', [describe(*change) for change in unfold(self.pending)])
+        self.pending, self.overflowed = {}, False
+        return event, self.last_change_id
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id, subscription):
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[user_id]
+
+    def publish(self, user_id, changes):
+        # Called from whichever thread committed the changes. Streams served
+        # by the same event loop share one wake-up of that loop.
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        by_loop = defaultdict(list)
+        for subscription in subscriptions:
+            by_loop[subscription.loop].append(subscription)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver_all, group, changes)
+            except RuntimeError:
+                # The event loop is closed; its streams are gone.
+                for subscription in group:
+                    self.unsubscribe(user_id, subscription)
+
+
+def deliver_all(subscriptions, changes):
+    for subscription in subscriptions:
+        subscription.deliver(changes)
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    path = getattr(settings, 'EVENT_BROKER', 'userapp.events.InProcessBroker')
+    with _brokers_lock:
+        if path not in _brokers:
+            _brokers[path] = import_string(path)()
+        return _brokers[path]
+
+
+def format_event(name, data, change_id=None):
+    lines = [f"event: {name}"]
+    if change_id is not None:
+        lines.append(f"id: {encode_token(change_id)}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def stream(broker, user_id, subscription, stale=False):
+    """
+    The event stream for a subscription that is already registered with
+    the broker, unregistering it when the client goes away. `stale`: the
+    client's token is behind the log, so it starts with a resync.
+    """
+    coalesce = getattr(settings, 'EVENT_COALESCE_MS', 100) / 1000
+    heartbeat = getattr(settings, 'EVENT_HEARTBEAT_SECONDS', 15)
+    try:
+        # Sent at once, so the client (and any proxy) sees the stream open.
+        yield ': connected\n\n'
+        if stale:
+            yield format_event('resync', {})
+        while True:
+            try:
+                (name, changes), change_id = await asyncio.wait_for(subscription.next_event(coalesce), heartbeat)
+            except TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if name == 'resync':
+                yield format_event('resync', {}, change_id)
+            elif changes:
+                yield format_event('changes', {'changes': changes}, change_id)
+    finally:
+        broker.unsubscribe(user_id, subscription)
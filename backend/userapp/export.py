@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+from .models import ArchivedTodo, Todo
+
+# Streaming project exports.
+#
+# Todos are read through a server-side cursor (QuerySet.iterator) in
+# EXPORT_CHUNK_SIZE batches and rendered line by line, so memory use does
+# not depend on the size of the project. Every format lists pending todos
+# before completed ones, matching the Markdown summary the frontend used to
+# build, and then the archived ones (see archive.py), which count as
+# completed in the summary.
+
+TODO_FIELDS = ('custom_id', 'description', 'status', 'created_at', 'updated_at')
+
+
+def _chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def todo_counts(project):
+    return {
+        'total': project.todo_count + project.archived_count,
+        'completed': project.completed_count + project.archived_count,
+        'archived': project.archived_count,
+    }
+
+
+def iter_todos(todos):
+    todos = todos.order_by('created_at', 'id')
+    return todos.values(*TODO_FIELDS).iterator(chunk_size=_chunk_size())
+
+
+def sections(project):
+    yield 'pending', iter_todos(Todo.objects.filter(project=project, status=False))
+    yield 'completed', iter_todos(Todo.objects.filter(project=project, status=True))
+    # The counter spares projects that never had todos archived a query.
+    if project.archived_count:
+        yield 'archived', iter_todos(ArchivedTodo.objects.filter(project=project))
+
+
+def export_markdown(project):
+    counts = todo_counts(project)
+    yield f"# {project.title}\n\n"
+    yield f"**Summary**: {counts['completed']}/{counts['total']} todos completed\n"
+    for section, todos in sections(project):
+        yield f"\n## {section.capitalize()}\n"
+        box = ' ' if section == 'pending' else 'x'
+        for todo in todos:
+            yield f"- [{box}] {todo['description']}\n"
+
+
+def export_jsonl(project):
+    counts = todo_counts(project)
+    yield json.dumps({
+        'type': 'summary',
+        'project': project.custom_id,
+        'title': project.title,
+        'total': counts['total'],
+        'completed': counts['completed'],
+        'pending': counts['total'] - counts['completed'],
+        'archived': counts['archived'],
+    }) + '\n'
+    for section, todos in sections(project):
+        for todo in todos:
+            yield json.dumps({'type': 'todo', 'section': section, **todo}, default=str) + '\n'
+
+
+def export_csv(project):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def row(values):
+        writer.writerow(values)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    yield row(('section',) + TODO_FIELDS)
+    for section, todos in sections(project):
+        for todo in todos:
+            yield row([section] + [todo[field] for field in TODO_FIELDS])
+
+
+EXPORTERS = {
+    'md': (export_markdown, 'text/markdown; charset=utf-8'),
+    'jsonl': (export_jsonl, 'application/jsonl; charset=utf-8'),
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+}
+
+
+def batched(lines, size=200):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_for(request, lines):
+    """
+    Adapt a line generator to the server we run under. WSGI consumes a sync
+    iterator directly; under ASGI Django would buffer a sync iterator in full,
+    so it gets an async one that pulls each batch in the sync thread.
+    """
+    chunks = batched(lines)
+    if not isinstance(request, ASGIRequest):
+        return chunks
+
+    async def achunks():
+        next_chunk = sync_to_async(next, thread_sensitive=True)
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    return achunks()
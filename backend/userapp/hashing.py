@@ -0,0 +1,97 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password as _make_password, verify_password as _verify_password
+
+# Password hashing off the event loop.
+#
+# PBKDF2 (hashlib.pbkdf2_hmac) releases the GIL, so a small thread pool runs
+# hashes in parallel while the loop keeps serving other requests. The pool
+# is capped at PASSWORD_HASHING_CONCURRENCY workers; requests beyond that
+# wait in the pool's queue, and once PASSWORD_HASHING_MAX_QUEUE of them are
+# waiting new ones are refused with HashingQueueFull instead of piling up.
+
+_executor = None
+_executor_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_queued = 0
+_running = 0
+
+
+class HashingQueueFull(Exception):
+    pass
+
+
+def _concurrency():
+    return getattr(settings, 'PASSWORD_HASHING_CONCURRENCY', None) or min(4, os.cpu_count() or 1)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=_concurrency(), thread_name_prefix='password-hashing')
+    return _executor
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def queue_depth():
+    """Hashes waiting for a worker plus hashes in progress."""
+    with _stats_lock:
+        return _queued + _running
+
+
+def stats():
+    with _stats_lock:
+        return {'queued': _queued, 'running': _running, 'concurrency': _concurrency()}
+
+
+async def run(func, *args):
+    global _queued
+    with _stats_lock:
+        if _queued >= getattr(settings, 'PASSWORD_HASHING_MAX_QUEUE', 100):
+            raise HashingQueueFull()
+        _queued += 1
+
+    def task():
+        global _queued, _running
+        with _stats_lock:
+            _queued -= 1
+            _running += 1
+        try:
+            return func(*args)
+        finally:
+            with _stats_lock:
+                _running -= 1
+
+    def on_done(future):
+        # A task cancelled before it started never ran task(), so it is
+        # still counted as queued.
+        global _queued
+        if future.cancelled():
+            with _stats_lock:
+                _queued -= 1
+
+    future = get_executor().submit(task)
+    future.add_done_callback(on_done)
+    return await asyncio.wrap_future(future)
+
+
+async def make_password(raw_password):
+    return await run(_make_password, raw_password)
+
+
+async def verify_password(raw_password, encoded):
+    """Return (is_correct, must_update), like django.contrib.auth.hashers.verify_password."""
+    return await run(_verify_password, raw_password, encoded)
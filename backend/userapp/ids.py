@@ -0,0 +1,95 @@
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+# custom_id allocation.
+#
+# Every prefix ("PROJ", "TODO") has one row in IdSequence holding the last
+# number handed out. Reserving numbers is a single atomic increment of that
+# row, so there is no table scan and two workers can never get the same
+# number. With CUSTOM_ID_BLOCK_SIZE > 1 each process reserves a block at a
+# time and serves the rest of it from memory.
+
+_lock = threading.Lock()
+_blocks = {}
+
+
+def format_custom_id(prefix, number):
+    return f"{prefix}-{number:04d}"
+
+
+def _block_size():
+    return max(1, getattr(settings, 'CUSTOM_ID_BLOCK_SIZE', 1))
+
+
+def _supports_update_returning():
+    if connection.vendor == 'postgresql':
+        return True
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 35, 0)
+
+
+def reserve(prefix, count):
+    """Atomically reserve `count` consecutive numbers for `prefix` and return them as a range."""
+    from .models import IdSequence
+
+    table = connection.ops.quote_name(IdSequence._meta.db_table)
+    if _supports_update_returning():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET last_value = last_value + %s WHERE prefix = %s RETURNING last_value",
+                [count, prefix],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            return range(row[0] - count + 1, row[0] + 1)
+    else:
+        with transaction.atomic():
+            if IdSequence.objects.filter(prefix=prefix).update(last_value=F('last_value') + count):
+                last = IdSequence.objects.filter(prefix=prefix).values_list('last_value', flat=True).get()
+                return range(last - count + 1, last + 1)
+
+    # First allocation for this prefix: create the row and try again. A plain
+    # INSERT ... ON CONFLICT DO NOTHING, so racing workers never read-then-write.
+    IdSequence.objects.bulk_create([IdSequence(prefix=prefix)], ignore_conflicts=True)
+    return reserve(prefix, count)
+
+
+def allocate(prefix, count=1):
+    """Return `count` unused numbers for `prefix`, served from the process-local block when possible."""
+    numbers = []
+    with _lock:
+        cached = _blocks.get(prefix)
+        while cached and len(numbers) < count:
+            numbers.append(cached.pop(0))
+
+    missing = count - len(numbers)
+    if not missing:
+        return numbers
+
+    spare = _block_size() - 1
+    block = list(reserve(prefix, missing + spare))
+    numbers.extend(block[:missing])
+    rest = block[missing:]
+    if rest:
+        # Only keep the spare numbers once the reservation is durable; if the
+        # surrounding transaction rolls back the counter does too.
+        def keep():
+            with _lock:
+                _blocks.setdefault(prefix, []).extend(rest)
+        transaction.on_commit(keep)
+    return numbers
+
+
+def next_custom_id(prefix):
+    return format_custom_id(prefix, allocate(prefix)[0])
+
+
+def allocate_custom_ids(prefix, count):
+    return [format_custom_id(prefix, number) for number in allocate(prefix, count)]
+
+
+def clear_cache():
+    with _lock:
+        _blocks.clear()
@@ -0,0 +1,157 @@
+import codecs
+import csv
+import json
+import re
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .cache import bump_version, todos_scope
+from .ids import allocate_custom_ids
+from .models import Change, Project, Todo, hash_description, violates_constraint
+
+# Streaming todo import.
+#
+# Input is read line by line in any of the formats export.py writes (JSON
+# Lines, CSV, Markdown checklist), so memory use depends on the batch size,
+# not the file. Descriptions already in the project, or repeated in the
+# input, are skipped using an in-memory set of description hashes; new
+# todos are inserted IMPORT_BATCH_SIZE at a time, one transaction per batch,
+# with their custom_ids reserved in a single allocation.
+
+_checklist_re = re.compile(r'^\s*[-*+]\s+\[([ xX])\]\s+(.*?)\s*$')
+_true_values = {'1', 'true', 'yes', 'y', 'x', 'done', 'completed'}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _true_values
+
+
+def parse_jsonl(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            raise ImportFormatError(f"Line {number} is not valid JSON.")
+        if not isinstance(item, dict) or item.get('type', 'todo') != 'todo':
+            continue
+        yield item.get('description'), _as_bool(item.get('status', False))
+
+
+def parse_csv(lines):
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or 'description' not in reader.fieldnames:
+        raise ImportFormatError("CSV input needs a header row with a 'description' column.")
+    for row in reader:
+        if row.get('status') not in (None, ''):
+            completed = _as_bool(row['status'])
+        else:
+            completed = row.get('section') in ('completed', 'archived')
+        yield row['description'], completed
+
+
+def parse_markdown(lines):
+    for line in lines:
+        match = _checklist_re.match(line)
+        if match:
+            yield match.group(2), match.group(1) != ' '
+
+
+PARSERS = {
+    'jsonl': parse_jsonl,
+    'csv': parse_csv,
+    'md': parse_markdown,
+}
+
+
+def guess_type(filename, default='jsonl'):
+    suffix = filename.rsplit('.', 1)[-1].lower() if filename and '.' in filename else ''
+    return {'markdown': 'md', 'json': 'jsonl', 'ndjson': 'jsonl'}.get(suffix, suffix) if suffix else default
+
+
+def decode_lines(chunks):
+    """Decode an iterable of byte lines (an upload, a request body, a binary file) as UTF-8."""
+    return codecs.iterdecode(chunks, 'utf-8-sig')
+
+
+class TodoImporter:
+    def __init__(self, project, batch_size=None):
+        self.project = project
+        self.batch_size = batch_size or getattr(settings, 'IMPORT_BATCH_SIZE', 2000)
+        self.created = self.skipped = self.invalid = 0
+        self.seen = set(
+            Todo.objects.filter(project=project).values_list('description_hash', flat=True).iterator()
+        )
+
+    def run(self, rows):
+        started = time.perf_counter()
+        batch = []
+        for description, completed in rows:
+            if not isinstance(description, str) or not description.strip():
+                self.invalid += 1
+                continue
+            description_hash = hash_description(description)
+            if description_hash in self.seen:
+                self.skipped += 1
+                continue
+            self.seen.add(description_hash)
+            batch.append(Todo(project=self.project, description=description, status=completed))
+            if len(batch) == self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+        return self.result(time.perf_counter() - started)
+
+    def flush(self, todos):
+        try:
+            self.insert(todos)
+        except IntegrityError as error:
+            if not violates_constraint(error, Todo, 'todo_unique_description_per_project'):
+                raise
+            # A todo created concurrently took one of these descriptions:
+            # drop whatever is now in the table and try the batch once more.
+            hashes = [hash_description(todo.description) for todo in todos]
+            taken = set(Todo.objects.filter(project=self.project, description_hash__in=hashes)
+                        .values_list('description_hash', flat=True))
+            remaining = [todo for todo, h in zip(todos, hashes) if h not in taken]
+            self.skipped += len(todos) - len(remaining)
+            if remaining:
+                self.insert(remaining)
+
+    def insert(self, todos):
+        with transaction.atomic():
+            for todo, custom_id in zip(todos, allocate_custom_ids('TODO', len(todos))):
+                todo.custom_id = custom_id
+            Todo.objects.bulk_create(todos)
+            # bulk_create skips Todo.save(), so counters, the change log and
+            # the list cache version are maintained here.
+            Project.adjust_counters(self.project.id, len(todos), sum(todo.status for todo in todos))
+            Change.record(self.project.user_id, Change.TODO, self.project.id, create=[todo.id for todo in todos])
+            bump_version(todos_scope(self.project.id))
+        self.created += len(todos)
+
+    def result(self, seconds):
+        rows = self.created + self.skipped + self.invalid
+        return {
+            'created': self.created,
+            'skipped': self.skipped,
+            'invalid': self.invalid,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds, 1) if seconds else None,
+        }
+
+
+def check_type(file_type):
+    if file_type not in PARSERS:
+        raise ImportFormatError(f"Unsupported import type. Use one of: {', '.join(PARSERS)}")
+    return PARSERS[file_type]
@@ -0,0 +1,141 @@
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Per-request timing.
+#
+# RequestInstrumentationMiddleware (middleware.py) opens a RequestMetrics
+# for each request in a context variable, so it follows the request into
+# sync_to_async threads. Every database connection records its queries into
+# it (record_query, installed by the connection_created receiver), and the
+# DRF hooks add the time spent in named phases: authentication and
+# ownership checks (mixins.InstrumentedViewMixin), serializers
+# (serializers.TimedSerializerMixin), rendering (renderers.py) and response
+# compression (middleware.CompressionMiddleware). Phases include the
+# queries they run, so they overlap with "db".
+#
+# The totals go out as a Server-Timing header and one JSON log line on the
+# "userapp.requests" logger; requests slower than SLOW_REQUEST_MS are logged
+# as warnings together with the text and timing of their first
+# SLOW_SQL_LIMIT statements. Query parameters are never kept: they carry
+# password hashes, tokens and user data. Beyond that limit only the count
+# and the total time grow, so a long request (an import) uses constant
+# memory. Queries run while a streaming body is consumed happen after the
+# middleware returns and are not counted.
+
+logger = logging.getLogger('userapp.requests')
+
+PHASES = ('auth', 'permissions', 'serializer', 'render', 'compress')
+SLOW_SQL_LIMIT = 50
+
+_current = contextvars.ContextVar('userapp_request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0
+        self.statements = []
+        self.phases = {}
+        self.active = set()
+
+    def add_query(self, sql, seconds):
+        self.query_count += 1
+        self.db_seconds += seconds
+        if len(self.statements) < SLOW_SQL_LIMIT:
+            self.statements.append((sql, seconds))
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    return _current.get()
+
+
+def start():
+    """Begin collecting metrics for the current request; returns (metrics, token for stop())."""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to `phase`; nested blocks of the same phase count once."""
+    metrics = _current.get()
+    if metrics is None or phase in metrics.active:
+        yield
+        return
+    metrics.active.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.active.discard(phase)
+        metrics.phases[phase] = metrics.phases.get(phase, 0) + time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def install(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def server_timing(metrics, total):
+    entries = [f'db;dur={_ms(metrics.db_seconds)};desc="{metrics.query_count} queries"']
+    entries += [f'{phase};dur={_ms(metrics.phases[phase])}' for phase in PHASES if phase in metrics.phases]
+    entries.append(f'total;dur={_ms(total)}')
+    return ', '.join(entries)
+
+
+def log_record(request, response, metrics, total):
+    match = getattr(request, 'resolver_match', None)
+    user = getattr(request, 'user', None)
+    record = {
+        'method': request.method,
+        'path': request.path,
+        'route': match.route if match else None,
+        'status': response.status_code,
+        'user_id': user.id if user is not None and user.is_authenticated else None,
+        'duration_ms': _ms(total),
+        'queries': metrics.query_count,
+        'db_ms': _ms(metrics.db_seconds),
+    }
+    record.update((f'{phase}_ms', _ms(metrics.phases[phase])) for phase in PHASES if phase in metrics.phases)
+    return record
+
+
+def finish(request, response, metrics):
+    """Attach the Server-Timing header and log the request; returns the response."""
+    total = metrics.elapsed()
+    response['Server-Timing'] = server_timing(metrics, total)
+    record = log_record(request, response, metrics, total)
+    if total * 1000 >= getattr(settings, 'SLOW_REQUEST_MS', 500):
+        record['sql'] = [{'sql': sql, 'ms': _ms(seconds)} for sql, seconds in metrics.statements]
+        logger.warning(json.dumps({'event': 'slow_request', **record}, default=str))
+    else:
+        logger.info(json.dumps({'event': 'request', **record}, default=str))
+    return response
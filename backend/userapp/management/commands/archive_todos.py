@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from userapp.archive import archivable, archive
+
+
+class Command(BaseCommand):
+    help = "Move todos completed more than ARCHIVE_AFTER_DAYS days ago into the archive table, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Archive todos completed this many days ago (default: ARCHIVE_AFTER_DAYS).")
+        parser.add_argument('--batch-size', type=int, default=None, help="Todos moved per transaction (default: ARCHIVE_BATCH_SIZE).")
+        parser.add_argument('--pause', type=float, default=0, help="Seconds to sleep between batches, to leave room for other writers.")
+
+    def handle(self, *args, days, batch_size, pause, **options):
+        archived = 0
+        for moved in archive(archivable(days), batch_size):
+            archived += moved
+            self.stdout.write(f"Archived {archived} todos...")
+            if pause:
+                time.sleep(pause)
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} todos."))
@@ -0,0 +1,57 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from userapp.importer import PARSERS, ImportFormatError, TodoImporter, check_type, decode_lines, guess_type
+from userapp.models import Project
+
+
+class Command(BaseCommand):
+    help = "Stream todos from a JSON Lines, CSV or Markdown checklist file into a project."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or - for stdin.")
+        parser.add_argument('--project', help="Id or custom_id of an existing project.")
+        parser.add_argument('--user', help="Username owning the project named by --title.")
+        parser.add_argument('--title', help="Project title; created for --user if it does not exist.")
+        parser.add_argument('--type', choices=list(PARSERS), help="Input format (default: from the file extension).")
+        parser.add_argument('--batch-size', type=int, help="Todos inserted per transaction (default: IMPORT_BATCH_SIZE).")
+
+    def get_project(self, project, user, title):
+        if project:
+            lookup = Q(custom_id=project) | Q(pk=project) if project.isdigit() else Q(custom_id=project)
+            found = Project.objects.filter(lookup).first()
+            if found is None:
+                raise CommandError(f"Project {project} does not exist.")
+            return found
+        if not (user and title):
+            raise CommandError("Give --project, or --user and --title.")
+        try:
+            owner = User.objects.get(username=user)
+        except User.DoesNotExist:
+            raise CommandError(f"User {user} does not exist.")
+        found, created = Project.objects.get_or_create(user=owner, title=title)
+        if created:
+            self.stdout.write(f"Created project {found.custom_id} \"{title}\".")
+        return found
+
+    def handle(self, *args, path, project, user, title, type, batch_size, **options):
+        project = self.get_project(project, user, title)
+        import_type = type or guess_type(None if path == '-' else path)
+        importer = TodoImporter(project, batch_size)
+        try:
+            parse = check_type(import_type)
+            with (sys.stdin.buffer if path == '-' else open(path, 'rb')) as source:
+                result = importer.run(parse(decode_lines(source)))
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            raise CommandError(f"{exc} ({importer.created} todos were imported before the error.)")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} todos into {project.custom_id} "
+            f"({result['skipped']} duplicates skipped, {result['invalid']} invalid rows) "
+            f"in {result['seconds']}s, {result['rows_per_second']} rows/s."
+        ))
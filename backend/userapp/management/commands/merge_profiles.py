@@ -0,0 +1,43 @@
+import pstats
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = "Merge the per-route request profiles written by ProfilingMiddleware and rank functions by time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help="Directory holding the .prof files (default: PROFILE_DIR).")
+        parser.add_argument('--route', help="Only merge routes whose file name contains this text, e.g. GET_api_projects.")
+        parser.add_argument('--sort', choices=SORT_KEYS, default='cumulative', help="Ranking of the functions.")
+        parser.add_argument('--limit', type=int, default=30, help="Functions to list.")
+        parser.add_argument('--output', help="Also write the merged stats to this file (for snakeviz, pstats, ...).")
+
+    def handle(self, *args, dir, route, sort, limit, output, **options):
+        directory = Path(dir or settings.PROFILE_DIR)
+        routes = defaultdict(list)
+        for path in sorted(directory.glob('*.prof')):
+            slug = path.name.split('.', 1)[0]
+            if not route or route in slug:
+                routes[slug].append(str(path))
+        if not routes:
+            raise CommandError(f"No profiles{' matching ' + route if route else ''} in {directory}.")
+
+        totals = sorted(
+            ((pstats.Stats(*files).total_tt, slug, len(files)) for slug, files in routes.items()), reverse=True,
+        )
+        self.stdout.write("Routes by total profiled time:")
+        for total, slug, count in totals:
+            self.stdout.write(f"  {total:10.3f}s  {slug} ({count} process{'es' if count != 1 else ''})")
+        self.stdout.write("")
+
+        merged = pstats.Stats(*(path for files in routes.values() for path in files), stream=self.stdout)
+        merged.strip_dirs().sort_stats(sort).print_stats(limit)
+        if output:
+            merged.dump_stats(output)
+            self.stdout.write(self.style.SUCCESS(f"Wrote the merged stats to {output}."))
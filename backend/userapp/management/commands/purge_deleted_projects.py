@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from userapp.models import ProjectPurge
+from userapp.purge import purge
+
+
+class Command(BaseCommand):
+    help = "Finish the purges of deleted projects that were interrupted (e.g. by a restart), in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None, help="Todos deleted per transaction (default: PURGE_CHUNK_SIZE).")
+
+    def handle(self, *args, chunk_size, **options):
+        jobs = list(ProjectPurge.objects.exclude(status=ProjectPurge.DONE).order_by('created_at').values_list('pk', flat=True))
+        finished = 0
+        for project_id in jobs:
+            purged = purge(project_id, chunk_size)
+            if purged is None:
+                self.stdout.write(f"Project {project_id}: being purged elsewhere, skipped.")
+                continue
+            finished += 1
+            self.stdout.write(f"Project {project_id}: purged {purged} todos.")
+        self.stdout.write(self.style.SUCCESS(f"Finished {finished} purges."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from userapp.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over todo descriptions, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Todos indexed per transaction.")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database to rebuild the index in.")
+
+    def handle(self, *args, batch_size, database, **options):
+        connection = connections[database]
+        if not fts_available(connection):
+            raise CommandError("The todo search index does not exist in this database (SQLite with FTS5 only).")
+
+        indexed = rebuild_index(
+            connection, batch_size, progress=lambda n: self.stdout.write(f"Indexed {n} todos...")
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the search index, {indexed} todos indexed."))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from userapp.models import ArchivedTodo, Project, Todo
+
+
+class Command(BaseCommand):
+    help = "Recompute Project.todo_count/completed_count/archived_count from the todo rows and fix any that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Projects checked per batch.")
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted projects without fixing them.")
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            projects = list(
+                Project.objects.filter(pk__gt=last_id).order_by('pk').only('pk', *Project.COUNTER_FIELDS)[:batch_size]
+            )
+            if not projects:
+                break
+            last_id = projects[-1].pk
+
+            with transaction.atomic():
+                project_ids = [p.pk for p in projects]
+                counts = {
+                    row['project_id']: row
+                    for row in Todo.objects.filter(project_id__in=project_ids)
+                    .values('project_id')
+                    .annotate(total=Count('id'), completed=Count('id', filter=Q(status=True)))
+                }
+                archived = dict(
+                    ArchivedTodo.objects.filter(project_id__in=project_ids)
+                    .values('project_id').annotate(total=Count('id')).values_list('project_id', 'total')
+                )
+                drifted = []
+                for project in projects:
+                    row = counts.get(project.pk, {'total': 0, 'completed': 0})
+                    expected = (row['total'], row['completed'], archived.get(project.pk, 0))
+                    current = tuple(getattr(project, name) for name in Project.COUNTER_FIELDS)
+                    if current != expected:
+                        self.stdout.write(
+                            f"Project {project.pk}: {project.completed_count}/{project.todo_count} "
+                            f"(+{project.archived_count} archived) -> {row['completed']}/{row['total']} "
+                            f"(+{expected[2]} archived)"
+                        )
+                        project.todo_count, project.completed_count, project.archived_count = expected
+                        drifted.append(project)
+                if drifted and not dry_run:
+                    Project.objects.bulk_update(drifted, Project.COUNTER_FIELDS)
+
+            checked += len(projects)
+            repaired += len(drifted)
+
+        verb = "would be repaired" if dry_run else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} projects, {repaired} {verb}."))
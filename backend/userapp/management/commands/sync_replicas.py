@@ -0,0 +1,37 @@
+import os
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from userapp.routers import replicas
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database onto each read replica file (SQLite online backup)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=1024, help="Pages copied per backup step.")
+
+    def handle(self, *args, pages, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError("sync_replicas only copies SQLite databases.")
+        aliases = replicas()
+        if not aliases:
+            self.stdout.write("No read replicas configured (DJANGO_READ_REPLICAS).")
+            return
+
+        primary.ensure_connection()
+        for alias in aliases:
+            connections[alias].close()
+            name = connections[alias].settings_dict['NAME']
+            target = sqlite3.connect(name)
+            try:
+                primary.connection.backup(target, pages=pages)
+            finally:
+                target.close()
+            # The file's age is the replica's lag (see userapp/routers.py).
+            os.utime(name)
+            self.stdout.write(f"Copied {primary.settings_dict['NAME']} to {alias}.")
+        self.stdout.write(self.style.SUCCESS(f"Synced {len(aliases)} replicas."))
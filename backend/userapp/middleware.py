@@ -0,0 +1,206 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+
+from . import compression, instrumentation, profiling
+from .db import get_write_lock
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _busy_response():
+    response = JsonResponse({'error': 'The server is busy, please retry shortly.'}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
+class SQLiteWriteLockMiddleware:
+    """
+    Serializes unsafe requests on the SQLite database across threads and
+    worker processes (see db.py), except those routed to a write_lock_exempt
+    view. A request that cannot take the lock within
+    SQLITE_WRITE_LOCK_TIMEOUT seconds, or that still hits "database is
+    locked", gets a 503 with Retry-After instead of a 500.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def applies(self, request):
+        return (
+            getattr(settings, 'SQLITE_SERIALIZE_WRITES', False)
+            and request.method not in SAFE_METHODS
+            and connections[DEFAULT_DB_ALIAS].vendor == 'sqlite'
+            and not self.exempt(request)
+        )
+
+    def exempt(self, request):
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return False
+        view = getattr(match.func, 'view_class', match.func)
+        return getattr(view, 'write_lock_exempt', False)
+
+    def timeout(self):
+        return getattr(settings, 'SQLITE_WRITE_LOCK_TIMEOUT', 30)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.applies(request):
+            return self.get_response(request)
+        lock = get_write_lock(connections[DEFAULT_DB_ALIAS])
+        if not lock.acquire(self.timeout()):
+            return _busy_response()
+        try:
+            return self.get_response(request)
+        finally:
+            lock.release()
+
+    async def __acall__(self, request):
+        if not self.applies(request):
+            return await self.get_response(request)
+        # Wait in a worker thread so the event loop (and the thread that runs
+        # sync ORM calls for the current lock holder) stays free.
+        lock = get_write_lock(connections[DEFAULT_DB_ALIAS])
+        if not await sync_to_async(lock.acquire, thread_sensitive=False)(self.timeout()):
+            return _busy_response()
+        try:
+            return await self.get_response(request)
+        finally:
+            lock.release()
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, OperationalError) and 'locked' in str(exception):
+            return _busy_response()
+        return None
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Collects query count, database time and the DRF phase timings for each
+    request (see instrumentation.py) and reports them in a Server-Timing
+    header and a structured log line. Listed first so the total covers the
+    other middleware too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            return self.get_response(request)
+        metrics, token = instrumentation.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        return instrumentation.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            return await self.get_response(request)
+        metrics, token = instrumentation.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        return instrumentation.finish(request, response, metrics)
+
+
+class ProfilingMiddleware:
+    """
+    Runs sampled requests to the userapp views, and requests carrying an
+    authorized X-Profile header, under cProfile (see profiling.py). Async
+    requests pass through unprofiled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with profiling.profile(profiling.candidate(request)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of COMPRESSION_MIN_SIZE bytes or more, and streamed
+    ones, with the coding negotiated from Accept-Encoding (see
+    compression.py). Whole bodies are only replaced when compression makes
+    them smaller; the time it takes is the "compress" phase of the
+    request's timings.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (
+            not getattr(settings, 'COMPRESSION', False)
+            or response.has_header('Content-Encoding')
+            or not compression.compressible(response)
+            or (not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = compression.negotiate(request.headers.get('Accept-Encoding', ''))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(coding, response.streaming_content)
+            else:
+                response.streaming_content = compression.compress_stream(coding, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            with instrumentation.timed('compress'):
+                compressed = compression.compress(coding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The representation changed, so a strong validator must become weak.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:03
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed_sequences(apps, schema_editor):
+    # Start each counter past every number already handed out so the new
+    # allocator never reissues an existing custom_id.
+    IdSequence = apps.get_model("userapp", "IdSequence")
+    for prefix, model_name in (("PROJ", "Project"), ("TODO", "Todo")):
+        model = apps.get_model("userapp", model_name)
+        last_value = model.objects.aggregate(last=Max("id"))["last"] or 0
+        for custom_id in model.objects.values_list("custom_id", flat=True).iterator():
+            number = custom_id.rpartition("-")[2]
+            if number.isdigit():
+                last_value = max(last_value, int(number))
+        IdSequence.objects.update_or_create(
+            prefix=prefix, defaults={"last_value": last_value}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapp", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdSequence",
+            fields=[
+                (
+                    "prefix",
+                    models.CharField(max_length=10, primary_key=True, serialize=False),
+                ),
+                ("last_value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="project",
+            name="custom_id",
+            field=models.CharField(blank=True, max_length=20, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="todo",
+            name="custom_id",
+            field=models.CharField(blank=True, max_length=20, unique=True),
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
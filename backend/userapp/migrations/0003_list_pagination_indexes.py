@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapp", "0002_id_sequence"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="project_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                fields=["project", "created_at", "id"], name="todo_project_created_idx"
+            ),
+        ),
+    ]
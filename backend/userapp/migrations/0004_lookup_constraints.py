@@ -0,0 +1,53 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:15
+
+import hashlib
+
+import userapp.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_description_hashes(apps, schema_editor):
+    Todo = apps.get_model("userapp", "Todo")
+    batch = []
+    for todo in Todo.objects.only("id", "description").iterator(chunk_size=2000):
+        todo.description_hash = hashlib.sha256(todo.description.encode()).hexdigest()
+        batch.append(todo)
+        if len(batch) == 2000:
+            Todo.objects.bulk_update(batch, ["description_hash"])
+            batch = []
+    if batch:
+        Todo.objects.bulk_update(batch, ["description_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapp", "0003_list_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="todo",
+            name="description_hash",
+            field=userapp.models.TextHashField(
+                default="", editable=False, source="description"
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_description_hashes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="project",
+            constraint=models.UniqueConstraint(
+                fields=("user", "title"), name="project_unique_title_per_user"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="todo",
+            constraint=models.UniqueConstraint(
+                fields=("project", "description_hash"),
+                name="todo_unique_description_per_project",
+            ),
+        ),
+    ]
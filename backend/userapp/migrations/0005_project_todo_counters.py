@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:27
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counters(apps, schema_editor):
+    Project = apps.get_model("userapp", "Project")
+    Todo = apps.get_model("userapp", "Todo")
+    counts = Todo.objects.values("project_id").annotate(
+        total=Count("id"), completed=Count("id", filter=Q(status=True))
+    )
+    for row in counts.iterator():
+        Project.objects.filter(pk=row["project_id"]).update(
+            todo_count=row["total"], completed_count=row["completed"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapp", "0004_lookup_constraints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="completed_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="todo_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:05
+
+from django.db import migrations
+
+# FTS5 index over Todo.description, SQLite only. It is an external-content
+# table: the text lives in userapp_todo and triggers keep the index in step
+# with every insert, delete and description update, including bulk_create,
+# bulk_update and cascade deletes, which signals would not see.
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE userapp_todo_fts USING fts5(
+        description,
+        content='userapp_todo',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER userapp_todo_fts_insert AFTER INSERT ON userapp_todo BEGIN
+        INSERT INTO userapp_todo_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER userapp_todo_fts_delete AFTER DELETE ON userapp_todo BEGIN
+        INSERT INTO userapp_todo_fts(userapp_todo_fts, rowid, description) VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER userapp_todo_fts_update AFTER UPDATE OF description ON userapp_todo BEGIN
+        INSERT INTO userapp_todo_fts(userapp_todo_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO userapp_todo_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    "INSERT INTO userapp_todo_fts(userapp_todo_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS userapp_todo_fts_insert",
+    "DROP TRIGGER IF EXISTS userapp_todo_fts_delete",
+    "DROP TRIGGER IF EXISTS userapp_todo_fts_update",
+    "DROP TABLE IF EXISTS userapp_todo_fts",
+]
+
+
+def fts5_available(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_index(apps, schema_editor):
+    if fts5_available(schema_editor):
+        for sql in CREATE_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapp", "0005_project_todo_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Seed the change log with a create for every existing project and todo, so
+# a first sync without a token downloads everything. Projects go first: a
+# client replaying the log sees a project before the todos in it.
+
+
+def backfill(apps, schema_editor):
+    Change = apps.get_model("userapp", "Change")
+    Project = apps.get_model("userapp", "Project")
+    Todo = apps.get_model("userapp", "Todo")
+    changes, projects, todos = Change._meta.db_table, Project._meta.db_table, Todo._meta.db_table
+    columns = "user_id, kind, action, object_id, project_id, created_at"
+    schema_editor.execute(
+        f"INSERT INTO {changes} ({columns}) "
+        f"SELECT user_id, 'project', 'create', id, id, created_at FROM {projects} ORDER BY id"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {changes} ({columns}) "
+        f"SELECT p.user_id, 'todo', 'create', t.id, t.project_id, t.created_at "
+        f"FROM {todos} t JOIN {projects} p ON p.id = t.project_id ORDER BY t.id"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapp", "0006_todo_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("project", "Project"), ("todo", "Todo")], max_length=7
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("create", "Create"),
+                            ("update", "Update"),
+                            ("delete", "Delete"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                ("object_id", models.IntegerField()),
+                ("project_id", models.IntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["user", "id"], name="change_user_id_idx")
+                ],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
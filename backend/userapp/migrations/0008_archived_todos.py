@@ -0,0 +1,49 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapp", "0007_change_log"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="archived_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name="ArchivedTodo",
+            fields=[
+                ("id", models.IntegerField(primary_key=True, serialize=False)),
+                ("description", models.TextField()),
+                ("status", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField()),
+                ("custom_id", models.CharField(max_length=20)),
+                ("description_hash", models.CharField(max_length=64)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_todos",
+                        to="userapp.project",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["project", "created_at", "id"],
+                        name="archived_project_created_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.1.3 on 2026-10-18 21:40
+
+from django.db import migrations
+
+# The search index triggers only index todos up to
+# userapp_todo_fts_state.indexed_up_to. It is the largest id normally; while
+# `manage.py rebuild_todo_search` runs it is the last id the rebuild has
+# reached, so todos written meanwhile are indexed once: by the triggers if
+# the rebuild has passed them, else by the rebuild's batch.
+
+INDEXED_UP_TO_ALL = 2 ** 63 - 1
+
+WATERMARK = "(SELECT indexed_up_to FROM userapp_todo_fts_state)"
+
+
+def triggers(insert_when="", delete_when="", update_when=""):
+    return [
+        f"""
+        CREATE TRIGGER userapp_todo_fts_insert AFTER INSERT ON userapp_todo {insert_when} BEGIN
+            INSERT INTO userapp_todo_fts(rowid, description) VALUES (new.id, new.description);
+        END
+        """,
+        f"""
+        CREATE TRIGGER userapp_todo_fts_delete AFTER DELETE ON userapp_todo {delete_when} BEGIN
+            INSERT INTO userapp_todo_fts(userapp_todo_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        END
+        """,
+        f"""
+        CREATE TRIGGER userapp_todo_fts_update AFTER UPDATE OF description ON userapp_todo {update_when} BEGIN
+            INSERT INTO userapp_todo_fts(userapp_todo_fts, rowid, description) VALUES ('delete', old.id, old.description);
+            INSERT INTO userapp_todo_fts(rowid, description) VALUES (new.id, new.description);
+        END
+        """,
+    ]
+
+
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS userapp_todo_fts_insert",
+    "DROP TRIGGER IF EXISTS userapp_todo_fts_delete",
+    "DROP TRIGGER IF EXISTS userapp_todo_fts_update",
+]
+
+FORWARD_SQL = [
+    "CREATE TABLE userapp_todo_fts_state (indexed_up_to integer NOT NULL)",
+    f"INSERT INTO userapp_todo_fts_state (indexed_up_to) VALUES ({INDEXED_UP_TO_ALL})",
+    *DROP_TRIGGERS,
+    *triggers(
+        insert_when=f"WHEN new.id <= {WATERMARK}",
+        delete_when=f"WHEN old.id <= {WATERMARK}",
+        update_when=f"WHEN new.id <= {WATERMARK}",
+    ),
+]
+
+BACKWARD_SQL = [
+    *DROP_TRIGGERS,
+    *triggers(),
+    "DROP TABLE IF EXISTS userapp_todo_fts_state",
+]
+
+
+def index_exists(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'userapp_todo_fts'")
+        return cursor.fetchone() is not None
+
+
+def add_watermark(apps, schema_editor):
+    if index_exists(schema_editor):
+        for sql in FORWARD_SQL:
+            schema_editor.execute(sql)
+
+
+def remove_watermark(apps, schema_editor):
+    if index_exists(schema_editor):
+        for sql in BACKWARD_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapp", "0009_project_purge"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_watermark, remove_watermark),
+    ]
@@ -0,0 +1,364 @@
+from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import serializers, status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from . import cache, routers
+from .instrumentation import timed
+from .models import Project, Todo
+
+
+class InstrumentedViewMixin:
+    """
+    Times authentication and the permission checks of a DRF view for the
+    request's Server-Timing header and log line (see instrumentation.py).
+    """
+
+    def perform_authentication(self, request):
+        with timed('auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with timed('permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed('permissions'):
+            super().check_object_permissions(request, obj)
+
+
+class ProjectScopedMixin:
+    """
+    For views nested under projects/<project_id>/: loads the project once per
+    request, restricted to request.user, and shares it with the serializer
+    through the 'project' context key.
+    """
+    project_permission_message = "You are not authorized to access todos for this project."
+
+    def get_project(self):
+        if getattr(self, '_project', None) is None:
+            with timed('permissions'):
+                self.set_project(self.get_project_queryset().first())
+        return self._project
+
+    async def aget_project(self):
+        if getattr(self, '_project', None) is None:
+            with timed('permissions'):
+                self.set_project(await self.get_project_queryset().afirst())
+        return self._project
+
+    def get_project_queryset(self):
+        return Project.objects.filter(id=self.kwargs['project_id'], user=self.request.user)
+
+    def set_project(self, project):
+        if project is None:
+            raise PermissionDenied(self.project_permission_message)
+        self._project = project
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['project'] = self.get_project()
+        return context
+
+
+class CachedListMixin:
+    """
+    Serves list() from the versioned response cache (see cache.py). The
+    ETag is derived from the scope's version alone, so a matching
+    If-None-Match is answered with 304 before any queryset is built.
+
+    Cached entries are keyed by the requesting user as well, and are only
+    stored after a successful, authorized list, so a hit never skips an
+    ownership check that has not already passed for this user.
+    """
+    cached_response_headers = ('Link',)
+
+    def get_cache_scope(self):
+        raise NotImplementedError
+
+    # Versions of other scopes the list being built depends on; set while
+    # building it (see EmbeddedTodosMixin) and stored with the cache entry.
+    list_dependencies = {}
+
+    def list(self, request, *args, **kwargs):
+        scope = self.get_cache_scope()
+        etag = self.get_list_etag(request, scope, cache.get_version(scope))
+        if self.is_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = cache.response_key(etag)
+            cached = cache.get_cache().get(key)
+            if cached is not None and cache.versions_current(cached[2]):
+                etag = cache.dependent_etag(etag, cached[2])
+                response = self.cached_or_not_modified(request, cached, etag)
+            else:
+                self.list_dependencies = {}
+                response = super().list(request, *args, **kwargs)
+                if routers.reading_from_replica():
+                    return self.finalize_list_response(response, None)
+                cache.get_cache().set(key, self.cache_entry(response), self.get_cache_timeout())
+                etag = cache.dependent_etag(etag, self.list_dependencies)
+        return self.finalize_list_response(response, etag)
+
+    async def alist(self, request, *args, **kwargs):
+        # list() for the async views; apaginate_list() is their uncached list.
+        scope = self.get_cache_scope()
+        etag = self.get_list_etag(request, scope, await cache.aget_version(scope))
+        if self.is_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = cache.response_key(etag)
+            cached = await cache.get_cache().aget(key)
+            if cached is not None and await cache.aversions_current(cached[2]):
+                etag = cache.dependent_etag(etag, cached[2])
+                response = self.cached_or_not_modified(request, cached, etag)
+            else:
+                self.list_dependencies = {}
+                response = await self.apaginate_list(request)
+                if routers.reading_from_replica():
+                    return self.finalize_list_response(response, None)
+                await cache.get_cache().aset(key, self.cache_entry(response), self.get_cache_timeout())
+                etag = cache.dependent_etag(etag, self.list_dependencies)
+        return self.finalize_list_response(response, etag)
+
+    def get_list_etag(self, request, scope, version):
+        return cache.make_etag(request.user.id, scope, version, request.get_full_path())
+
+    def get_cache_timeout(self):
+        return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+    def is_not_modified(self, request, etag):
+        # Weak comparison: CompressionMiddleware weakens the ETags it sends.
+        return etag in {tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))}
+
+    def cached_response(self, cached):
+        data, headers, _ = cached
+        return Response(data, headers=headers)
+
+    def cached_or_not_modified(self, request, cached, etag):
+        if self.is_not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return self.cached_response(cached)
+
+    def cache_entry(self, response):
+        headers = {name: response[name] for name in self.cached_response_headers if response.has_header(name)}
+        return list(response.data), headers, self.list_dependencies
+
+    def finalize_list_response(self, response, etag):
+        # etag is None for a list read from a replica: it may be older than
+        # the scope's version, so it is neither cached nor given that ETag.
+        if etag is not None:
+            response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Sends the reads of safe requests to a read replica within
+    REPLICA_MAX_LAG (see routers.py), once the user is authenticated against
+    the primary. An unsafe request marks the user as a recent writer, which
+    keeps their reads on the primary for REPLICA_STICKY_SECONDS.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            if routers.replicas() and not routers.recently_wrote(request.user.id):
+                routers.set_replica_reads(routers.fresh_replicas())
+        elif routers.replicas() and request.user.is_authenticated:
+            routers.mark_recent_write(request.user.id)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        routers.set_replica_reads(())
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields=id,title limits the serialized fields of GET responses (see
+    serializers.SparseFieldsMixin). Unknown names are a 400; requests
+    that write ignore the parameter, so their input is validated in full.
+    """
+    fields_query_param = 'fields'
+
+    def get_requested_fields(self):
+        raw = self.request.query_params.get(self.fields_query_param) if self.request else None
+        if not raw or self.request.method not in SAFE_METHODS:
+            return None
+        requested = [name.strip() for name in raw.split(',') if name.strip()]
+        available = self.get_serializer_class().Meta.fields
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise ValidationError({
+                'fields': f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(available)}."
+            })
+        return requested
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        return context
+
+
+def datetime_representation(field):
+    """
+    DateTimeField.to_representation with the field's timezone looked up
+    once instead of per value, which is most of its cost.
+    """
+    if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+        return field.to_representation
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if tz is None:
+        return field.to_representation
+
+    def convert(value):
+        if not timezone.is_aware(value):
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+class ValuesListMixin:
+    """
+    Builds list pages from .values() rows instead of model instances. The
+    serializer's fields are resolved once per request and only those whose
+    representation differs from the database value (dates, ...) go through
+    to_representation, so the payload is the same as the serializer's.
+    Off when LIST_VALUES_FAST_PATH is, or when a field is not a plain
+    column. The async views page through the same two hooks.
+    """
+    values_passthrough_fields = (
+        serializers.BooleanField, serializers.CharField, serializers.IntegerField, serializers.PrimaryKeyRelatedField,
+    )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_list_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.get_list_data(queryset))
+        return self.get_paginated_response(self.get_list_data(page))
+
+    def get_list_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        self.list_columns = self.get_list_columns()
+        if self.list_columns is None:
+            return queryset
+        # created_at and id as well, for the pagination cursor.
+        sources = dict.fromkeys([*(source for _, source, _ in self.list_columns), 'created_at', 'id'])
+        return queryset.values(*sources)
+
+    def get_list_columns(self):
+        if not getattr(settings, 'LIST_VALUES_FAST_PATH', True):
+            return None
+        columns = []
+        for name, field in self.get_serializer().fields.items():
+            if field.write_only:
+                continue
+            if '.' in field.source or field.source == '*':
+                return None
+            columns.append((name, field.source, self.get_column_converter(field)))
+        return columns
+
+    def get_column_converter(self, field):
+        """Callable turning a database value into the field's representation, or None if it is the same."""
+        if isinstance(field, self.values_passthrough_fields) and not getattr(field, 'pk_field', None):
+            return None
+        if isinstance(field, serializers.DateTimeField):
+            return datetime_representation(field)
+        return field.to_representation
+
+    def get_list_data(self, rows):
+        if self.list_columns is None:
+            return self.get_serializer(rows, many=True).data
+        with timed('serializer'):
+            data = []
+            for row in rows:
+                item = {}
+                for name, source, convert in self.list_columns:
+                    value = row[source]
+                    item[name] = value if convert is None or value is None else convert(value)
+                data.append(item)
+            return data
+
+
+def bool_query_param(request, name):
+    """None when the parameter is absent, else true/false as a bool; anything else is a 400."""
+    raw = request.query_params.get(name, '').strip().lower()
+    if not raw:
+        return None
+    if raw in ('true', '1'):
+        return True
+    if raw in ('false', '0'):
+        return False
+    raise ValidationError({name: "Use true or false."})
+
+
+class EmbeddedTodosMixin:
+    """
+    ?include=todos on the project list: every project comes with its first
+    EMBEDDED_TODOS_LIMIT todos (only those with ?todo_status=, if given),
+    all loaded by one windowed prefetch query for the page, and a
+    `todos_next` link continuing through the todo list when there are more.
+
+    The page then depends on the todos of each project as well as on the
+    projects, so their todo scope versions are recorded with the cache
+    entry (see CachedListMixin). They are read before the todos are, so a
+    write in between leaves the entry already stale rather than wrong.
+    """
+    embedded_serializer_class = None
+
+    def include_todos(self):
+        if getattr(self, '_include_todos', None) is None:
+            raw = self.request.query_params.get('include', '') if self.request.method in SAFE_METHODS else ''
+            include = [name.strip() for name in raw.split(',') if name.strip()]
+            unknown = [name for name in include if name != 'todos']
+            if unknown:
+                raise ValidationError({'include': f"Cannot include {', '.join(unknown)}. Choose from: todos."})
+            self._include_todos = 'todos' in include
+        return self._include_todos
+
+    def get_embedded_todos_options(self):
+        return {
+            'limit': max(1, getattr(settings, 'EMBEDDED_TODOS_LIMIT', 20)),
+            'status': bool_query_param(self.request, 'todo_status'),
+        }
+
+    def get_serializer_class(self):
+        if self.include_todos():
+            return self.embedded_serializer_class
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.include_todos():
+            context['embedded_todos'] = self.get_embedded_todos_options()
+        return context
+
+    def get_list_columns(self):
+        # Nested todos need the instances.
+        return None if self.include_todos() else super().get_list_columns()
+
+    def get_list_data(self, rows):
+        if self.include_todos():
+            self.prefetch_todos(rows)
+        return super().get_list_data(rows)
+
+    def prefetch_todos(self, projects):
+        options = self.get_embedded_todos_options()
+        self.list_dependencies = cache.get_versions([cache.todos_scope(project.id) for project in projects])
+        todos = Todo.objects.order_by('created_at', 'id')
+        if options['status'] is not None:
+            todos = todos.filter(status=options['status'])
+        # One row past the limit tells whether a project has more todos.
+        prefetch_related_objects(
+            projects, Prefetch('todos', queryset=todos[:options['limit'] + 1], to_attr='embedded_todos'),
+        )
@@ -1,22 +1,126 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.contrib.auth.models import User
+from django.dispatch import Signal
+from collections import defaultdict
+from functools import partial
+from .ids import next_custom_id
+from .cache import bump_version, projects_scope, todos_scope
+import hashlib
 import random
 import string
 
+
+def hash_description(description):
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def violates_constraint(error, model, name):
+    """
+    Whether the IntegrityError `error` was raised by the unique constraint
+    `name` of `model`. PostgreSQL reports the constraint's name, SQLite the
+    columns it covers.
+    """
+    constraint = next(c for c in model._meta.constraints if c.name == name)
+    table = model._meta.db_table
+    columns = ', '.join(f'{table}.{model._meta.get_field(field).column}' for field in constraint.fields)
+    message = str(error)
+    return name in message or message.endswith(columns)
+
+
+# Stores the sha256 of another text field. Computed in pre_save so it is
+# filled in by save() and bulk_create() alike.
+class TextHashField(models.CharField):
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs['max_length'] = 64
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        del kwargs['max_length']
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = hash_description(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+# Deleted projects wait for their purge (see purge.py); nothing should see them.
+class LiveProjectManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 # Project model
 class Project(models.Model):
     id = models.AutoField(primary_key=True) 
     title = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='projects')
-    custom_id = models.CharField(max_length=10, unique=True, blank=True)
+    custom_id = models.CharField(max_length=20, unique=True, blank=True)
+    # Maintained incrementally by Todo.save()/delete(), the bulk paths and
+    # archive.py; `manage.py repair_todo_counters` recomputes them. The
+    # first two count the todos in userapp_todo only, archived ones are in
+    # archived_count.
+    todo_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_count = models.PositiveIntegerField(default=0, editable=False)
+    archived_count = models.PositiveIntegerField(default=0, editable=False)
+    # Set by purge.delete_project(); the row goes once its todos are purged.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = LiveProjectManager()
+    all_objects = models.Manager()
+
+    COUNTER_FIELDS = ('todo_count', 'completed_count', 'archived_count')
 
     def save(self, *args, **kwargs):
         if not self.custom_id:
-            last_id = Project.objects.all().order_by('id').last()
-            new_id = last_id.id + 1 if last_id else 1
-            self.custom_id = f"PROJ-{new_id:04d}"
-        super().save(*args, **kwargs)
+            self.custom_id = next_custom_id('PROJ')
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None:
+            # Never write back counters read earlier, they may have moved
+            # since, nor undo a deletion.
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in (*self.COUNTER_FIELDS, 'deleted_at')
+            ]
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            action = Change.CREATE if adding else Change.UPDATE
+            Change.record(self.user_id, Change.PROJECT, self.id, **{action: [self.id]})
+        bump_version(projects_scope(self.user_id), todos_scope(self.id))
+
+    @classmethod
+    def adjust_counters(cls, project_id, todos=0, completed=0, archived=0):
+        deltas = {'todo_count': todos, 'completed_count': completed, 'archived_count': archived}
+        updates = {name: F(name) + delta for name, delta in deltas.items() if delta}
+        if updates:
+            cls.objects.filter(pk=project_id).update(**updates)
+
+    def delete(self, *args, **kwargs):
+        user_id, project_id = self.user_id, self.id
+        # The project's todos go with it; clients drop them on its tombstone.
+        with transaction.atomic(savepoint=False):
+            result = super().delete(*args, **kwargs)
+            Change.record(user_id, Change.PROJECT, project_id, delete=[project_id])
+        bump_version(projects_scope(user_id), todos_scope(project_id))
+        return result
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's projects (see pagination.py)
+            models.Index(fields=['user', 'created_at', 'id'], name='project_user_created_idx'),
+        ]
+        constraints = [
+            # Also the index behind ProjectSerializer.validate_title. Partial,
+            # so the title of a project being purged can be reused at once.
+            models.UniqueConstraint(
+                fields=['user', 'title'], condition=Q(deleted_at__isnull=True), name='project_unique_title_per_user',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -29,14 +133,168 @@ class Todo(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     project = models.ForeignKey(Project, related_name='todos', on_delete=models.CASCADE)
-    custom_id = models.CharField(max_length=10, unique=True, blank=True)  
+    custom_id = models.CharField(max_length=20, unique=True, blank=True)  
+    description_hash = TextHashField(source='description')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_state = (instance.project_id, instance.status)
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.custom_id:
-            last_id = Todo.objects.all().order_by('id').last()
-            new_id = last_id.id + 1 if last_id else 1
-            self.custom_id = f"TODO-{new_id:04d}"
-        super().save(*args, **kwargs)
+            self.custom_id = next_custom_id('TODO')
+        adding = self._state.adding
+        saved_state = None if adding else getattr(self, '_saved_state', None)
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+            if saved_state is None:
+                Project.adjust_counters(self.project_id, 1, int(self.status))
+            elif saved_state != (self.project_id, self.status):
+                old_project_id, old_status = saved_state
+                if old_project_id == self.project_id:
+                    Project.adjust_counters(self.project_id, 0, int(self.status) - int(old_status))
+                else:
+                    Project.adjust_counters(old_project_id, -1, -int(old_status))
+                    Project.adjust_counters(self.project_id, 1, int(self.status))
+            action = Change.CREATE if adding else Change.UPDATE
+            Change.record(self.project.user_id, Change.TODO, self.project_id, **{action: [self.id]})
+        self._saved_state = (self.project_id, self.status)
+        bump_version(todos_scope(self.project_id))
+
+    def delete(self, *args, **kwargs):
+        project_id, status = getattr(self, '_saved_state', (self.project_id, self.status))
+        user_id, todo_id = self.project.user_id, self.id
+        with transaction.atomic(savepoint=False):
+            result = super().delete(*args, **kwargs)
+            Project.adjust_counters(project_id, -1, -int(status))
+            Change.record(user_id, Change.TODO, project_id, delete=[todo_id])
+        bump_version(todos_scope(project_id))
+        return result
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a project's todos (see pagination.py)
+            models.Index(fields=['project', 'created_at', 'id'], name='todo_project_created_idx'),
+        ]
+        constraints = [
+            # Descriptions are unbounded text, so uniqueness is enforced (and
+            # probed by the serializers) on their hash instead.
+            models.UniqueConstraint(fields=['project', 'description_hash'], name='todo_unique_description_per_project'),
+        ]
+
+    def __str__(self):
+        return self.description
+
+
+# Completed todos moved out of userapp_todo (see archive.py), so the hot
+# table, its indexes and the uniqueness checks on it only cover live work.
+# A row keeps the todo's id, custom_id and timestamps, and restoring it
+# puts the todo back exactly as it was.
+class ArchivedTodo(models.Model):
+    id = models.IntegerField(primary_key=True)
+    description = models.TextField()
+    status = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+    # Indexed by archived_project_created_idx, which leads with it.
+    project = models.ForeignKey(Project, related_name='archived_todos', on_delete=models.CASCADE, db_index=False)
+    custom_id = models.CharField(max_length=20)
+    description_hash = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of ?archived=true todo lists (see pagination.py)
+            models.Index(fields=['project', 'created_at', 'id'], name='archived_project_created_idx'),
+        ]
 
     def __str__(self):
         return self.description
+
+
+# Sent once the transaction that logged a batch of changes has committed,
+# with user_id and changes: [(change_id, kind, action, object_id,
+# project_id), ...]. Feeds the event streams (see events.py).
+changes_committed = Signal()
+
+
+# Append-only log of every project and todo change, read by the sync
+# endpoint (see sync.py). Rows are written in the same transaction as the
+# change: by save()/delete() above and by the bulk paths that bypass them.
+class Change(models.Model):
+    PROJECT, TODO = 'project', 'todo'
+    CREATE, UPDATE, DELETE = 'create', 'update', 'delete'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', db_index=False)
+    kind = models.CharField(max_length=7, choices=[(PROJECT, 'Project'), (TODO, 'Todo')])
+    action = models.CharField(max_length=6, choices=[(CREATE, 'Create'), (UPDATE, 'Update'), (DELETE, 'Delete')])
+    object_id = models.IntegerField()
+    # The todo's project, or the project itself.
+    project_id = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def record(cls, user_id, kind, project_id, **actions):
+        """Log changes to objects of one project, e.g. record(u, TODO, p, create=[1, 2], delete=[3]), in one insert."""
+        cls.record_many([
+            (user_id, kind, action, object_id, project_id)
+            for action, object_ids in actions.items()
+            for object_id in object_ids
+        ])
+
+    @classmethod
+    def record_many(cls, entries):
+        """record() for changes across users and projects: [(user_id, kind, action, object_id, project_id), ...]."""
+        rows = cls.objects.bulk_create([
+            cls(user_id=user_id, kind=kind, action=action, object_id=object_id, project_id=project_id)
+            for user_id, kind, action, object_id, project_id in entries
+        ])
+        by_user = defaultdict(list)
+        for row in rows:
+            by_user[row.user_id].append((row.id, row.kind, row.action, row.object_id, row.project_id))
+        for user_id, changes in by_user.items():
+            transaction.on_commit(
+                partial(changes_committed.send, sender=cls, user_id=user_id, changes=changes), robust=True,
+            )
+
+    class Meta:
+        indexes = [
+            # A user's changes after a sync token (see sync.py)
+            models.Index(fields=['user', 'id'], name='change_user_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.kind} {self.object_id}"
+
+
+# Progress of the background purge of a deleted project (see purge.py).
+# Kept after the project row is gone, for the status endpoint.
+class ProjectPurge(models.Model):
+    PENDING, RUNNING, DONE = 'pending', 'running', 'done'
+
+    project_id = models.IntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', db_index=False)
+    status = models.CharField(
+        max_length=7, default=PENDING, choices=[(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done')],
+    )
+    # Todos, archived ones included, the project had when it was deleted.
+    total = models.PositiveIntegerField()
+    purged = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.project_id}: {self.status} {self.purged}/{self.total}"
+
+
+# Counter table backing custom_id allocation, one row per prefix (see ids.py)
+class IdSequence(models.Model):
+    prefix = models.CharField(max_length=10, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix}:{self.last_value}"
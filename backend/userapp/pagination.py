@@ -0,0 +1,135 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise NotFound('Invalid cursor.')
+
+
+def after_cursor(queryset, cursor):
+    # (created_at, id) > (c, i), spelled so the leading created_at bound can
+    # drive a range scan on the (..., created_at, id) index.
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(
+        Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk),
+        created_at__gte=created_at,
+    )
+
+
+class PageSizeMixin:
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        page_size = getattr(settings, 'PAGE_SIZE', 100)
+        max_page_size = getattr(settings, 'MAX_PAGE_SIZE', page_size)
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+            if requested > 0:
+                page_size = requested
+        except (KeyError, ValueError):
+            pass
+        return min(page_size, max_page_size)
+
+    def get_paginated_response(self, data):
+        headers = {}
+        next_link = self.get_next_link()
+        if next_link:
+            headers['Link'] = f'<{next_link}>; rel="next"'
+        return Response(data, headers=headers)
+
+
+class KeysetPagination(PageSizeMixin, BasePagination):
+    """
+    Keyset pagination over (created_at, id).
+
+    Each page is fetched with an indexed range condition instead of an
+    OFFSET, so its cost does not depend on how deep the client is, and rows
+    inserted while paging never shift or repeat items. The body stays a
+    plain list; the next page is advertised in a `Link: <...>; rel="next"`
+    header.
+    """
+    ordering = ('created_at', 'id')
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.get_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        # One row past the page tells us whether there is a next page.
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.next_cursor = None
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = after_cursor(queryset, cursor)
+        return queryset[:self.page_size + 1]
+
+    def get_page(self, rows):
+        page = rows[:self.page_size]
+        if len(rows) > self.page_size:
+            last = page[-1]
+            # Pages are model instances or, from ValuesListMixin, dicts.
+            if isinstance(last, dict):
+                self.next_cursor = encode_cursor(last['created_at'], last['id'])
+            else:
+                self.next_cursor = encode_cursor(last.created_at, last.pk)
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+
+class PageNumberPagination(PageSizeMixin, BasePagination):
+    """
+    ?page=N pagination for results with no stable keyset, such as search
+    results ordered by rank. Pages are fetched with LIMIT/OFFSET through a
+    `fetch(limit, offset)` callable; like KeysetPagination the body is a
+    plain list and the next page goes in the Link header.
+    """
+    page_query_param = 'page'
+
+    def get_page_number(self, request):
+        try:
+            page = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound('Invalid page.')
+        if page < 1:
+            raise NotFound('Invalid page.')
+        return page
+
+    def paginate_queryset(self, fetch, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.page = self.get_page_number(request)
+        rows = fetch(self.page_size + 1, (self.page - 1) * self.page_size)
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page + 1)
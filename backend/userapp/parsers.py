@@ -0,0 +1,24 @@
+import codecs
+from io import BytesIO
+
+from rest_framework import parsers
+
+from .renderers import orjson, orjson_enabled
+
+
+class JSONParser(parsers.JSONParser):
+    """
+    DRF's JSONParser, decoding UTF-8 bodies with orjson when it is installed
+    and FAST_JSON is on. A body orjson rejects is parsed again by DRF, so
+    what is accepted and the error messages stay the same.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding') or 'utf-8'
+        if not orjson_enabled() or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -0,0 +1,106 @@
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import re
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+# On-demand request profiling.
+#
+# ProfilingMiddleware (middleware.py) runs a request to a userapp view under
+# cProfile when it is sampled (PROFILE_SAMPLE_RATE) or carries an X-Profile
+# header matching PROFILE_TOKEN. Each process keeps one pstats.Stats per
+# route ("<METHOD> <route pattern>") and rewrites it to
+# PROFILE_DIR/<route>.<pid>.prof after every profiled request;
+# `manage.py merge_profiles` combines the files of all processes.
+#
+# Only one request per process is profiled at a time, others run normally
+# while it does. Requests served under ASGI are never profiled: cProfile
+# records everything that runs on the thread it was enabled in, and across
+# an await that is the event loop running every other request's coroutines
+# too, which would be charged to the sampled route. Profile a WSGI worker
+# (runserver, gunicorn) instead.
+
+PROFILE_HEADER = 'X-Profile'
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def requested(request):
+    token = getattr(settings, 'PROFILE_TOKEN', '')
+    header = request.headers.get(PROFILE_HEADER)
+    return bool(token and header) and hmac.compare_digest(header.encode(), token.encode())
+
+
+def sampled(request):
+    if requested(request):
+        return True
+    rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0)
+    return rate > 0 and random.random() < rate
+
+
+def route_key(request):
+    """'<METHOD> <route>' when the request is for a userapp view, else None."""
+    try:
+        match = resolve(request.path_info, getattr(request, 'urlconf', None))
+    except Resolver404:
+        return None
+    view = getattr(match.func, 'view_class', match.func)
+    if not view.__module__.startswith('userapp.'):
+        return None
+    return f'{request.method} {match.route}'
+
+
+def candidate(request):
+    """The route key to profile this request under, or None to leave it alone."""
+    return route_key(request) if sampled(request) else None
+
+
+def route_slug(key):
+    return re.sub(r'[^A-Za-z0-9]+', '_', key).strip('_')
+
+
+def profile_path(key):
+    return os.path.join(settings.PROFILE_DIR, f'{route_slug(key)}.{os.getpid()}.prof')
+
+
+@contextmanager
+def profile(key):
+    """Profile the block under `key`, unless another request is being profiled."""
+    if key is None or not _lock.acquire(blocking=False):
+        yield
+        return
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+        record(key, profiler)
+    finally:
+        _lock.release()
+
+
+def record(key, profiler):
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = pstats.Stats(profiler)
+    else:
+        stats.add(profiler)
+    path = profile_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Readers (merge_profiles) never see a half-written file.
+    stats.dump_stats(f'{path}.tmp')
+    os.replace(f'{path}.tmp', path)
+
+
+def reset():
+    """Forget the stats collected so far in this process (the files stay)."""
+    _stats.clear()
@@ -0,0 +1,119 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .cache import bump_version, projects_scope, todos_scope
+from .models import ArchivedTodo, Change, Project, ProjectPurge, Todo
+
+# Project deletion in the background.
+#
+# Deleting a project with Django's cascade removes all of its todos in the
+# request's transaction, which on big projects outlasts the request and
+# holds SQLite's write lock for seconds. Instead the request only marks the
+# project deleted (Project.deleted_at: Project.objects and every todo
+# lookup skip it from then on), logs its tombstone and creates the
+# ProjectPurge that reports progress on projects/<id>/purge/.
+#
+# Once that commits, the purge is handed to a single worker thread, which
+# deletes the todos, then the archived todos, PURGE_CHUNK_SIZE rows per
+# transaction, and finally the project row. One worker is enough, SQLite
+# has one writer anyway, and it keeps purges from competing with each
+# other. With PURGE_IN_BACKGROUND off (as in the tests) the purge runs as
+# soon as the transaction commits, in the committing thread. A purge cut
+# short by a restart is finished by `manage.py purge_deleted_projects`.
+#
+# A purger claims its job by switching it to running with a conditional
+# UPDATE, and bumps its updated_at after every chunk. A running job is only
+# taken over once that heartbeat is PURGE_STALE_AFTER seconds old, so the
+# command never purges a project alongside the worker still doing it.
+
+logger = logging.getLogger('userapp.purge')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='project-purge')
+    return _executor
+
+
+def delete_project(project):
+    """Hide `project` at once and schedule the purge of its todos; returns the ProjectPurge."""
+    with transaction.atomic(savepoint=False):
+        project.deleted_at = timezone.now()
+        Project.all_objects.filter(pk=project.pk).update(deleted_at=project.deleted_at)
+        Change.record(project.user_id, Change.PROJECT, project.pk, delete=[project.pk])
+        job = ProjectPurge.objects.create(
+            project_id=project.pk, user_id=project.user_id, total=project.todo_count + project.archived_count,
+        )
+        transaction.on_commit(partial(schedule, project.pk))
+    bump_version(projects_scope(project.user_id), todos_scope(project.pk))
+    return job
+
+
+def schedule(project_id):
+    if getattr(settings, 'PURGE_IN_BACKGROUND', True):
+        get_executor().submit(_run_in_worker, project_id)
+    else:
+        purge(project_id)
+
+
+def _run_in_worker(project_id):
+    try:
+        purge(project_id)
+    except Exception:
+        # Left unfinished; purge_deleted_projects picks it up again.
+        logger.exception("Purge of project %s failed", project_id)
+    finally:
+        close_old_connections()
+
+
+def claim(project_id):
+    """Mark the purge of `project_id` running, unless it is done or another purger is at it; returns whether it did."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'PURGE_STALE_AFTER', 300))
+    return bool(
+        ProjectPurge.objects.filter(pk=project_id)
+        .filter(Q(status=ProjectPurge.PENDING) | Q(status=ProjectPurge.RUNNING, updated_at__lt=stale))
+        .update(status=ProjectPurge.RUNNING, updated_at=now)
+    )
+
+
+def purge(project_id, chunk_size=None):
+    """
+    Delete a deleted project's todos in chunks, then the project; returns
+    the number of todos purged, or None if the purge was not claimed.
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'PURGE_CHUNK_SIZE', 1000)
+    if not claim(project_id):
+        return None
+    jobs = ProjectPurge.objects.filter(pk=project_id)
+    purged = 0
+    for model in (Todo, ArchivedTodo):
+        while True:
+            with transaction.atomic():
+                # One statement per chunk: DELETE ... WHERE id IN (SELECT id ... LIMIT n).
+                chunk = model.objects.filter(project_id=project_id).values('id')[:chunk_size]
+                deleted, _ = model.objects.filter(id__in=chunk).delete()
+                if not deleted:
+                    break
+                jobs.update(purged=F('purged') + deleted, updated_at=timezone.now())
+            purged += deleted
+    with transaction.atomic():
+        Project.all_objects.filter(pk=project_id, deleted_at__isnull=False).delete()
+        now = timezone.now()
+        jobs.update(status=ProjectPurge.DONE, updated_at=now, finished_at=now)
+    return purged
@@ -0,0 +1,58 @@
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+from .instrumentation import timed
+
+try:
+    import orjson
+except ImportError:  # optional: DRF's stdlib encoding is used instead
+    orjson = None
+
+# Datetimes go through DRF's encoder (see OrjsonRendererMixin); keys that
+# are not strings are converted as json.dumps does.
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def orjson_enabled():
+    return orjson is not None and getattr(settings, 'FAST_JSON', False)
+
+
+class TimedRendererMixin:
+    """Counts rendering towards the request's render time (see instrumentation.py)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class OrjsonRendererMixin:
+    """
+    Encodes with orjson when it is installed and FAST_JSON is on, producing
+    the same bytes as DRF's JSONRenderer: whatever orjson has no native
+    encoding for (datetimes, Decimals, lazy translations, ...) is handed to
+    DRF's encoder, and indented output is left to the stdlib.
+    """
+    drf_encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (data is None or not orjson_enabled() or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.drf_encoder.default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits, and the like.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped like DRF does, so the output stays a JavaScript subset.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class JSONRenderer(TimedRendererMixin, OrjsonRendererMixin, renderers.JSONRenderer):
+    pass
+
+
+class BrowsableAPIRenderer(TimedRendererMixin, renderers.BrowsableAPIRenderer):
+    pass
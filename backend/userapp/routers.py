@@ -0,0 +1,88 @@
+import contextvars
+import os
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import get_cache
+
+# Read/write split.
+#
+# Reads go to one of READ_REPLICAS only while a view has switched the
+# current context over (ReplicaReadMixin, for safe requests); everything
+# else, and every write, uses the primary. After a user writes, their reads
+# stay on the primary for REPLICA_STICKY_SECONDS so they see their own
+# changes while the replicas catch up.
+#
+# A replica is only as fresh as its last `manage.py sync_replicas`, so one
+# whose lag (the age of its file, which the sync rewrites) is over
+# REPLICA_MAX_LAG seconds is not read from at all.
+
+_read_from_replica = contextvars.ContextVar('userapp_read_from_replica', default=())
+
+
+def replicas():
+    return list(getattr(settings, 'READ_REPLICAS', []))
+
+
+def replica_lag(alias):
+    """Seconds since the replica was last synced, or None if it has no file."""
+    try:
+        return time.time() - os.path.getmtime(settings.DATABASES[alias]['NAME'])
+    except (KeyError, OSError):
+        return None
+
+
+def fresh_replicas():
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG', 60)
+    return [alias for alias in replicas() if (lag := replica_lag(alias)) is not None and lag <= max_lag]
+
+
+def set_replica_reads(aliases):
+    """Route reads in the current context to one of the aliases, or back to the primary if there are none."""
+    _read_from_replica.set(tuple(aliases))
+
+
+def reading_from_replica():
+    return bool(_read_from_replica.get())
+
+
+def _recent_write_key(user_id):
+    return f"userapp:recent-write:{user_id}"
+
+
+def mark_recent_write(user_id):
+    get_cache().set(_recent_write_key(user_id), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 10))
+
+
+def recently_wrote(user_id):
+    return get_cache().get(_recent_write_key(user_id)) is not None
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = _read_from_replica.get()
+        if aliases:
+            return self.pick_replica(list(aliases))
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, never migrated on their own.
+        if db in replicas():
+            return False
+        return None
+
+    def pick_replica(self, aliases):
+        return random.choice(aliases)
@@ -0,0 +1,136 @@
+import re
+
+from django.db import connections, router, transaction
+
+from .models import Todo
+
+# Todo search.
+#
+# On SQLite with FTS5 the userapp_todo_fts table (migration 0006, kept in
+# sync by triggers) answers the query: results are ranked by bm25 and carry
+# a snippet with the matched terms wrapped in SNIPPET_MARK. Elsewhere, or
+# before the index exists, it falls back to a case-insensitive substring
+# match, newest first.
+#
+# The triggers only index todos with ids up to the watermark in
+# userapp_todo_fts_state (migration 0010), normally the largest id. A
+# rebuild lowers it to 0 and raises it batch by batch, so a todo written
+# while it runs is indexed once: by the triggers if the rebuild has passed
+# its id, else by the batch that reaches it.
+
+FTS_TABLE = 'userapp_todo_fts'
+STATE_TABLE = 'userapp_todo_fts_state'
+INDEXED_UP_TO_ALL = 2 ** 63 - 1
+SNIPPET_MARK = ('**', '**')
+SNIPPET_TOKENS = 12
+RESULT_FIELDS = ('id', 'custom_id', 'description', 'status', 'project_id', 'project_custom_id', 'project_title')
+
+_token_re = re.compile(r'\w+', re.UNICODE)
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must appear, as a prefix,
+    so "buy mil" matches "Buy milk". Quoting each token keeps FTS5 syntax
+    (AND, NEAR, column filters, ...) in user input from being interpreted.
+    """
+    tokens = _token_re.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def fts_available(connection):
+    """Whether `connection`'s database has the index; looked up once per connection (see signals.py)."""
+    if connection.vendor != 'sqlite':
+        return False
+    available = getattr(connection, 'todo_fts_available', None)
+    if available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            available = connection.todo_fts_available = cursor.fetchone() is not None
+    return available
+
+
+def search_todos(user, query, limit, offset=0):
+    """Return up to `limit` results (dicts) for `query` across the user's projects."""
+    connection = connections[router.db_for_read(Todo)]
+    expression = match_expression(query)
+    if not expression:
+        return []
+    if fts_available(connection):
+        return _search_fts(connection, user, expression, limit, offset)
+    return _search_fallback(user, query, limit, offset)
+
+
+def _search_fts(connection, user, expression, limit, offset):
+    sql = f"""
+        SELECT t.id, t.custom_id, t.description, t.status, t.project_id, p.custom_id, p.title,
+               snippet({FTS_TABLE}, 0, %s, %s, '…', %s),
+               bm25({FTS_TABLE})
+        FROM {FTS_TABLE}
+        JOIN userapp_todo t ON t.id = {FTS_TABLE}.rowid
+        JOIN userapp_project p ON p.id = t.project_id
+        WHERE {FTS_TABLE} MATCH %s AND p.user_id = %s AND p.deleted_at IS NULL
+        ORDER BY bm25({FTS_TABLE}), t.id
+        LIMIT %s OFFSET %s
+    """
+    params = [*SNIPPET_MARK, SNIPPET_TOKENS, expression, user.id, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [
+        {**dict(zip(RESULT_FIELDS, row[:7])), 'status': bool(row[3]), 'snippet': row[7], 'rank': row[8]}
+        for row in rows
+    ]
+
+
+def _search_fallback(user, query, limit, offset):
+    todos = (
+        Todo.objects.filter(project__user=user, project__deleted_at__isnull=True, description__icontains=query.strip())
+        .order_by('-created_at', '-id')
+        .values('id', 'custom_id', 'description', 'status', 'project_id', 'project__custom_id', 'project__title')
+    )[offset:offset + limit]
+    return [
+        {
+            **{field: todo[field] for field in RESULT_FIELDS[:5]},
+            'project_custom_id': todo['project__custom_id'],
+            'project_title': todo['project__title'],
+            'snippet': todo['description'],
+            'rank': None,
+        }
+        for todo in todos
+    ]
+
+
+def rebuild_index(connection, batch_size, progress=None):
+    """
+    Re-index every todo, batch_size rows per transaction, and return the
+    number indexed. Searches see a partial index until it finishes; writes
+    can go on meanwhile. An interrupted rebuild leaves the todos past its
+    watermark unindexed until it is run again.
+    """
+    indexed = 0
+    last_id = 0
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+        cursor.execute(f"UPDATE {STATE_TABLE} SET indexed_up_to = 0")
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, description FROM userapp_todo WHERE id > %s ORDER BY id LIMIT %s",
+                [last_id, batch_size],
+            )
+            rows = cursor.fetchall()
+            if rows:
+                cursor.executemany(f"INSERT INTO {FTS_TABLE}(rowid, description) VALUES (%s, %s)", rows)
+            cursor.execute(
+                f"UPDATE {STATE_TABLE} SET indexed_up_to = %s", [rows[-1][0] if rows else INDEXED_UP_TO_ALL]
+            )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        indexed += len(rows)
+        if progress:
+            progress(indexed)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return indexed
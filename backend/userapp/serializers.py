@@ -1,10 +1,53 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.http import urlencode
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Project, Todo
+from .models import ArchivedTodo, Change, Project, ProjectPurge, Todo, hash_description, violates_constraint
+from .ids import allocate_custom_ids
+from .cache import bump_version, todos_scope
+from .instrumentation import timed
+from .pagination import encode_cursor
 from django.contrib.auth.models import AnonymousUser
 
-class UserSerializer(serializers.ModelSerializer):
+
+# Validation, saving and representation count towards the request's
+# serializer time (see instrumentation.py).
+class TimedSerializerMixin:
+    def is_valid(self, *, raise_exception=False):
+        with timed('serializer'):
+            return super().is_valid(raise_exception=raise_exception)
+
+    def save(self, **kwargs):
+        with timed('serializer'):
+            return super().save(**kwargs)
+
+    @property
+    def data(self):
+        with timed('serializer'):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+# Keeps only the fields named in context['fields'] (set from ?fields= by
+# mixins.SparseFieldsetMixin), so the rest are never resolved or rendered.
+class SparseFieldsMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested is not None:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only = True)
 
     class Meta:
@@ -34,25 +77,54 @@ class TokenSerializer(serializers.Serializer):
             raise serializers.ValidationError({"refresh_Token": "Invalid refresh token."})
         
 
-class ProjectSerializer(serializers.ModelSerializer):
+# Two requests can both pass the uniqueness probe in validate_*; the database
+# constraint then rejects the second one. Report that as the same 400. Any
+# other integrity error is a bug, not a duplicate, and propagates.
+class UniqueConstraintMixin:
+    unique_field = None
+    unique_message = None
+    unique_constraint = None
+
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as error:
+            if not violates_constraint(error, self.Meta.model, self.unique_constraint):
+                raise
+            raise serializers.ValidationError({self.unique_field: [self.unique_message]})
+
+
+class ProjectSerializer(TimedSerializerMixin, SparseFieldsMixin, UniqueConstraintMixin, serializers.ModelSerializer):
+    unique_field = 'title'
+    unique_message = 'A project with this title already exists.'
+    unique_constraint = 'project_unique_title_per_user'
+
     class Meta:
         model = Project      
         fields = ['id', 'title', 'created_at', 'user', 'custom_id']
+        list_serializer_class = TimedListSerializer
         read_only_fields = ['id', 'created_at', 'custom_id', 'user']  
 
     def validate_title(self, value):
         user = self.context['request'].user
         if user.is_anonymous:
             raise serializers.ValidationError("User must be authenticated.")
-        if Project.objects.filter(title=value, user= user).exists():
-            raise serializers.ValidationError('A project with this title already exists.')
+        current_instance_id = self.instance.id if self.instance else None
+        if Project.objects.filter(title=value, user= user).exclude(id=current_instance_id).exists():
+            raise serializers.ValidationError(self.unique_message)
         return value
     
 
-class TodoSerializer(serializers.ModelSerializer):
+class TodoSerializer(TimedSerializerMixin, SparseFieldsMixin, UniqueConstraintMixin, serializers.ModelSerializer):
+    unique_field = 'description'
+    unique_message = 'A todo with this description already exists in the project.'
+    unique_constraint = 'todo_unique_description_per_project'
+
     class Meta:
         model = Todo
         fields = ['id', 'description', 'status', 'created_at','updated_at', 'project', 'custom_id']
+        list_serializer_class = TimedListSerializer
         read_only_fields = ['id', 'created_at', 'custom_id', 'project']
 
     def validate_description(self, value):
@@ -61,16 +133,162 @@ class TodoSerializer(serializers.ModelSerializer):
         if isinstance(user, AnonymousUser):
             raise serializers.ValidationError("User must be authenticated.")
 
-        try:
-            project = Project.objects.get(id=project_id, user=user)
-        except Project.DoesNotExist:
-            raise serializers.ValidationError("You are not associated with this project.")
+        # Views resolve (and authorize) the project once and pass it along.
+        project = self.context.get('project')
+        if project is None:
+            try:
+                project = Project.objects.get(id=project_id, user=user)
+            except Project.DoesNotExist:
+                raise serializers.ValidationError("You are not associated with this project.")
 
         current_instance_id = self.instance.id if self.instance else None
-        if Todo.objects.filter(description=value, project=project).exclude(id=current_instance_id).exists():
-            raise serializers.ValidationError("A todo with this description already exists in the project.")
+        if Todo.objects.filter(description_hash=hash_description(value), project=project).exclude(id=current_instance_id).exists():
+            raise serializers.ValidationError(self.unique_message)
         return value 
-    
 
-    
 
+class ArchivedTodoSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    """Todos listed with ?archived=true; read only, they are changed by restoring them first."""
+
+    class Meta:
+        model = ArchivedTodo
+        fields = TodoSerializer.Meta.fields + ['archived_at']
+        list_serializer_class = TimedListSerializer
+        read_only_fields = fields
+
+
+class ProjectPurgeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProjectPurge
+        fields = ['project_id', 'status', 'total', 'purged', 'created_at', 'updated_at', 'finished_at']
+        read_only_fields = fields
+
+
+class ProjectWithTodosSerializer(ProjectSerializer):
+    """
+    A project with its first todos, prefetched into `embedded_todos` by
+    mixins.EmbeddedTodosMixin, and a link to the rest of them.
+    """
+    todos = serializers.SerializerMethodField()
+    todos_next = serializers.SerializerMethodField()
+
+    class Meta(ProjectSerializer.Meta):
+        fields = ProjectSerializer.Meta.fields + ['todos', 'todos_next']
+
+    @cached_property
+    def todo_serializer(self):
+        # One for every project on the page; ?fields= applies to the projects.
+        return TodoSerializer(context={**self.context, 'fields': None})
+
+    def get_todos(self, project):
+        limit = self.context['embedded_todos']['limit']
+        return [self.todo_serializer.to_representation(todo) for todo in project.embedded_todos[:limit]]
+
+    def get_todos_next(self, project):
+        options = self.context['embedded_todos']
+        if len(project.embedded_todos) <= options['limit']:
+            return None
+        last = project.embedded_todos[options['limit'] - 1]
+        params = {'cursor': encode_cursor(last.created_at, last.pk)}
+        if options['status'] is not None:
+            params['status'] = str(options['status']).lower()
+        url = reverse('todo-list-create', kwargs={'project_id': project.id})
+        return self.context['request'].build_absolute_uri(f"{url}?{urlencode(params)}")
+
+
+class TodoBulkCreateSerializer(serializers.Serializer):
+    description = serializers.CharField()
+    status = serializers.BooleanField(default=False)
+
+
+class TodoBulkUpdateSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.BooleanField()
+
+
+class TodoBulkSerializer(TimedSerializerMixin, serializers.Serializer):
+    create = TodoBulkCreateSerializer(many=True, required=False, default=list)
+    update = TodoBulkUpdateSerializer(many=True, required=False, default=list)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def validate(self, data):
+        project = self.context['project']
+        max_items = getattr(settings, 'TODO_BULK_MAX_ITEMS', 1000)
+        if len(data['create']) + len(data['update']) + len(data['delete']) > max_items:
+            raise serializers.ValidationError(f"A bulk request may change at most {max_items} todos.")
+
+        # That every id belongs to this project is checked by save(), which
+        # reads the rows inside its transaction.
+        update_ids = [item['id'] for item in data['update']]
+        if len(update_ids) != len(set(update_ids)):
+            raise serializers.ValidationError({'update': "Each todo may only be updated once."})
+        if set(update_ids) & set(data['delete']):
+            raise serializers.ValidationError({'update': "A todo cannot be updated and deleted in the same request."})
+
+        # Deletes are applied first, so their descriptions are free to be reused.
+        descriptions = [item['description'] for item in data['create']]
+        if len(descriptions) != len(set(descriptions)):
+            raise serializers.ValidationError({'create': "Descriptions must be unique within the request."})
+        hashes = [hash_description(description) for description in descriptions]
+        taken = Todo.objects.filter(project=project, description_hash__in=hashes).exclude(id__in=data['delete'])
+        duplicates = sorted(taken.values_list('description', flat=True))
+        if duplicates:
+            raise serializers.ValidationError({'create': [f"A todo with this description already exists in the project: {d}" for d in duplicates]})
+        return data
+
+    def save(self):
+        project = self.context['project']
+        data = self.validated_data
+        now = timezone.now()
+
+        try:
+            with transaction.atomic():
+                # Read the rows to change in the same transaction that
+                # writes them, so the counter deltas are computed from the
+                # statuses being replaced: one lookup for all of them.
+                referenced = {item['id'] for item in data['update']} | set(data['delete'])
+                existing = {
+                    todo.id: todo
+                    for todo in Todo.objects.filter(project=project, id__in=referenced).select_for_update()
+                }
+                missing = sorted(referenced - existing.keys())
+                if missing:
+                    raise serializers.ValidationError({'todos': f"Todos not found in this project: {missing}"})
+
+                deleted = list(data['delete'])
+                if deleted:
+                    Todo.objects.filter(project=project, id__in=deleted).delete()
+                completed_delta = -sum(existing[todo_id].status for todo_id in deleted)
+
+                updated = [existing[item['id']] for item in data['update']]
+                for todo, item in zip(updated, data['update']):
+                    completed_delta += int(item['status']) - int(todo.status)
+                    todo.status = item['status']
+                    todo.updated_at = now
+                    todo._saved_state = (todo.project_id, todo.status)
+                if updated:
+                    Todo.objects.bulk_update(updated, ['status', 'updated_at'])
+
+                custom_ids = allocate_custom_ids('TODO', len(data['create']))
+                created = Todo.objects.bulk_create([
+                    Todo(project=project, description=item['description'], status=item['status'], custom_id=custom_id)
+                    for item, custom_id in zip(data['create'], custom_ids)
+                ])
+                completed_delta += sum(todo.status for todo in created)
+
+                # bulk_* and queryset deletes skip Todo.save()/delete(), so
+                # counters, the change log and the list cache version are
+                # maintained here.
+                Project.adjust_counters(project.id, len(created) - len(deleted), completed_delta)
+                Change.record(
+                    project.user_id, Change.TODO, project.id,
+                    delete=deleted, update=[todo.id for todo in updated], create=[todo.id for todo in created],
+                )
+        except IntegrityError as error:
+            if not violates_constraint(error, Todo, 'todo_unique_description_per_project'):
+                raise
+            raise serializers.ValidationError({'create': ["A todo with this description already exists in the project."]})
+
+        bump_version(todos_scope(project.id))
+
+        return {'created': created, 'updated': updated, 'deleted': deleted}
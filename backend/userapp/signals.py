@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_users
+from .db import configure_sqlite
+from .events import get_broker
+from .instrumentation import install as install_query_recorder
+from .models import changes_committed
+
+
+# Any change to the user row (password, is_active, ...) must be seen by the
+# next request, so drop the cached copy used by CachedJWTAuthentication.
+# Bulk updates send no signal and go through authentication.update_users.
+@receiver(post_save, sender=get_user_model(), dispatch_uid='userapp_invalidate_cached_user_on_save')
+@receiver(post_delete, sender=get_user_model(), dispatch_uid='userapp_invalidate_cached_user_on_delete')
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_users(instance.pk)
+
+
+@receiver(connection_created, dispatch_uid='userapp_configure_sqlite')
+def configure_sqlite_connection(sender, connection, **kwargs):
+    configure_sqlite(connection)
+
+
+# search.fts_available looks the index up once per connection.
+@receiver(connection_created, dispatch_uid='userapp_forget_search_index')
+def forget_search_index(sender, connection, **kwargs):
+    connection.todo_fts_available = None
+
+
+# Let RequestInstrumentationMiddleware count every query, on the primary and
+# the replicas alike; outside an instrumented request this is a pass-through.
+@receiver(connection_created, dispatch_uid='userapp_record_queries')
+def record_connection_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+# Push committed changes to the user's open event streams (see events.py).
+@receiver(changes_committed, dispatch_uid='userapp_publish_changes')
+def publish_changes(sender, user_id, changes, **kwargs):
+    get_broker().publish(user_id, changes)
@@ -0,0 +1,123 @@
+import base64
+
+from rest_framework.exceptions import ValidationError
+
+from .models import Change, Project, Todo
+from .serializers import ProjectSerializer, TodoSerializer
+
+# Delta sync for offline clients.
+#
+# Every project/todo write appends a row to the change log (models.Change).
+# A sync token is an opaque encoding of the last change id a client has
+# applied; a sync returns the next batch of that user's changes, each with
+# the object's current data, and the token to resume from. Without a token
+# the whole log is replayed, which doubles as the initial download.
+#
+# Changes to the same object within a batch are folded into one: created
+# and then deleted in the batch means it is left out entirely, created and
+# then updated is a create with the latest data. Deleting a project also
+# deletes its todos; they get no tombstones of their own.
+
+TOKEN_VERSION = 'v1'
+
+
+def encode_token(change_id):
+    raw = f"{TOKEN_VERSION}|{change_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_token(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        version, change_id = raw.split('|')
+        if version != TOKEN_VERSION:
+            raise ValueError(version)
+        return int(change_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValidationError({'token': 'Invalid sync token.'})
+
+
+def merge(folded, rows):
+    """
+    Fold (kind, action, object_id, project_id) rows, oldest first, into
+    `folded`, which maps (kind, object_id) to (first action, last action,
+    project_id) and keeps the order in which each object first changed, so
+    a project comes before the todos created in it.
+    """
+    for kind, action, object_id, project_id in rows:
+        key = (kind, object_id)
+        first = folded[key][0] if key in folded else action
+        folded[key] = (first, action, project_id)
+    return folded
+
+
+def unfold(folded):
+    """The net (kind, action, object_id, project_id) change of each object in `folded`."""
+    changes = []
+    for (kind, object_id), (first, last, project_id) in folded.items():
+        if last == Change.DELETE:
+            if first != Change.CREATE:
+                changes.append((kind, Change.DELETE, object_id, project_id))
+        else:
+            changes.append((kind, Change.CREATE if first == Change.CREATE else Change.UPDATE, object_id, project_id))
+    return changes
+
+
+def fold(rows):
+    return unfold(merge({}, rows))
+
+
+def current_data(user, changes, context):
+    """Serialized current state of the objects created or updated in `changes`, by (kind, id)."""
+    wanted = {Change.PROJECT: [], Change.TODO: []}
+    for kind, action, object_id, _ in changes:
+        if action != Change.DELETE:
+            wanted[kind].append(object_id)
+    data = {}
+    if wanted[Change.PROJECT]:
+        projects = Project.objects.filter(user=user, id__in=wanted[Change.PROJECT])
+        for item in ProjectSerializer(projects, many=True, context=context).data:
+            data[Change.PROJECT, item['id']] = item
+    if wanted[Change.TODO]:
+        todos = Todo.objects.filter(project__user=user, project__deleted_at__isnull=True, id__in=wanted[Change.TODO])
+        for item in TodoSerializer(todos, many=True, context=context).data:
+            data[Change.TODO, item['id']] = item
+    return data
+
+
+def describe(kind, action, object_id, project_id):
+    entry = {'type': kind, 'action': action, 'id': object_id}
+    if kind == Change.TODO:
+        entry['project'] = project_id
+    return entry
+
+
+def sync(user, after, limit, context):
+    """The batch of `user`'s changes after change id `after`: {'changes', 'token', 'has_more'}."""
+    rows = list(
+        Change.objects.filter(user=user, id__gt=after).order_by('id')
+        .values_list('id', 'kind', 'action', 'object_id', 'project_id')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = fold(row[1:] for row in rows)
+    data = current_data(user, changes, context)
+    results = []
+    for kind, action, object_id, project_id in changes:
+        item = data.get((kind, object_id))
+        if action != Change.DELETE and item is None:
+            # Gone since; its tombstone is further on in the log.
+            if action == Change.CREATE:
+                continue
+            action = Change.DELETE
+        entry = describe(kind, action, object_id, project_id)
+        if item is not None:
+            entry['data'] = item
+        results.append(entry)
+
+    return {
+        'changes': results,
+        'token': encode_token(rows[-1][0] if rows else after),
+        'has_more': has_more,
+    }
@@ -1,11 +1,41 @@
+from django.conf import settings
 from django.urls import path
 from .views import *
+from . import async_views
 
-urlpatterns = [
-    path('signup/', UserSignUpView.as_view(), name='user-signup'),
-    path('login/', UserLoginView.as_view(), name='user-login'),
-    path('projects/', ProjectCreateListView.as_view(), name='project-list-create'),
-    path('projects/<int:pk>/', ProjectDetailView.as_view(), name='project-detail'),
-    path('projects/<int:project_id>/todos/', TodoCreateListView.as_view(), name='todo-list-create'),
-    path('projects/<int:project_id>/todos/<int:pk>/', TodoDetailView.as_view(), name='todo-detail'),
-]
\ No newline at end of file
+
+def get_urlpatterns(async_auth=settings.ASYNC_AUTH_VIEWS, async_api=settings.ASYNC_API_VIEWS):
+    if async_auth:
+        signup_view, login_view = async_views.signup, async_views.login
+    else:
+        signup_view, login_view = UserSignUpView.as_view(), UserLoginView.as_view()
+    if async_api:
+        project_list, project_detail = async_views.AsyncProjectCreateListView, async_views.AsyncProjectDetailView
+        todo_list, todo_detail = async_views.AsyncTodoCreateListView, async_views.AsyncTodoDetailView
+    else:
+        project_list, project_detail = ProjectCreateListView, ProjectDetailView
+        todo_list, todo_detail = TodoCreateListView, TodoDetailView
+
+    urlpatterns = [
+        path('signup/', signup_view, name='user-signup'),
+        path('login/', login_view, name='user-login'),
+        path('projects/', project_list.as_view(), name='project-list-create'),
+        path('projects/stats/', ProjectStatsView.as_view(), name='project-stats'),
+        path('todos/search/', TodoSearchView.as_view(), name='todo-search'),
+        path('sync/', SyncView.as_view(), name='sync'),
+        path('projects/<int:pk>/', project_detail.as_view(), name='project-detail'),
+        path('projects/<int:project_id>/purge/', ProjectPurgeView.as_view(), name='project-purge'),
+        path('projects/<int:project_id>/export/', ProjectExportView.as_view(), name='project-export'),
+        path('projects/<int:project_id>/todos/', todo_list.as_view(), name='todo-list-create'),
+        path('projects/<int:project_id>/todos/bulk/', TodoBulkView.as_view(), name='todo-bulk'),
+        path('projects/<int:project_id>/todos/import/', TodoImportView.as_view(), name='todo-import'),
+        path('projects/<int:project_id>/todos/<int:pk>/', todo_detail.as_view(), name='todo-detail'),
+        path('projects/<int:project_id>/todos/<int:pk>/restore/', TodoRestoreView.as_view(), name='todo-restore'),
+    ]
+    if async_api:
+        # A long-lived stream: only served where the views run on the event loop.
+        urlpatterns.append(path('events/', async_views.events, name='events'))
+    return urlpatterns
+
+
+urlpatterns = get_urlpatterns()
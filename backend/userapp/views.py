@@ -1,16 +1,34 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.generics import GenericAPIView, ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from .serializers import *
-from rest_framework.exceptions import PermissionDenied
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .pagination import KeysetPagination, PageNumberPagination
+from .mixins import (
+    CachedListMixin, EmbeddedTodosMixin, InstrumentedViewMixin, ProjectScopedMixin, ReplicaReadMixin,
+    SparseFieldsetMixin, ValuesListMixin, bool_query_param,
+)
+from .cache import projects_scope, todos_scope
+from .db import write_lock_exempt
+from .export import EXPORTERS, stream_for
+from .archive import restore
+from .purge import delete_project
+from .search import search_todos
+from .sync import decode_token, sync
+from .importer import ImportFormatError, TodoImporter, check_type, decode_lines, guess_type
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.parsers import MultiPartParser
 
 
-class UserSignUpView(GenericAPIView):
+@write_lock_exempt
+class UserSignUpView(InstrumentedViewMixin, GenericAPIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
@@ -24,7 +42,8 @@ class UserSignUpView(GenericAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
-class UserLoginView(APIView):
+@write_lock_exempt
+class UserLoginView(InstrumentedViewMixin, APIView):
     permission_classes = [AllowAny]
     def post(self, request):
         username = request.data.get('username')
@@ -46,22 +65,37 @@ class UserLoginView(APIView):
         return Response({'error': 'Invalid Credentials'}, status=status.HTTP_400_BAD_REQUEST)
     
 
-class ProjectCreateListView(ListCreateAPIView):
+class ProjectCreateListView(InstrumentedViewMixin, ReplicaReadMixin, CachedListMixin, EmbeddedTodosMixin, SparseFieldsetMixin, ValuesListMixin, ListCreateAPIView):
     serializer_class = ProjectSerializer
+    embedded_serializer_class = ProjectWithTodosSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Project.objects.filter(user=self.request.user)    
+
+    def get_cache_scope(self):
+        return projects_scope(self.request.user.id)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class ProjectDetailView(RetrieveUpdateDestroyAPIView):
+class ProjectStatsView(InstrumentedViewMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # Served straight from the denormalized counters: one query on the
+        # (user, created_at, id) index, no todo rows touched.
+        projects = Project.objects.filter(user=request.user).order_by('created_at', 'id').values(
+            'id', 'custom_id', 'title', 'todo_count', 'completed_count', 'archived_count',
+        )
+        return Response(list(projects), status=status.HTTP_200_OK)
+
+
+class ProjectDetailView(InstrumentedViewMixin, ReplicaReadMixin, SparseFieldsetMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
 
     def get_queryset(self):
         return Project.objects.filter(user=self.request.user) 
@@ -71,34 +105,193 @@ class ProjectDetailView(RetrieveUpdateDestroyAPIView):
         id = project.id
         self.perform_destroy(project)
 
-        return Response({'id': id}, status=status.HTTP_200_OK)
-    
-class TodoCreateListView(ListCreateAPIView):
+        return self.deleted_response(id)
+
+    def perform_destroy(self, instance):
+        # Returns at once; the todos are purged in the background (see purge.py).
+        delete_project(instance)
+
+    def deleted_response(self, project_id):
+        purge_url = reverse('project-purge', kwargs={'project_id': project_id})
+        return Response({'id': project_id, 'purge': self.request.build_absolute_uri(purge_url)}, status=status.HTTP_200_OK)
+
+
+class ProjectPurgeView(InstrumentedViewMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, project_id):
+        # Progress of the purge started by deleting the project.
+        job = ProjectPurge.objects.filter(pk=project_id, user=request.user).first()
+        if job is None:
+            raise NotFound()
+        return Response(ProjectPurgeSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class TodoCreateListView(InstrumentedViewMixin, ReplicaReadMixin, CachedListMixin, ProjectScopedMixin, SparseFieldsetMixin, ValuesListMixin, ListCreateAPIView):
     serializer_class = TodoSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    pagination_class = KeysetPagination
+    project_permission_message = "You are not authorized to view todos for this project."
 
     def get_queryset(self):
-        project_id = self.kwargs['project_id']
-        user = self.request.user
-        if not Project.objects.filter(id=project_id, user=user).exists():
-            raise PermissionDenied("You are not authorized to view todos for this project.")
-        return Todo.objects.filter(project_id=project_id, project__user=user)
+        model = ArchivedTodo if self.list_archived() else Todo
+        todos = model.objects.filter(project=self.get_project())
+        # ?status=true|false; also used by the todos_next links of ?include=todos.
+        completed = bool_query_param(self.request, 'status')
+        return todos if completed is None else todos.filter(status=completed)
+
+    def list_archived(self):
+        # ?archived=true lists the project's archived todos instead (see archive.py).
+        return self.request.method in SAFE_METHODS and bool_query_param(self.request, 'archived') is True
+
+    def get_serializer_class(self):
+        return ArchivedTodoSerializer if self.list_archived() else super().get_serializer_class()
+
+    def get_cache_scope(self):
+        return todos_scope(self.kwargs['project_id'])
 
     def perform_create(self, serializer):
-        project_id = self.kwargs['project_id']
-        serializer.save(project_id=project_id)
+        serializer.save(project=self.get_project())
 
-class TodoDetailView(RetrieveUpdateDestroyAPIView):
+class TodoDetailView(InstrumentedViewMixin, ReplicaReadMixin, ProjectScopedMixin, SparseFieldsetMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = TodoSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    project_permission_message = "You are not authorized to access this todo."
 
     def get_queryset(self):
-        project_id = self.kwargs['project_id']
-        user = self.request.user
+        return Todo.objects.filter(project_id=self.kwargs['project_id'], project__deleted_at__isnull=True)
+
+    def get_object(self):
+        # Fetch the todo and its project together; ownership is checked on
+        # the joined row, and only a miss needs a second query to tell a
+        # foreign project (403) from a missing todo (404).
+        todo = self.get_queryset().select_related('project').filter(pk=self.kwargs['pk']).first()
+        if todo is None or todo.project.user_id != self.request.user.id:
+            self.get_project()
+            raise NotFound()
+        self._project = todo.project
+        self.check_object_permissions(self.request, todo)
+        return todo
+           
+
+class TodoRestoreView(InstrumentedViewMixin, ReplicaReadMixin, ProjectScopedMixin, GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    project_permission_message = "You are not authorized to restore todos in this project."
+
+    def post(self, request, project_id, pk):
+        archived = ArchivedTodo.objects.filter(project=self.get_project(), pk=pk).first()
+        if archived is None:
+            raise NotFound()
+        archived.project = self.get_project()
+        try:
+            todo = restore(archived)
+        except ArchivedTodo.DoesNotExist:
+            raise NotFound()
+        except IntegrityError as error:
+            if violates_constraint(error, Todo, TodoSerializer.unique_constraint):
+                return Response({'description': [TodoSerializer.unique_message]}, status=status.HTTP_400_BAD_REQUEST)
+            # A concurrent restore of the same todo committed its row first.
+            if Todo.objects.filter(pk=pk).exists():
+                return Response({'detail': "This todo has already been restored."}, status=status.HTTP_409_CONFLICT)
+            raise
+        return Response(TodoSerializer(todo).data, status=status.HTTP_200_OK)
+
+
+class TodoSearchView(InstrumentedViewMixin, ReplicaReadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberPagination
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'A search query (?q=) is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = self.pagination_class()
+        results = paginator.paginate_queryset(
+            lambda limit, offset: search_todos(request.user, query, limit, offset), request, view=self
+        )
+        return paginator.get_paginated_response(results)
+
+
+class SyncView(InstrumentedViewMixin, ReplicaReadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # ?token= from the previous response; none replays the whole log.
+        token = request.query_params.get('token')
+        after = decode_token(token) if token else 0
+        limit = getattr(settings, 'SYNC_BATCH_SIZE', 500)
+        try:
+            requested = int(request.query_params['limit'])
+            if requested > 0:
+                limit = min(requested, limit)
+        except (KeyError, ValueError):
+            pass
+        return Response(sync(request.user, after, limit, {'request': request}), status=status.HTTP_200_OK)
+
+
+class TodoBulkView(InstrumentedViewMixin, ReplicaReadMixin, ProjectScopedMixin, GenericAPIView):
+    serializer_class = TodoBulkSerializer
+    permission_classes = [IsAuthenticated]
+    project_permission_message = "You are not authorized to modify todos for this project."
+
+    def post(self, request, project_id):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        return Response({
+            'created': TodoSerializer(result['created'], many=True).data,
+            'updated': TodoSerializer(result['updated'], many=True).data,
+            'deleted': result['deleted'],
+        }, status=status.HTTP_200_OK)
+
+
+class ProjectExportView(InstrumentedViewMixin, ProjectScopedMixin, GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    project_permission_message = "You are not authorized to export this project."
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is Markdown/JSONL/CSV, whatever the client's Accept says.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, project_id):
+        export_type = request.query_params.get('type', 'md')
+        if export_type not in EXPORTERS:
+            return Response({'error': f"Unsupported export type. Use one of: {', '.join(EXPORTERS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        project = self.get_project()
+        exporter, content_type = EXPORTERS[export_type]
+        response = StreamingHttpResponse(stream_for(request._request, exporter(project)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{project.custom_id}.{export_type}"'
+        return response
+
+
+class TodoImportView(InstrumentedViewMixin, ReplicaReadMixin, ProjectScopedMixin, GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    project_permission_message = "You are not authorized to import todos into this project."
+
+    def post(self, request, project_id):
+        # Either a multipart upload in "file", or the file itself as the
+        # request body; both are read line by line, never held in memory.
+        if request.content_type.startswith('multipart/'):
+            source = request.FILES.get('file')
+            if source is None:
+                return Response({'error': 'Upload the todos as "file".'}, status=status.HTTP_400_BAD_REQUEST)
+            import_type = request.query_params.get('type') or guess_type(source.name)
+        else:
+            source = request._request
+            import_type = request.query_params.get('type', 'jsonl')
+
+        try:
+            parse = check_type(import_type)
+        except ImportFormatError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not Project.objects.filter(id=project_id, user=user).exists():
-            raise PermissionDenied("You are not authorized to access this todo.")        
-        return Todo.objects.filter(project_id=project_id)
-           
\ No newline at end of file
+        importer = TodoImporter(self.get_project())
+        try:
+            result = importer.run(parse(decode_lines(source)))
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            # Batches before the bad line stay imported; report how far we got.
+            return Response({'error': str(exc), **importer.result(0)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
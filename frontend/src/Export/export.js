@@ -1,22 +1,28 @@
 import axios from 'axios';
 import { toast } from 'react-toastify';
 
-export const exportProject = async (projectTitle, todos) => {
-    const completedTodos = todos.filter(todo => todo.status);
-    const pendingTodos = todos.filter(todo => !todo.status);
+const API_URL = "http://127.0.0.1:8000/"
 
+// The summary is rendered and streamed by the backend, so the browser no
+// longer needs every todo loaded to build it.
+export const exportProject = async (projectId, projectTitle) => {
+  const tokens = JSON.parse(localStorage.getItem('tokens'));
+  const accessToken = tokens?.access_token;
 
-  const markdownContent = `
-# ${projectTitle}
-
-**Summary**: ${completedTodos.length}/${todos.length} todos completed
-
-## Pending
-${pendingTodos.map((todo) => `- [ ] ${todo.description}`).join('\n')}
-
-## Completed
-${completedTodos.map((todo) => `- [x] ${todo.description}`).join('\n')}
-  `;
+  let markdownContent;
+  try {
+    const response = await axios.get(`${API_URL}/api/projects/${projectId}/export/`, {
+      params: { type: 'md' },
+      responseType: 'text',
+      headers: {
+        Authorization: `Bearer ${accessToken}`,
+      },
+    });
+    markdownContent = response.data;
+  } catch (error) {
+    toast.error('Failed to export the project summary.');
+    return;
+  }
 
   try {
     const response = await axios.post(
@@ -0,0 +1,12 @@
+// List endpoints are cursor paginated; the next page is advertised in a
+// `Link: <url>; rel="next"` header. Lists load one page at a time and keep
+// that url to fetch the next one when the user asks for more.
+export const nextPageUrl = (linkHeader) => {
+  const match = linkHeader?.match(/<([^>]+)>;\s*rel="next"/);
+  return match ? match[1] : null;
+};
+
+export const getPage = async (axios, url, config) => {
+  const response = await axios.get(url, config);
+  return { results: response.data, next: nextPageUrl(response.headers.link) };
+};
@@ -1,10 +1,12 @@
 import { createSlice, createAsyncThunk } from "@reduxjs/toolkit";
 import axios from 'axios'
+import { getPage } from './pagination';
 
 const API_URL = "http://127.0.0.1:8000/"
 
 const initialState = {
     projects: [],
+    next: null,
     loading: false,
     error: null,
     success: false,
@@ -46,8 +48,30 @@ const initialState = {
             Authorization: `Bearer ${accessToken}`,
           },
         };
-        const response = await axios.get(`${API_URL}/api/projects/`, config);
-        return response.data;
+        return await getPage(axios, `${API_URL}/api/projects/`, config);
+      } catch (error) {
+        if (error.response) {
+          return thunkAPI.rejectWithValue(error.response.data);
+        }
+        return thunkAPI.rejectWithValue({ message: 'Something went wrong, please try again later.' });
+      }
+    }
+  );
+
+  // Loads the page after the ones shown, from the url in state.next.
+  export const getMoreProjects = createAsyncThunk(
+    'projects/getMoreProjects',
+    async (next, thunkAPI) => {
+      try {
+        const tokens = JSON.parse(localStorage.getItem('tokens'));
+        const accessToken = tokens?.access_token;
+  
+        const config = {
+          headers: {
+            Authorization: `Bearer ${accessToken}`,
+          },
+        };
+        return await getPage(axios, next, config);
       } catch (error) {
         if (error.response) {
           return thunkAPI.rejectWithValue(error.response.data);
@@ -144,15 +168,30 @@ const initialState = {
           .addCase(getAllProject.fulfilled, (state, action) => {
             state.loading = false;
             state.success = true;
-            const allProjects = action.payload.flat();
-
-            allProjects.forEach((newProject) => {
+            state.projects = action.payload.results;
+            state.next = action.payload.next;
+          })
+          .addCase(getAllProject.rejected, (state, action) => {
+            state.loading = false;
+            state.success = false;
+            state.error = action.payload?.message || 'Failed to load project';
+          })
+          .addCase(getMoreProjects.pending, (state) => {
+            state.loading = true;
+            state.error = null;
+            state.success = false;
+          })
+          .addCase(getMoreProjects.fulfilled, (state, action) => {
+            state.loading = false;
+            state.success = true;
+            action.payload.results.forEach((newProject) => {
               const exists = state.projects.some((project) => project.id === newProject.id);
               if (!exists) {
                 state.projects.push(newProject);
               }})
+            state.next = action.payload.next;
           })
-          .addCase(getAllProject.rejected, (state, action) => {
+          .addCase(getMoreProjects.rejected, (state, action) => {
             state.loading = false;
             state.success = false;
             state.error = action.payload?.message || 'Failed to load project';
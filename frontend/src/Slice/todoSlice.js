@@ -1,10 +1,12 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import axios from 'axios';
+import { getPage } from './pagination';
 
 const API_URL = "http://127.0.0.1:8000/"
 
 const initialState = {
   todos: [],
+  next: null,
   loading: false,
   error: null,
   success: false,
@@ -48,8 +50,30 @@ export const getAllTodos = createAsyncThunk(
             Authorization: `Bearer ${accessToken}`,
           },
         };
-        const response = await axios.get(`${API_URL}/api/projects/${project_id}/todos/`, config);
-        return response.data;
+        return await getPage(axios, `${API_URL}/api/projects/${project_id}/todos/`, config);
+      } catch (error) {
+        if (error.response) {
+          return thunkAPI.rejectWithValue(error.response.data);
+        }
+        return thunkAPI.rejectWithValue({ message: 'Something went wrong, please try again later.' });
+      }
+    }
+  );
+
+  // Loads the page after the ones shown, from the url in state.next.
+  export const getMoreTodos = createAsyncThunk(
+    'todos/getMoreTodos',
+    async (next, thunkAPI) => {
+      try {
+        const tokens = JSON.parse(localStorage.getItem('tokens'));
+        const accessToken = tokens?.access_token;
+  
+        const config = {
+          headers: {
+            Authorization: `Bearer ${accessToken}`,
+          },
+        };
+        return await getPage(axios, next, config);
       } catch (error) {
         if (error.response) {
           return thunkAPI.rejectWithValue(error.response.data);
@@ -152,13 +176,34 @@ const todosSlice = createSlice({
       .addCase(getAllTodos.fulfilled, (state, action) => {
         state.loading = false;
         state.success = true;
-        state.todos = action.payload; 
+        state.todos = action.payload.results;
+        state.next = action.payload.next;
       })
       .addCase(getAllTodos.rejected, (state, action) => {
         state.loading = false;
         state.success = false;
         state.error = action.payload?.message || 'Failed to fetch todos';
       })
+      .addCase(getMoreTodos.pending, (state) => {
+        state.loading = true;
+        state.error = null;
+        state.success = false;
+      })
+      .addCase(getMoreTodos.fulfilled, (state, action) => {
+        state.loading = false;
+        state.success = true;
+        action.payload.results.forEach((newTodo) => {
+          if (!state.todos.some((todo) => todo.id === newTodo.id)) {
+            state.todos.push(newTodo);
+          }
+        });
+        state.next = action.payload.next;
+      })
+      .addCase(getMoreTodos.rejected, (state, action) => {
+        state.loading = false;
+        state.success = false;
+        state.error = action.payload?.message || 'Failed to fetch todos';
+      })
       .addCase(updateTodo.pending, (state) => {
         state.loading = true;
         state.error = null;
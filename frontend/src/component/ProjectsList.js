@@ -12,7 +12,7 @@ import { useState } from 'react';
 import { useDispatch, useSelector } from 'react-redux';
 import { useNavigate } from 'react-router-dom';
 import { useEffect } from 'react';
-import { createProject, deleteProject, getAllProject, resetState } from '../Slice/projects';
+import { createProject, deleteProject, getAllProject, getMoreProjects, resetState } from '../Slice/projects';
 import { toast } from 'react-toastify';
 import { Delete } from '@mui/icons-material';
 import { format } from 'date-fns';
@@ -34,7 +34,7 @@ function ProjectList(props) {
   const navigate = useNavigate()
 
   const logoutSuccess = useSelector((state) => !state.authentication.user);
-  const {projects, loading, error, message, success} = useSelector(state => state.projects)
+  const {projects, next, loading, error, message, success} = useSelector(state => state.projects)
 
   useEffect(() => {
       if (logoutSuccess) {
@@ -190,6 +190,13 @@ function ProjectList(props) {
               />
             </ListItem>
           )}
+          {next && (
+            <Box display="flex" justifyContent="center">
+              <Button variant="outlined" disabled={loading} onClick={() => dispatch(getMoreProjects(next))}>
+                Load more
+              </Button>
+            </Box>
+          )}
         </List>
 
         <Dialog open={openDialog} onClose={handleDeleteCancel}>
@@ -17,7 +17,7 @@ import { toast } from 'react-toastify';
 import { Cancel, Delete, Edit, ExpandMoreOutlined, ImportExport, Save } from '@mui/icons-material';
 import { format } from 'date-fns';
 import Navbar from './navbar';
-import { createTodo, deleteTodo, getAllTodos, resetTodoState, updateTodo } from '../Slice/todoSlice';
+import { createTodo, deleteTodo, getAllTodos, getMoreTodos, resetTodoState, updateTodo } from '../Slice/todoSlice';
 import { exportProject } from '../Export/export';
 
 
@@ -52,7 +52,7 @@ function TodoList(props) {
   const [editedTitle, setEditedTitle] = useState(projectTitle);
 
   const logoutSuccess = useSelector((state) => !state.authentication.user);
-  const {todos, loading, error, message, success} = useSelector(state => state.todos)
+  const {todos, next, loading, error, message, success} = useSelector(state => state.todos)
   const {success: projectsSuccess, error: projectsError, loading: projectsLoading, message: projectMessage } = useSelector(state => state.projects)
 
   useEffect(() => {
@@ -204,7 +204,7 @@ function TodoList(props) {
   };
 
   const handleExportProject = () => {
-    exportProject(projectTitle, todos);
+    exportProject(projectId, projectTitle);
   };
 
   return (
@@ -456,6 +456,13 @@ function TodoList(props) {
                     No tasks available
                     </Typography>
                 )}
+                {next && (
+                    <Box display="flex" justifyContent="center">
+                    <Button variant="outlined" disabled={loading} onClick={() => dispatch(getMoreTodos(next))}>
+                        Load more
+                    </Button>
+                    </Box>
+                )}
                 </List>
 
 